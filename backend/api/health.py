@@ -0,0 +1,40 @@
+import os
+from fastapi import APIRouter, Response, status
+from schemas.health import HealthResponse, ReadyResponse
+from core.config import settings
+from core.startup import startup_state
+
+router = APIRouter()
+
+@router.get("/health", response_model=HealthResponse)
+async def health():
+    return HealthResponse(
+        status="ok",
+        version="0.1.0",
+        environment="development" if settings.DEBUG else "production"
+    )
+
+@router.get("/ready", response_model=ReadyResponse)
+async def ready(response: Response):
+    storage_accessible = os.access(settings.STORAGE_PATH, os.W_OK)
+    
+    if not startup_state.completed:
+        message = "Warm-up in progress"
+    elif startup_state.error:
+        message = f"Warm-up failed: {startup_state.error}"
+    elif not startup_state.model_loaded:
+        message = "No active model version"
+    else:
+        message = "Ready"
+    
+    is_ready = startup_state.completed and startup_state.error is None and startup_state.model_loaded
+    if not is_ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    
+    return ReadyResponse(
+        ready=is_ready,
+        model_loaded=startup_state.model_loaded,
+        storage_accessible=storage_accessible,
+        message=message,
+        timings=startup_state.timings
+    )
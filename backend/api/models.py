@@ -1,19 +1,15 @@
 import logging
 from fastapi import APIRouter, HTTPException, status, Depends
 from schemas.scoring import ActivateModelRequest, ActivateModelResponse, ModelsResponse
-from ml.models.model_registry import ModelRegistry
+from api.scoring import get_scoring_service
 from core.security import verify_admin_api_key
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-model_registry = None
-
 def get_model_registry():
-    global model_registry
-    if model_registry is None:
-        model_registry = ModelRegistry()
-    return model_registry
+    # Share the scoring service's registry so activations reach the scoring path
+    return get_scoring_service().registry
 
 @router.get("/models", response_model=ModelsResponse)
 async def get_models():
@@ -1,15 +1,18 @@
+import os
 import logging
 import asyncio
+from typing import List
 from fastapi import APIRouter, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from schemas.scoring import (
     ScoringRequest, BatchScoringRequest, ScoringResponse, 
-    BatchScoringResponse, TrainingConfig, TrainingResponse
+    BatchScoringResponse, TrainingConfig, TrainingResponse, TrainingJobStatus, ExplanationCacheStats
 )
+from ml.models.training_jobs import TrainingJobManager, TooManyTrainingJobs
 from ml.aggregate.scoring_service import ScoringService
-from ml.models.training import TrainingPipeline
+from ml.aggregate.deadline import Deadline, DeadlineExceeded
 from core.config import settings
-import numpy as np
-import pandas as pd
+from core.startup import startup_state
 import uuid
 
 logger = logging.getLogger(__name__)
@@ -21,37 +24,32 @@ def get_scoring_service():
     global scoring_service
     if scoring_service is None:
         scoring_service = ScoringService()
+        startup_state.set_model_loaded(scoring_service.registry.active_version is not None)
     return scoring_service
 
 @router.post("/score", response_model=ScoringResponse)
 async def score(request: ScoringRequest):
+    deadline = Deadline(settings.REQUEST_TIMEOUT_SECONDS)
     try:
         service = get_scoring_service()
         
-        X = np.array([[
-            request.application.loan_amnt,
-            request.application.annual_inc,
-            request.application.open_acc,
-            request.application.total_acc,
-            request.application.mort_acc,
-            request.application.delinq_2yrs,
-            request.application.revol_bal,
-            request.application.tot_cur_bal,
-            request.application.avg_cur_bal,
-            request.application.acc_open_past_24mths,
-            request.application.term_int,
-            request.application.emp_length_int,
-            request.application.open_account_ratio,
-            request.application.severe_credit_event,
-            request.application.inquiry_density,
-            float(hash(request.application.purpose) % 100) / 100,
-            float(hash(request.application.verification_status) % 100) / 100,
-            float(hash(request.application.home_ownership) % 100) / 100,
-        ]])
+        application = request.application.model_dump()
+        X = service.vectorize([application])
         
-        result = service.score(X, include_shap=request.include_shap)
+        # Scoring runs off the event loop; time spent waiting for a worker
+        # thread counts against the deadline and feeds load shedding
+        result = await run_in_threadpool(
+            service.score, X, include_shap=request.include_shap, deadline=deadline,
+            explanation_engine=request.explanation_engine, application=application
+        )
         return result
     
+    except DeadlineExceeded as e:
+        logger.warning(f"Scoring timed out: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Scoring deadline exceeded"
+        )
     except Exception as e:
         logger.error(f"Scoring failed: {e}")
         raise HTTPException(
@@ -61,6 +59,7 @@ async def score(request: ScoringRequest):
 
 @router.post("/score/batch", response_model=BatchScoringResponse)
 async def score_batch(request: BatchScoringRequest):
+    deadline = Deadline(settings.REQUEST_TIMEOUT_SECONDS)
     try:
         if len(request.applications) > settings.BATCH_SIZE_LIMIT:
             raise HTTPException(
@@ -70,31 +69,14 @@ async def score_batch(request: BatchScoringRequest):
         
         service = get_scoring_service()
         
-        X_list = []
-        for app in request.applications:
-            X = np.array([[
-                app.loan_amnt,
-                app.annual_inc,
-                app.open_acc,
-                app.total_acc,
-                app.mort_acc,
-                app.delinq_2yrs,
-                app.revol_bal,
-                app.tot_cur_bal,
-                app.avg_cur_bal,
-                app.acc_open_past_24mths,
-                app.term_int,
-                app.emp_length_int,
-                app.open_account_ratio,
-                app.severe_credit_event,
-                app.inquiry_density,
-                float(hash(app.purpose) % 100) / 100,
-                float(hash(app.verification_status) % 100) / 100,
-                float(hash(app.home_ownership) % 100) / 100,
-            ]])
-            X_list.append(X)
+        applications = [app.model_dump() for app in request.applications]
+        X = service.vectorize(applications)
+        X_list = list(X)
         
-        results = service.batch_score(X_list, include_shap=request.include_shap)
+        results = await run_in_threadpool(
+            service.batch_score, X_list, include_shap=request.include_shap, deadline=deadline,
+            explanation_engine=request.explanation_engine, applications=applications
+        )
         
         request_id = str(uuid.uuid4())
         return BatchScoringResponse(
@@ -106,6 +88,12 @@ async def score_batch(request: BatchScoringRequest):
     
     except HTTPException:
         raise
+    except DeadlineExceeded as e:
+        logger.warning(f"Batch scoring timed out: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Scoring deadline exceeded"
+        )
     except Exception as e:
         logger.error(f"Batch scoring failed: {e}")
         raise HTTPException(
@@ -113,41 +101,94 @@ async def score_batch(request: BatchScoringRequest):
             detail="Batch scoring service error"
         )
 
-@router.post("/train", response_model=TrainingResponse)
-async def train(config: TrainingConfig):
-    try:
-        df = pd.read_csv(config.data_path)
-        
-        feature_cols = [
-            'loan_amnt', 'annual_inc', 'open_acc', 'total_acc', 'mort_acc',
-            'delinq_2yrs', 'revol_bal', 'tot_cur_bal', 'avg_cur_bal',
-            'acc_open_past_24mths', 'term_int', 'emp_length_int',
-            'open_account_ratio', 'severe_credit_event', 'inquiry_density',
-            'purpose', 'verification_status', 'home_ownership'
-        ]
-        
-        X = df[feature_cols].values
-        y = df['loan_status'].values
-        
-        pipeline = TrainingPipeline()
-        result = pipeline.train(X, y, feature_cols, config.model_dump())
-        
-        return TrainingResponse(
-            model_version=result['model_version'],
-            training_time_seconds=result['training_time_seconds'],
-            metrics=result['metrics'],
-            artifact_path=result['artifact_path']
-        )
+@router.get("/explanations/cache", response_model=ExplanationCacheStats)
+async def explanation_cache_stats():
+    cache = get_scoring_service().explanation_cache
+    if cache is None:
+        return ExplanationCacheStats(enabled=False)
+    return ExplanationCacheStats(enabled=True, **cache.stats())
+
+training_jobs = None
+
+def get_training_jobs():
+    global training_jobs
+    if training_jobs is None:
+        training_jobs = TrainingJobManager()
+    return training_jobs
+
+def _job_status(job: dict) -> TrainingJobStatus:
+    from ml.models.training import TRAINING_STAGES
     
-    except FileNotFoundError as e:
-        logger.error(f"Data file not found: {e}")
+    # Parallel training reports one fit_models stage in place of three; a search adds one
+    done = [s['stage'] for s in job['stages']]
+    seen = done + [job['stage']]
+    expected = len(TRAINING_STAGES) - (2 if 'fit_models' in seen else 0) + (1 if 'search' in seen else 0)
+    progress = 1.0 if job['state'] == 'succeeded' else min(len(done) / expected, 0.99)
+    
+    return TrainingJobStatus(
+        job_id=job['job_id'],
+        state=job['state'],
+        stage=job['stage'],
+        progress=progress,
+        stages=job['stages'],
+        submitted_at=job['submitted_at'],
+        finished_at=job['finished_at'],
+        error=job['error'],
+        result=TrainingResponse(**job['result']) if job['result'] else None
+    )
+
+@router.post("/train", response_model=TrainingJobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def train(config: TrainingConfig):
+    # Training runs in its own process; poll GET /train/{job_id} for progress
+    if not os.path.exists(config.data_path):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Data file not found"
         )
+    if config.incremental and config.parent_version is None:
+        config.parent_version = get_scoring_service().registry.active_version
+        if config.parent_version is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="No active model version to continue training from"
+            )
+    try:
+        job = await run_in_threadpool(get_training_jobs().submit, config.model_dump())
+        return _job_status(job)
+    
+    except TooManyTrainingJobs as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=str(e)
+        )
     except Exception as e:
-        logger.error(f"Training failed: {e}")
+        logger.error(f"Failed to start training: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Training service error"
         )
+
+@router.get("/train", response_model=List[TrainingJobStatus])
+async def list_training_jobs():
+    return [_job_status(job) for job in get_training_jobs().list_jobs()]
+
+@router.get("/train/{job_id}", response_model=TrainingJobStatus)
+async def get_training_job(job_id: str):
+    try:
+        return _job_status(get_training_jobs().get(job_id))
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Training job not found"
+        )
+
+@router.post("/train/{job_id}/cancel", response_model=TrainingJobStatus)
+async def cancel_training_job(job_id: str):
+    try:
+        job = await run_in_threadpool(get_training_jobs().cancel, job_id)
+        return _job_status(job)
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Training job not found"
+        )
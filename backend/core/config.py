@@ -26,16 +26,51 @@ class Settings(BaseSettings):
 
     STORAGE_PATH: str = "./storage"
     MODEL_PATH: str = "./storage/models"
+    STREAM_CHUNK_SIZE: int = 100000
+    DATASET_CACHE_ENABLED: bool = True
+    DATASET_CACHE_PATH: str = "./storage/dataset_cache"
+    FEATURE_ENGINEERING_WORKERS: int = 1
+    TRAINING_PARALLEL: bool = False
+    TRAINING_CORE_BUDGET: str = ""
+    TRAINING_SEARCH_WORKERS: int = 0
+    TRAINING_INCREMENTAL_ROUNDS: int = 50
+    EVALUATION_BOOTSTRAP_SAMPLES: int = 200
+    EVALUATION_CONFIDENCE: float = 0.95
+    TRAINING_JOBS_PATH: str = "./storage/training_jobs"
+    TRAINING_MAX_CONCURRENT_JOBS: int = 1
     
     BATCH_SIZE_LIMIT: int = 1000
     REQUEST_TIMEOUT_SECONDS: int = 30
     RATE_LIMIT_PER_MINUTE: int = 100
+    SHED_QUEUE_LATENCY_SECONDS: float = 2.0
     
     KNN_K: int = 5
     KNN_METRIC: str = "euclidean"
     
     DEFAULT_THRESHOLD: float = 0.5
     
+    FRAUD_THRESHOLD: float = 60.0
+    FRAUD_SHORT_CIRCUIT: bool = True
+    FRAUD_ENGINE: str = "flat"
+    FRAUD_REFRESH_ENABLED: bool = False
+    FRAUD_REFRESH_INTERVAL_SECONDS: float = 3600.0
+    FRAUD_REFRESH_WINDOW: int = 50000
+    FRAUD_REFRESH_MIN_ROWS: int = 5000
+    
+    SHAP_ENGINE: str = "native"
+    SHAP_BACKGROUND_SIZE: int = 50
+    
+    EXPLANATION_CACHE_SIZE: int = 10000
+    EXPLANATION_CACHE_SPILL: bool = False
+    EXPLANATION_CACHE_TTL_SECONDS: int = 86400
+    
+    WARMUP_ON_STARTUP: bool = True
+    WARMUP_IN_BACKGROUND: bool = False
+    
+    SHARED_STATE_ENABLED: bool = False
+    SHARED_STATE_PATH: str = "./storage/shared_state"
+    SHARED_STATE_POLL_SECONDS: float = 1.0
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,34 @@
+import threading
+from typing import Dict, Optional
+
+class StartupState:
+    """
+    Tracks service warm-up so readiness can be gated on it.
+    Timings are recorded in seconds per startup phase.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.error: Optional[str] = None
+        self.model_loaded = False
+        self._done = threading.Event()
+
+    @property
+    def completed(self) -> bool:
+        return self._done.is_set()
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.timings[phase] = round(seconds, 4)
+
+    def mark_completed(self, model_loaded: bool, error: Optional[str] = None) -> None:
+        self.model_loaded = model_loaded
+        self.error = error
+        self._done.set()
+
+    def set_model_loaded(self, model_loaded: bool) -> None:
+        self.model_loaded = model_loaded
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+startup_state = StartupState()
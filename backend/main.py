@@ -1,18 +1,79 @@
+import time
+_import_start = time.perf_counter()
+
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from core.config import settings
-from api import scoring, models as model_routes
+from core.startup import startup_state
+from api import scoring, models as model_routes, health
 from utils.logging_config import setup_logging
 
+startup_state.record('imports', time.perf_counter() - _import_start)
+
 setup_logging()
 logger = logging.getLogger(__name__)
 
+def warm_up_services():
+    start = time.perf_counter()
+    try:
+        service = scoring.get_scoring_service()
+        startup_state.record('service_init', time.perf_counter() - start)
+
+        for stage, seconds in service.warm_up().items():
+            startup_state.record(f"warmup_{stage}", seconds)
+
+        startup_state.record('warmup_total', time.perf_counter() - start)
+        startup_state.mark_completed(model_loaded=service.registry.active_version is not None)
+        logger.info(f"Warm-up complete: {startup_state.timings}")
+    except Exception as e:
+        logger.error(f"Warm-up failed: {e}")
+        startup_state.mark_completed(model_loaded=False, error=str(e))
+
+async def fraud_refresh_loop():
+    # Refits run in a worker thread so scoring keeps the event loop
+    while True:
+        await asyncio.sleep(settings.FRAUD_REFRESH_INTERVAL_SECONDS)
+        try:
+            refresher = scoring.get_scoring_service().fraud_refresher
+            if refresher is not None:
+                refit = asyncio.ensure_future(asyncio.to_thread(refresher.run_once))
+                try:
+                    await asyncio.shield(refit)
+                except asyncio.CancelledError:
+                    # Cancelling does not stop the thread; let it finish swapping
+                    # registry.fraud before shutdown carries on
+                    await refit
+                    raise
+        except Exception as e:
+            logger.error(f"Fraud refresh failed: {e}")
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    logger.info("Application startup")
+    logger.info(f"Application startup (imports took {startup_state.timings['imports']:.2f}s)")
+
+    warmup_task = None
+    if settings.WARMUP_ON_STARTUP:
+        warmup_task = asyncio.create_task(asyncio.to_thread(warm_up_services))
+        if not settings.WARMUP_IN_BACKGROUND:
+            await warmup_task
+    else:
+        # Lazy mode: models are loaded on the first scoring request, which
+        # flips model_loaded once a version is actually active
+        startup_state.mark_completed(model_loaded=False)
+
+    refresh_task = asyncio.create_task(fraud_refresh_loop()) if settings.FRAUD_REFRESH_ENABLED else None
+
     yield
+
+    if refresh_task is not None:
+        refresh_task.cancel()
+        # Waits for a refit in progress (see fraud_refresh_loop)
+        await asyncio.gather(refresh_task, return_exceptions=True)
+    if warmup_task is not None and not warmup_task.done():
+        await warmup_task
     logger.info("Application shutdown")
 
 app = FastAPI(
@@ -32,6 +93,7 @@ app.add_middleware(
 
 app.include_router(scoring.router, prefix="/api/v1", tags=["scoring"])
 app.include_router(model_routes.router, prefix="/api/v1", tags=["models"])
+app.include_router(health.router, tags=["health"])
 
 @app.get("/")
 async def root():
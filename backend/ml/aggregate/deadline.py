@@ -0,0 +1,78 @@
+import time
+import threading
+from typing import Dict, Optional
+from core.config import settings
+
+class DeadlineExceeded(Exception):
+    pass
+
+class Deadline:
+    """Time budget for one request, measured from when it was received."""
+
+    def __init__(self, budget_seconds: float, started_at: Optional[float] = None):
+        self.started_at = started_at if started_at is not None else time.monotonic()
+        self.expires_at = self.started_at + budget_seconds
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def allows(self, estimated_seconds: float) -> bool:
+        return self.remaining() > estimated_seconds
+
+    def check(self, stage: str) -> None:
+        """Raise DeadlineExceeded if the budget ran out before a required stage."""
+        if self.expired():
+            raise DeadlineExceeded(f"Request deadline exceeded before {stage} ({self.elapsed():.2f}s elapsed)")
+
+class StageLatency:
+    """Exponentially weighted per-row cost of each pipeline stage."""
+
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self._per_row: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float, n_rows: int = 1) -> None:
+        per_row = seconds / max(n_rows, 1)
+        with self._lock:
+            previous = self._per_row.get(stage)
+            self._per_row[stage] = per_row if previous is None else (
+                self.alpha * per_row + (1 - self.alpha) * previous
+            )
+
+    def estimate(self, stage: str, n_rows: int = 1) -> float:
+        return self._per_row.get(stage, 0.0) * n_rows
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            return dict(self._per_row)
+
+class LoadShedder:
+    """
+    Tracks queue latency (time between a request arriving and scoring
+    starting) and switches to shedding optional stages while it stays above
+    SHED_QUEUE_LATENCY_SECONDS. Shedding stops once it falls below half.
+    """
+
+    def __init__(self, threshold_seconds: Optional[float] = None, alpha: float = 0.2):
+        self.threshold = threshold_seconds if threshold_seconds is not None else settings.SHED_QUEUE_LATENCY_SECONDS
+        self.alpha = alpha
+        self.queue_latency = 0.0
+        self.shedding = False
+        self._lock = threading.Lock()
+
+    def observe(self, queue_seconds: float) -> None:
+        if self.threshold <= 0:
+            return
+        with self._lock:
+            self.queue_latency = self.alpha * queue_seconds + (1 - self.alpha) * self.queue_latency
+            if self.queue_latency > self.threshold:
+                self.shedding = True
+            elif self.queue_latency < self.threshold / 2:
+                self.shedding = False
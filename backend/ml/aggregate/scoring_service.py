@@ -1,86 +1,383 @@
 import numpy as np
 import logging
+import time
 import uuid
 from typing import List, Dict, Any, Optional
 from ml.models.model_registry import ModelRegistry
+from ml.models.fraud_refresh import FraudRefresher
+from ml.models.fraud_rules import RULES
 from ml.explanation.explainability import SHAPExplainer
+from ml.explanation.cache import ExplanationCache
+from ml.aggregate.deadline import Deadline, DeadlineExceeded, StageLatency, LoadShedder
 from services.groq_service import GroqService
+from services.template_explanation_service import TemplateExplanationService
 from schemas.scoring import ScoringResponse, SHAPPayload, SHAPContributor, FraudDetectionResult
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+LEGACY_NUMERIC_FEATURES = [
+    'loan_amnt', 'annual_inc', 'open_acc', 'total_acc', 'mort_acc',
+    'delinq_2yrs', 'revol_bal', 'tot_cur_bal', 'avg_cur_bal',
+    'acc_open_past_24mths', 'term_int', 'emp_length_int',
+    'open_account_ratio', 'severe_credit_event', 'inquiry_density'
+]
+LEGACY_CATEGORICAL_FEATURES = ['purpose', 'verification_status', 'home_ownership']
+
 class ScoringService:
     
     def __init__(self):
         self.registry = ModelRegistry()
         self.groq_service = GroqService()
+        self.template_service = TemplateExplanationService()
+        self.explanation_cache = ExplanationCache() if settings.EXPLANATION_CACHE_SIZE > 0 else None
+        self.stage_latency = StageLatency()
+        self.load_shedder = LoadShedder()
+        self.fraud_refresher = FraudRefresher(self.registry) if settings.FRAUD_REFRESH_ENABLED else None
         self.explainer = None
         self._init_explainer()
+        self.registry.add_activation_listener(self._on_activation)
+    
+    def _on_activation(self, version: str) -> None:
+        if self.explanation_cache is not None:
+            self.explanation_cache.invalidate()
+        self._init_explainer()
     
     def _init_explainer(self):
         try:
             model = self.registry.get_active_model('xgboost')
             if model:
-                X_background = np.random.randn(100, len(self.registry.feature_names))
                 self.explainer = SHAPExplainer(
                     model, 
-                    X_background, 
-                    model_type='tree'
+                    self.registry.background, 
+                    model_type='tree',
+                    engine=settings.SHAP_ENGINE,
+                    cache=self.explanation_cache,
+                    cache_namespace=self.registry.active_version
                 )
         except Exception as e:
             logger.error(f"Failed to initialize explainer: {e}")
             self.explainer = None
     
-    def score(self, X: np.ndarray, include_shap: bool = True) -> ScoringResponse:
-        request_id = str(uuid.uuid4())
+    def warm_up(self) -> Dict[str, float]:
+        timings = {}
+        if self.registry.active_version is None:
+            logger.warning("No active model version, skipping warm-up")
+            return timings
         
-        model = self.registry.get_active_model('xgboost')
-        raw_proba = model.predict_proba(X)[0, 1]
+        X = np.zeros((1, len(self.registry.feature_names)))
         
-        smoothed_proba = self.registry.smoother.smooth(X, np.array([raw_proba]))
-        if smoothed_proba is not None:
-            smoothed_proba = smoothed_proba[0, 0]
-        else:
-            smoothed_proba = raw_proba
+        start = time.perf_counter()
+        for model in self.registry.models.values():
+            model.predict_proba(X)
+        timings['predict'] = time.perf_counter() - start
         
-        decision = "APPROVE" if smoothed_proba <= settings.DEFAULT_THRESHOLD else "DECLINE"
+        if self.registry.fraud is not None:
+            start = time.perf_counter()
+            self.registry.fraud.score(X)
+            timings['fraud'] = time.perf_counter() - start
         
-        shap_payload = None
-        if include_shap and self.explainer:
+        if self.registry.smoother is not None:
+            start = time.perf_counter()
+            self.registry.smoother.smooth(X, np.zeros((1, 1)))
+            timings['smoother'] = time.perf_counter() - start
+        
+        if self.explainer:
+            start = time.perf_counter()
+            self.explainer.explain_instance(X, self.registry.feature_names)
+            timings['explainer'] = time.perf_counter() - start
+        
+        return timings
+    
+    def vectorize(self, applications: List[Dict[str, Any]]) -> np.ndarray:
+        """Turn application dicts into the active version's feature matrix."""
+        vectorizer = self.registry.vectorizer
+        if vectorizer is not None:
+            return vectorizer.transform_records(applications)
+        
+        # Versions trained without a vectorizer use the legacy positional encoding
+        return np.array([
+            [app[name] for name in LEGACY_NUMERIC_FEATURES] +
+            [float(hash(app[name]) % 100) / 100 for name in LEGACY_CATEGORICAL_FEATURES]
+            for app in applications
+        ])
+    
+    def score(self, X: np.ndarray, include_shap: bool = True,
+              deadline: Optional[Deadline] = None, explanation_engine: str = 'auto',
+              application: Optional[Dict[str, Any]] = None) -> ScoringResponse:
+        """application is the raw request the row was vectorized from; explanations quote its values."""
+        deadline = deadline or Deadline(settings.REQUEST_TIMEOUT_SECONDS)
+        # A single application is being opened for review: 'auto' uses the LLM
+        engine = 'llm' if explanation_engine == 'auto' else explanation_engine
+        result = self._run_pipeline(X, include_shap, deadline)
+        return self._row_response(result, 0, X, deadline, engine, application)
+    
+    def batch_score(self, X_list: List[np.ndarray], include_shap: bool = True,
+                    deadline: Optional[Deadline] = None, explanation_engine: str = 'auto',
+                    applications: Optional[List[Dict[str, Any]]] = None) -> List[ScoringResponse]:
+        if not X_list:
+            return []
+        
+        deadline = deadline or Deadline(settings.REQUEST_TIMEOUT_SECONDS)
+        # Bulk scoring only calls the LLM when explicitly requested
+        engine = 'template' if explanation_engine == 'auto' else explanation_engine
+        try:
+            X = np.vstack([x.reshape(1, -1) for x in X_list])
+            result = self._run_pipeline(X, include_shap, deadline)
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            logger.warning(f"Vectorized batch scoring failed, scoring rows individually: {e}")
+            return self._score_rows(X_list, include_shap, deadline, engine, applications)
+        
+        results = []
+        for i in range(len(X)):
+            try:
+                results.append(self._row_response(
+                    result, i, X, deadline, engine, applications[i] if applications else None
+                ))
+            except Exception as e:
+                logger.error(f"Error scoring instance: {e}")
+        
+        return results
+    
+    def _score_rows(self, X_list: List[np.ndarray], include_shap: bool, deadline: Deadline, engine: str,
+                    applications: Optional[List[Dict[str, Any]]] = None) -> List[ScoringResponse]:
+        results = []
+        for i, X in enumerate(X_list):
             try:
-                shap_explanation = self.explainer.explain_instance(X, self.registry.feature_names)
-                shap_payload = SHAPPayload(
-                    base_value=shap_explanation['base_value'],
-                    model_output=float(raw_proba),
-                    top_positive_contributors=[
-                        SHAPContributor(**contrib) 
-                        for contrib in shap_explanation['top_positive_contributors']
-                    ],
-                    top_negative_contributors=[
-                        SHAPContributor(**contrib) 
-                        for contrib in shap_explanation['top_negative_contributors']
-                    ]
+                result = self.score(
+                    X.reshape(1, -1), include_shap=include_shap, deadline=deadline, explanation_engine=engine,
+                    application=applications[i] if applications else None
                 )
+                results.append(result)
+            except DeadlineExceeded:
+                raise
             except Exception as e:
-                logger.warning(f"SHAP computation failed: {e}")
+                logger.error(f"Error scoring instance: {e}")
+        
+        return results
+    
+    def _run_pipeline(self, X: np.ndarray, include_shap: bool, deadline: Deadline) -> Dict[str, Any]:
+        # Fraud screening and prediction are never shed: without them there is
+        # no answer, so a request whose budget is already spent fails instead.
+        # Smoother, SHAP and explanation degrade when their estimate does not fit.
+        self.load_shedder.observe(deadline.elapsed())
+        deadline.check('fraud screening')
+        self.registry.refresh()
+        
+        n_rows = len(X)
+        degraded = []
         
-        banker_explanation = self.groq_service.generate_explanation(
-            shap_payload.model_dump() if shap_payload else {},
-            smoothed_proba,
-            fraud_detected=False,
-            decision=decision
+        fraud_scores, flagged, fraud_rules = self._screen_fraud(X, degraded)
+        
+        # Flagged applications go to review without credit scoring when short-circuiting
+        if settings.FRAUD_SHORT_CIRCUIT:
+            credit_rows = np.flatnonzero(~flagged)
+        else:
+            credit_rows = np.arange(n_rows)
+        X_credit = X[credit_rows]
+        n_credit = len(credit_rows)
+        
+        raw_proba = np.full(n_rows, np.nan)
+        smoothed_proba = np.full(n_rows, np.nan)
+        explanation = None
+        
+        if n_credit:
+            deadline.check('predict')
+            model = self.registry.get_active_model('xgboost')
+            raw = self._timed('predict', n_credit, model.predict_proba, X_credit)[:, 1]
+            raw_proba[credit_rows] = raw
+            
+            if self._can_run('smoother', n_credit, deadline):
+                smoothed_proba[credit_rows] = self._timed('smoother', n_credit, self._smooth, X_credit, raw)
+            else:
+                smoothed_proba[credit_rows] = raw
+                degraded.append('smoother')
+            
+            if include_shap and self.explainer:
+                if self._can_run('shap', n_credit, deadline, optional=True):
+                    try:
+                        explanation = self._timed(
+                            'shap', n_credit, self.explainer.explain_batch, X_credit, self.registry.feature_names
+                        )
+                    except Exception as e:
+                        logger.warning(f"SHAP computation failed: {e}")
+                        degraded.append('shap')
+                else:
+                    degraded.append('shap')
+        
+        # Row i of X maps to row explanation_row[i] of the explanation, -1 if skipped
+        explanation_row = np.full(n_rows, -1)
+        explanation_row[credit_rows] = np.arange(n_credit)
+        
+        return {
+            'raw_proba': raw_proba,
+            'smoothed_proba': smoothed_proba,
+            'explanation': explanation,
+            'explanation_row': explanation_row,
+            'fraud_scores': fraud_scores,
+            'fraud_rules': fraud_rules,
+            'flagged': flagged,
+            'degraded': degraded
+        }
+    
+    def _screen_fraud(self, X: np.ndarray, degraded: List[str]):
+        fraud_scores = np.zeros(len(X))
+        fraud_rules = None
+        fraud = self.registry.fraud
+        if fraud is not None:
+            try:
+                raw = self._timed('fraud', len(X), fraud.raw_scores, X)
+                fraud_scores = fraud.calibrated(raw)
+                if self.fraud_refresher is not None:
+                    self.fraud_refresher.observe(fraud, X, raw)
+            except Exception as e:
+                logger.warning(f"Fraud screening failed: {e}")
+                degraded.append('fraud')
+            try:
+                fraud_rules = self._timed('fraud_rules', len(X), fraud.rule_results, X, self.registry.vectorizer)
+            except Exception as e:
+                logger.warning(f"Fraud ratio rules failed: {e}")
+        return fraud_scores, fraud_scores >= settings.FRAUD_THRESHOLD, fraud_rules
+    
+    def _row_response(self, result: Dict[str, Any], i: int, X: np.ndarray, deadline: Deadline,
+                      engine: str, application: Optional[Dict[str, Any]] = None) -> ScoringResponse:
+        reasons = []
+        if result['flagged'][i]:
+            reasons.append(
+                f"Anomaly score {result['fraud_scores'][i]:.1f} is at or above the threshold of {settings.FRAUD_THRESHOLD:g}"
+            )
+        rule_z_scores = None
+        rules = result['fraud_rules']
+        if rules is not None:
+            reasons.extend(rules['reasons'][i])
+            rule_z_scores = {name: float(z) for (name, _, _), z in zip(RULES, rules['z'][i])}
+        
+        fraud = FraudDetectionResult(
+            is_fraud=bool(result['flagged'][i]),
+            fraud_score=float(result['fraud_scores'][i]),
+            fraud_reason="; ".join(reasons) if reasons else None,
+            rule_z_scores=rule_z_scores
         )
         
-        reason_codes = self._generate_reason_codes(smoothed_proba, shap_payload)
+        row = result['explanation_row'][i]
+        if row < 0:
+            return self._fraud_response(fraud)
         
+        shap_explanation = None
+        if result['explanation'] is not None:
+            shap_explanation = SHAPExplainer.contributors(
+                result['explanation'], row, X[i], self.registry.feature_names
+            )
+        return self._build_response(
+            result['raw_proba'][i], result['smoothed_proba'][i], shap_explanation,
+            deadline, result['degraded'], engine, fraud, application
+        )
+    
+    def _can_run(self, stage: str, n_rows: int, deadline: Deadline, optional: bool = False) -> bool:
+        if optional and self.load_shedder.shedding:
+            return False
+        return deadline.allows(self.stage_latency.estimate(stage, n_rows))
+    
+    def _timed(self, stage: str, n_rows: int, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.stage_latency.observe(stage, time.perf_counter() - start, n_rows)
+        return result
+    
+    def _smooth(self, X: np.ndarray, raw_proba: np.ndarray) -> np.ndarray:
+        if self.registry.smoother is None:
+            return raw_proba
+        smoothed_proba = self.registry.smoother.smooth(X, raw_proba.reshape(-1, 1))
+        return np.asarray(smoothed_proba).reshape(len(X), -1)[:, 0]
+    
+    def _fraud_response(self, fraud: FraudDetectionResult) -> ScoringResponse:
+        reason_codes = ["FRAUD_SUSPECTED"]
         return ScoringResponse(
-            request_id=request_id,
-            fraud_detection=FraudDetectionResult(
-                is_fraud=False,
-                fraud_score=0.0,
-                fraud_reason=None
+            request_id=str(uuid.uuid4()),
+            fraud_detection=fraud,
+            risk_score_raw=None,
+            risk_score_smoothed=None,
+            decision="REVIEW",
+            reason_codes=reason_codes,
+            shap_payload=None,
+            banker_explanation=self.template_service.generate_fraud_explanation(
+                fraud.fraud_score, reason_codes=reason_codes
             ),
+            model_version=self.registry.active_version,
+            model_active=True,
+            threshold=settings.DEFAULT_THRESHOLD,
+            degraded_stages=[],
+            explanation_engine='template'
+        )
+    
+    def _build_response(self, raw_proba: float, smoothed_proba: float,
+                        shap_explanation: Optional[Dict[str, Any]],
+                        deadline: Deadline, degraded: List[str], engine: str,
+                        fraud: FraudDetectionResult,
+                        application: Optional[Dict[str, Any]] = None) -> ScoringResponse:
+        degraded = list(degraded)
+        if fraud.is_fraud:
+            decision = "REVIEW"
+        else:
+            decision = "APPROVE" if smoothed_proba <= settings.DEFAULT_THRESHOLD else "DECLINE"
+        
+        shap_payload = None
+        if shap_explanation is not None:
+            shap_payload = SHAPPayload(
+                base_value=shap_explanation['base_value'],
+                model_output=float(raw_proba),
+                top_positive_contributors=[
+                    SHAPContributor(**contrib) 
+                    for contrib in shap_explanation['top_positive_contributors']
+                ],
+                top_negative_contributors=[
+                    SHAPContributor(**contrib) 
+                    for contrib in shap_explanation['top_negative_contributors']
+                ]
+            )
+        
+        reason_codes = self._generate_reason_codes(smoothed_proba, shap_payload)
+        if fraud.is_fraud:
+            reason_codes.append("FRAUD_SUSPECTED")
+        
+        shap_dict = shap_payload.model_dump() if shap_payload else {}
+        if engine == 'llm' and not self._can_run('explanation', 1, deadline, optional=True):
+            engine = 'template'
+            degraded.append('explanation')
+        
+        banker_explanation = None
+        if engine == 'llm':
+            try:
+                banker_explanation = self._timed(
+                    'explanation', 1, self.groq_service.generate_explanation,
+                    shap_dict,
+                    smoothed_proba,
+                    fraud_detected=fraud.is_fraud,
+                    decision=decision,
+                    time_budget=deadline.remaining(),
+                    fallback=False
+                )
+            except Exception as e:
+                logger.warning(f"LLM explanation failed, using template: {e}")
+                engine = 'template'
+                degraded.append('explanation')
+        
+        if banker_explanation is None:
+            banker_explanation = self.template_service.generate_explanation(
+                shap_dict,
+                smoothed_proba,
+                fraud_detected=fraud.is_fraud,
+                decision=decision,
+                risk_score_raw=float(raw_proba),
+                reason_codes=reason_codes,
+                raw_values=application
+            )
+        
+        return ScoringResponse(
+            request_id=str(uuid.uuid4()),
+            fraud_detection=fraud,
             risk_score_raw=float(raw_proba),
             risk_score_smoothed=float(smoothed_proba),
             decision=decision,
@@ -89,20 +386,11 @@ class ScoringService:
             banker_explanation=banker_explanation,
             model_version=self.registry.active_version,
             model_active=True,
-            threshold=settings.DEFAULT_THRESHOLD
+            threshold=settings.DEFAULT_THRESHOLD,
+            degraded_stages=degraded,
+            explanation_engine=engine
         )
     
-    def batch_score(self, X_list: List[np.ndarray], include_shap: bool = True) -> List[ScoringResponse]:
-        results = []
-        for X in X_list:
-            try:
-                result = self.score(X.reshape(1, -1), include_shap=include_shap)
-                results.append(result)
-            except Exception as e:
-                logger.error(f"Error scoring instance: {e}")
-        
-        return results
-    
     def _generate_reason_codes(self, score: float, shap_payload: Optional[SHAPPayload]) -> List[str]:
         codes = []
         
@@ -0,0 +1,307 @@
+import math
+import logging
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+CURVE_METRICS = ('auc', 'pr_auc', 'ks_statistic')
+THRESHOLD_METRICS = ('accuracy', 'precision', 'recall', 'f1')
+DEFAULT_THRESHOLD_GRID = tuple(np.round(np.arange(0.05, 1.0, 0.05), 2))
+# Upper bound on (segment, score bin, label) cells a bootstrap draws counts for
+BOOTSTRAP_MAX_CELLS = 1 << 15
+# total_acc at or below this marks a thin credit file (a proxy for first-time borrowers)
+THIN_FILE_ACCOUNTS = 5
+
+def _tie_starts(*keys: np.ndarray) -> np.ndarray:
+    """First index of each run of equal keys in already-sorted arrays."""
+    n = len(keys[0])
+    change = np.zeros(n, dtype=bool)
+    if n:
+        change[0] = True
+    for key in keys:
+        change[1:] |= key[1:] != key[:-1]
+    return np.flatnonzero(change)
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray, empty: float) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / np.where(denominator > 0, denominator, 1), empty)
+
+def _grouped_metrics(pos: np.ndarray, neg: np.ndarray, segment_starts: np.ndarray,
+                     above: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Metrics of every (replicate, segment) from tie-group label counts.
+
+    pos and neg are (replicates, groups) weighted positive/negative counts
+    per tie group, groups ordered by descending score within each segment;
+    segment_starts is the first group of each segment and above marks the
+    groups at or over the decision threshold. ROC and PR areas are the same
+    trapezoids sklearn's roc_curve/precision_recall_curve + auc produce.
+    Returns (replicates, segments) arrays.
+    """
+    n_groups = pos.shape[1]
+    sizes = np.diff(np.append(segment_starts, n_groups))
+    segment = np.repeat(np.arange(len(segment_starts)), sizes)
+    ends = segment_starts + sizes - 1
+
+    # Cumulative counts restarted at each segment
+    tp = np.cumsum(pos, axis=1)
+    fp = np.cumsum(neg, axis=1)
+    tp_before = np.concatenate([np.zeros((len(tp), 1)), tp[:, segment_starts[1:] - 1]], axis=1)
+    fp_before = np.concatenate([np.zeros((len(fp), 1)), fp[:, segment_starts[1:] - 1]], axis=1)
+    tp -= tp_before[:, segment]
+    fp -= fp_before[:, segment]
+    positives = tp[:, ends]
+    negatives = fp[:, ends]
+
+    tpr = _safe_divide(tp, positives[:, segment], np.nan)
+    fpr = _safe_divide(fp, negatives[:, segment], np.nan)
+    precision = _safe_divide(tp, tp + fp, 1.0)
+
+    def previous(values: np.ndarray, start_value: float) -> np.ndarray:
+        shifted = np.empty_like(values)
+        shifted[:, 1:] = values[:, :-1]
+        shifted[:, segment_starts] = start_value
+        return shifted
+
+    roc_area = (fpr - previous(fpr, 0.0)) * (tpr + previous(tpr, 0.0)) / 2
+    pr_area = (tpr - previous(tpr, 0.0)) * (precision + previous(precision, 1.0)) / 2
+
+    predicted_tp = np.add.reduceat(pos * above, segment_starts, axis=1)
+    predicted_fp = np.add.reduceat(neg * above, segment_starts, axis=1)
+    rows = positives + negatives
+    precision_at = _safe_divide(predicted_tp, predicted_tp + predicted_fp, 0.0)
+    recall_at = _safe_divide(predicted_tp, positives, 0.0)
+
+    return {
+        'auc': np.add.reduceat(roc_area, segment_starts, axis=1),
+        'pr_auc': np.add.reduceat(pr_area, segment_starts, axis=1),
+        'ks_statistic': np.maximum(np.maximum.reduceat(tpr - fpr, segment_starts, axis=1), 0.0),
+        'accuracy': _safe_divide(predicted_tp + (negatives - predicted_fp), rows, np.nan),
+        'precision': precision_at,
+        'recall': recall_at,
+        'f1': _safe_divide(2 * precision_at * recall_at, precision_at + recall_at, 0.0),
+        'true_positives': predicted_tp,
+        'false_positives': predicted_fp,
+        'false_negatives': positives - predicted_tp,
+        'true_negatives': negatives - predicted_fp,
+        'rows': rows,
+        'positives': positives
+    }
+
+def _number(value: float) -> Optional[float]:
+    return None if value is None or not math.isfinite(value) else float(value)
+
+def evaluation_segments(X: np.ndarray, vectorizer) -> Dict[str, np.ndarray]:
+    """
+    Segment labels recovered from a CompiledLoanVectorizer feature matrix:
+    each categorical feature (from its one-hot block), loan term, and a
+    thin/established credit file split on total_acc.
+    """
+    X = np.asarray(X)
+    segments = {}
+    offset = len(vectorizer.numeric_features)
+    for name, categories in zip(vectorizer.categorical_features, vectorizer.categories):
+        block = X[:, offset:offset + len(categories)]
+        labels = np.asarray(list(categories) + ['unknown'], dtype=object)
+        # handle_unknown='ignore' leaves an all-zero block for unseen categories
+        segments[name] = labels[np.where(block.max(axis=1) > 0, block.argmax(axis=1), len(categories))]
+        offset += len(categories)
+
+    numeric = {name: i for i, name in enumerate(vectorizer.numeric_features)}
+
+    def unscaled(name: str) -> np.ndarray:
+        i = numeric[name]
+        return X[:, i].astype(np.float64) * vectorizer.scales[i] + vectorizer.means[i]
+
+    if 'term_int' in numeric:
+        segments['term'] = np.round(unscaled('term_int')).astype(np.int64)
+    if 'total_acc' in numeric:
+        segments['credit_file'] = np.where(unscaled('total_acc') <= THIN_FILE_ACCOUNTS + 0.5, 'thin', 'established')
+    return segments
+
+class EvaluationEngine:
+    """
+    Binary classifier evaluation from a single sort of the scores.
+
+    Scores are sorted once; ROC AUC, PR AUC, KS and the confusion counts at
+    the decision threshold and along a threshold grid all come from
+    cumulative label counts over tie groups. Segments reuse the same order
+    (a stable sort of the small segment codes) and are reduced per segment
+    with reduceat. Bootstrap confidence intervals draw each replicate as
+    multinomial counts over score cells (see _bootstrap) and push them
+    through the same grouped reductions, so no replicate touches the rows
+    or re-sorts anything.
+    """
+
+    def __init__(self, threshold: float = 0.5, n_bootstrap: int = 200, confidence: float = 0.95,
+                 thresholds: Sequence[float] = DEFAULT_THRESHOLD_GRID, min_segment_rows: int = 100,
+                 random_state: int = 42):
+        self.threshold = threshold
+        self.n_bootstrap = n_bootstrap
+        self.confidence = confidence
+        self.thresholds = np.asarray(thresholds, dtype=np.float64)
+        self.min_segment_rows = min_segment_rows
+        self.random_state = random_state
+
+    def metrics(self, y_true: np.ndarray, scores: np.ndarray) -> Dict[str, float]:
+        """
+        The flat metrics dict TrainingPipeline reports, without intervals or
+        segments. Raises ValueError on empty or single-class input, where
+        the curve metrics are undefined.
+        """
+        y, scores, _ = self._sorted(y_true, scores)
+        starts = _tie_starts(scores)
+        return self._flat(self._point(y, scores, starts, np.zeros(1, dtype=np.int64)), 0)
+
+    def evaluate(self, y_true: np.ndarray, scores: np.ndarray,
+                 segments: Optional[Dict[str, np.ndarray]] = None) -> Dict[str, Any]:
+        """
+        Full report. Overall metrics raise ValueError like metrics(); a
+        segment holding a single class gets None for its curve metrics.
+        """
+        y, sorted_scores, order = self._sorted(y_true, scores)
+        starts = _tie_starts(sorted_scores)
+        overall = self._point(y, sorted_scores, starts, np.zeros(1, dtype=np.int64))
+        report = {
+            'rows': int(len(y)),
+            'positives': int(y.sum()),
+            'metrics': self._flat(overall, 0),
+            'thresholds': self._threshold_table(y, sorted_scores, starts)
+        }
+
+        # One layout per segmentation: rows regrouped by segment, score order kept within
+        layouts = {None: (np.zeros(len(y), dtype=np.int64), None, starts, np.zeros(1, dtype=np.int64), [None])}
+        for name, labels in (segments or {}).items():
+            codes, values = pd.factorize(np.asarray(labels, dtype=object)[order], use_na_sentinel=False)
+            if len(values) <= np.iinfo(np.int16).max:
+                # Small integer keys take numpy's linear-time radix sort
+                codes = codes.astype(np.int16)
+            perm = np.argsort(codes, kind='stable')
+            seg_codes, seg_scores = codes[perm], sorted_scores[perm]
+            groups = _tie_starts(seg_codes, seg_scores)
+            segment_starts = np.searchsorted(groups, np.flatnonzero(np.r_[True, seg_codes[1:] != seg_codes[:-1]]))
+            layouts[name] = (codes.astype(np.int64), perm, groups, segment_starts, list(values))
+
+        rng = np.random.default_rng(self.random_state)
+        alpha = (1 - self.confidence) / 2
+
+        def interval(values: np.ndarray) -> Optional[List[Optional[float]]]:
+            if np.all(np.isnan(values)):
+                return None
+            low, high = np.nanquantile(values, [alpha, 1 - alpha])
+            return [_number(low), _number(high)]
+
+        report['segments'] = {}
+        for name, (codes, perm, groups, segment_starts, values) in layouts.items():
+            if name is None:
+                point = overall
+            else:
+                point = self._point(y[perm], sorted_scores[perm], groups, segment_starts)
+            samples = self._bootstrap(y, sorted_scores, starts, codes, len(values), point, rng) \
+                if self.n_bootstrap else None
+
+            if name is None:
+                if samples is not None:
+                    report['confidence_intervals'] = {
+                        'level': self.confidence,
+                        'n_bootstrap': self.n_bootstrap,
+                        **{key: interval(samples[key][:, 0]) for key in CURVE_METRICS + THRESHOLD_METRICS}
+                    }
+                continue
+
+            table = {}
+            for s, value in enumerate(values):
+                if point['rows'][0, s] < self.min_segment_rows:
+                    continue
+                entry = self._flat(point, s, counts=('rows', 'positives'))
+                if samples is not None:
+                    entry['auc_interval'] = interval(samples['auc'][:, s])
+                    entry['pr_auc_interval'] = interval(samples['pr_auc'][:, s])
+                table[str(value)] = entry
+            report['segments'][name] = table
+        return report
+
+    def _sorted(self, y_true: np.ndarray, scores: np.ndarray):
+        scores = np.asarray(scores, dtype=np.float64).ravel()
+        y_true = np.asarray(y_true).ravel()
+        if len(y_true) == 0:
+            raise ValueError("Cannot evaluate an empty set of labels")
+        if len(y_true) != len(scores):
+            raise ValueError(f"Got {len(y_true)} labels but {len(scores)} scores")
+        if len(np.unique(y_true)) < 2:
+            raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+        order = np.argsort(-scores, kind='stable')
+        return y_true[order].astype(np.float64), scores[order], order
+
+    def _point(self, y: np.ndarray, scores: np.ndarray, groups: np.ndarray,
+               segment_starts: np.ndarray) -> Dict[str, np.ndarray]:
+        pos = np.add.reduceat(y, groups)[None, :] if len(y) else np.zeros((1, 0))
+        neg = (np.diff(np.append(groups, len(y)))[None, :] - pos)
+        return _grouped_metrics(pos, neg, segment_starts, scores[groups] >= self.threshold)
+
+    def _bootstrap(self, y: np.ndarray, scores: np.ndarray, starts: np.ndarray, codes: np.ndarray,
+                   n_segments: int, point: Dict[str, np.ndarray],
+                   rng: np.random.Generator) -> Dict[str, np.ndarray]:
+        """
+        (n_bootstrap, n_segments) replicate metrics. Resampling n rows with
+        replacement only changes how many positives and negatives land in
+        each (segment, score cell), and those counts are multinomial, so
+        replicates are drawn as cell counts without touching the rows. Cells
+        are the tie groups when there are few enough, which is exactly the
+        row bootstrap; otherwise rank-quantile score bins (split at the
+        decision threshold), with the replicates re-centred on the exact
+        estimate to remove the binning offset.
+        """
+        n = len(y)
+        n_bins = max(64, BOOTSTRAP_MAX_CELLS // (2 * n_segments))
+        group = np.repeat(np.arange(len(starts)), np.diff(np.append(starts, n)))
+        if len(starts) <= n_bins:
+            bins, n_bins = group, len(starts)
+        else:
+            # A tie group falls wholly into the bin of its first row
+            bins = starts[group] * n_bins // n
+        # Rows are in descending score order, so within a bin those above the threshold come first
+        key = (codes * n_bins + bins) * 2 + (scores < self.threshold)
+
+        size = n_segments * n_bins * 2
+        total = np.bincount(key, minlength=size)
+        cells = np.flatnonzero(total)
+        pos = np.bincount(key, weights=y, minlength=size)[cells]
+        neg = total[cells] - pos
+        segment_starts = np.searchsorted(cells // (2 * n_bins), np.arange(n_segments))
+        above = cells % 2 == 0
+
+        draws = rng.multinomial(n, np.concatenate([pos, neg]) / n, size=self.n_bootstrap).astype(np.float64)
+        replicates = _grouped_metrics(draws[:, :len(cells)], draws[:, len(cells):], segment_starts, above)
+        binned = _grouped_metrics(pos[None, :], neg[None, :], segment_starts, above)
+        return {
+            key: replicates[key] + (point[key] - binned[key])
+            for key in CURVE_METRICS + THRESHOLD_METRICS
+        }
+
+    def _threshold_table(self, y: np.ndarray, scores: np.ndarray, starts: np.ndarray) -> List[Dict[str, Any]]:
+        cumulative = np.concatenate([[0.0], np.cumsum(y)])
+        positives, rows = cumulative[-1], len(y)
+        # Rows scored at or above each threshold, from the descending order
+        predicted = np.searchsorted(-scores, -self.thresholds, side='right')
+        tp = cumulative[predicted]
+        fp = predicted - tp
+        precision = _safe_divide(tp, predicted, 0.0)
+        recall = _safe_divide(tp, np.full_like(tp, positives), 0.0)
+        return [
+            {
+                'threshold': float(t), 'true_positives': int(tp[i]), 'false_positives': int(fp[i]),
+                'false_negatives': int(positives - tp[i]), 'true_negatives': int(rows - positives - fp[i]),
+                'precision': float(precision[i]), 'recall': float(recall[i])
+            }
+            for i, t in enumerate(self.thresholds)
+        ]
+
+    def _flat(self, point: Dict[str, np.ndarray], s: int, counts: Sequence[str] = ()) -> Dict[str, Any]:
+        flat = {key: _number(point[key][0, s]) for key in CURVE_METRICS + THRESHOLD_METRICS}
+        for key in ('true_negatives', 'false_positives', 'false_negatives', 'true_positives', *counts):
+            flat[key] = int(round(point[key][0, s]))
+        flat['threshold'] = self.threshold
+        return flat
@@ -0,0 +1,47 @@
+import numpy as np
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+def summarize_background(X: np.ndarray, n_clusters: int = 50, random_state: int = 42) -> Dict[str, np.ndarray]:
+    """
+    Summarize training features into a small weighted background set for
+    SHAP: k-means centers snapped to observed values per feature (so one-hot
+    and integer columns stay valid), weighted by cluster size.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    if len(X) <= n_clusters:
+        return {'data': X.copy(), 'weights': np.full(len(X), 1.0 / len(X))}
+
+    from sklearn.cluster import MiniBatchKMeans
+
+    kmeans = MiniBatchKMeans(
+        n_clusters=n_clusters,
+        random_state=random_state,
+        batch_size=min(len(X), 4096),
+        n_init=3
+    )
+    labels = kmeans.fit_predict(X)
+
+    counts = np.bincount(labels, minlength=n_clusters)
+    keep = counts > 0
+    centers = kmeans.cluster_centers_[keep]
+
+    for j in range(X.shape[1]):
+        values = np.unique(X[:, j])
+        pos = np.clip(np.searchsorted(values, centers[:, j]), 1, max(len(values) - 1, 1))
+        lower = values[pos - 1]
+        upper = values[np.minimum(pos, len(values) - 1)]
+        centers[:, j] = np.where(centers[:, j] - lower <= upper - centers[:, j], lower, upper)
+
+    weights = counts[keep] / counts.sum()
+    logger.info(f"Summarized {len(X)} background rows into {len(centers)} weighted centers")
+    return {'data': centers, 'weights': weights}
+
+def weighted_moments(background: Dict[str, np.ndarray]):
+    data, weights = background['data'], background['weights']
+    mean = np.average(data, axis=0, weights=weights)
+    centered = data - mean
+    cov = (centered * weights[:, None]).T @ centered / weights.sum()
+    return mean, cov
@@ -0,0 +1,107 @@
+import base64
+import hashlib
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+from core.config import settings
+from utils.cache import get_cache
+
+logger = logging.getLogger(__name__)
+
+class ExplanationCache:
+    """
+    Bounded LRU cache of SHAP contribution vectors keyed by model version
+    and a digest of the exact feature row. Misses can fall through to Redis
+    when spilling is enabled.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, spill: Optional[bool] = None):
+        self.max_entries = max_entries if max_entries is not None else settings.EXPLANATION_CACHE_SIZE
+        if spill is None:
+            spill = settings.EXPLANATION_CACHE_SPILL and settings.REDIS_ENABLED
+        self.spill = get_cache() if spill else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.spill_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(version: str, row: np.ndarray) -> str:
+        row = np.ascontiguousarray(row, dtype=np.float64)
+        return f"shap:{version}:{hashlib.blake2b(row.tobytes(), digest_size=16).hexdigest()}"
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        values = []
+        spill_keys = []
+        with self._lock:
+            for key in keys:
+                value = self._entries.get(key)
+                if value is not None:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                else:
+                    spill_keys.append(len(values))
+                values.append(value)
+
+        if spill_keys and self.spill is not None:
+            try:
+                encoded = self.spill.mget([keys[i] for i in spill_keys])
+                restored = {}
+                for i, blob in zip(spill_keys, encoded):
+                    if blob is not None:
+                        values[i] = np.frombuffer(base64.b64decode(blob), dtype=np.float64)
+                        restored[keys[i]] = values[i]
+                self._store(restored)
+                self.spill_hits += len(restored)
+            except Exception as e:
+                logger.warning(f"Explanation cache spill read failed: {e}")
+
+        with self._lock:
+            self.misses += sum(1 for v in values if v is None)
+        return values
+
+    def put_many(self, keys: List[str], values: List[np.ndarray]) -> None:
+        entries = dict(zip(keys, values))
+        self._store(entries)
+
+        if self.spill is not None and entries:
+            try:
+                pipe = self.spill.pipeline()
+                for key, value in entries.items():
+                    blob = base64.b64encode(np.asarray(value, dtype=np.float64).tobytes()).decode()
+                    pipe.set(key, blob, ex=settings.EXPLANATION_CACHE_TTL_SECONDS)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Explanation cache spill write failed: {e}")
+
+    def _store(self, entries: Dict[str, np.ndarray]) -> None:
+        with self._lock:
+            for key, value in entries.items():
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        # Spilled entries are namespaced by version and expire on their own
+        with self._lock:
+            self._entries.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.spill_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'spill_hits': self.spill_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.spill_hits) / lookups if lookups else 0.0,
+                'invalidations': self.invalidations,
+                'spill_enabled': self.spill is not None
+            }
@@ -1,28 +1,84 @@
 import numpy as np
-import shap
 import logging
 from typing import List, Tuple, Dict, Any
+from ml.explanation.background import weighted_moments
 
 logger = logging.getLogger(__name__)
 
+class NativeTreeExplainer:
+    """
+    Path-dependent tree SHAP computed by XGBoost (pred_contribs) or
+    LightGBM (pred_contrib) themselves, exposing the same shap_values /
+    expected_value interface as shap.TreeExplainer.
+    """
+    
+    def __init__(self, model):
+        if hasattr(model, 'get_booster'):
+            self.backend = 'xgboost'
+        elif hasattr(model, 'booster_'):
+            self.backend = 'lightgbm'
+        else:
+            raise ValueError(f"Native contributions not supported for {type(model).__name__}")
+        self.model = model
+        probe = np.zeros((1, model.n_features_in_))
+        self.expected_value = float(self._contributions(probe)[0, -1])
+    
+    def _contributions(self, X: np.ndarray) -> np.ndarray:
+        if self.backend == 'xgboost':
+            import xgboost as xgb
+            return self.model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True)
+        return self.model.booster_.predict(X, pred_contrib=True)
+    
+    def shap_values(self, X: np.ndarray) -> np.ndarray:
+        # Last column holds the bias term, i.e. the expected value
+        return self._contributions(X)[:, :-1]
+
 class SHAPExplainer:
     
-    def __init__(self, model, X_background: np.ndarray, model_type: str = 'tree'):
+    def __init__(self, model, X_background: np.ndarray, model_type: str = 'tree', engine: str = 'shap',
+                 cache=None, cache_namespace: str = ''):
         self.model = model
         self.X_background = X_background
         self.model_type = model_type
+        self.engine = engine
+        self.cache = cache
+        self.cache_namespace = cache_namespace
         self._init_explainer()
     
     def _init_explainer(self):
+        if self.model_type == 'tree' and self.engine == 'native':
+            try:
+                self.explainer = NativeTreeExplainer(self.model.model)
+                return
+            except Exception as e:
+                logger.warning(f"Native tree contributions unavailable, using shap: {e}")
+                self.engine = 'shap'
+        
         try:
+            import shap
+            
             if self.model_type == 'tree':
                 self.explainer = shap.TreeExplainer(self.model.model)
             elif self.model_type == 'linear':
-                self.explainer = shap.LinearExplainer(self.model.model, self.X_background)
+                background = self.X_background
+                if isinstance(background, dict):
+                    # Interventional linear SHAP only depends on the (weighted) moments
+                    background = weighted_moments(background)
+                self.explainer = shap.LinearExplainer(self.model.model, background)
             else:
+                background = self.X_background
+                if isinstance(background, dict):
+                    from shap.utils._legacy import DenseData
+                    # Copies: the summary may be a read-only shared memory map
+                    background = DenseData(
+                        np.array(background['data']),
+                        [str(i) for i in range(background['data'].shape[1])],
+                        None,
+                        np.array(background['weights'])
+                    )
                 self.explainer = shap.KernelExplainer(
                     lambda x: self.model.predict_proba(x)[:, 1],
-                    self.X_background
+                    background
                 )
         except Exception as e:
             logger.error(f"Failed to initialize SHAP explainer: {e}")
@@ -33,50 +89,109 @@ class SHAPExplainer:
             return self._fallback_explanation(x, feature_names, top_k)
         
         try:
-            shap_values = self.explainer.shap_values(x)
-            
-            if isinstance(shap_values, list):
-                shap_values = shap_values[1]
-            
-            if len(shap_values.shape) == 1:
-                shap_values = shap_values.reshape(1, -1)
-            
-            shap_vals = shap_values[0]
-            base_value = self.explainer.expected_value
-            if isinstance(base_value, list):
-                base_value = base_value[1]
-            
-            positive_indices = np.argsort(shap_vals)[-top_k:][::-1]
-            negative_indices = np.argsort(shap_vals)[:top_k]
-            
-            positive_contributors = [
-                {
-                    'feature': feature_names[i],
-                    'shap_value': float(shap_vals[i]),
-                    'feature_value': float(x[0, i]) if x.ndim > 1 else float(x[i])
-                }
-                for i in positive_indices
-                if shap_vals[i] > 0
-            ]
-            
-            negative_contributors = [
+            X = x.reshape(1, -1)
+            return self.contributors(self.explain_batch(X, feature_names, top_k), 0, X[0], feature_names)
+        except Exception as e:
+            logger.error(f"SHAP explanation failed: {e}")
+            return self._fallback_explanation(x, feature_names, top_k)
+    
+    def explain_batch(self, X: np.ndarray, feature_names: List[str], top_k: int = 5) -> Dict[str, Any]:
+        """
+        Explain every row of X with a single SHAP call.
+        Contributor indices are -1 where a row has fewer than top_k
+        positive (or negative) contributions.
+        """
+        if self.explainer is None:
+            raise RuntimeError("SHAP explainer not initialized")
+        
+        if self.cache is None:
+            shap_values, base_value = self._compute(X)
+        else:
+            shap_values, base_value = self._cached_compute(X)
+        
+        positive_indices, positive_values = self._top_k(shap_values, top_k, positive=True)
+        negative_indices, negative_values = self._top_k(shap_values, top_k, positive=False)
+        
+        return {
+            'base_value': float(base_value),
+            'shap_values': shap_values,
+            'positive_indices': positive_indices,
+            'positive_values': positive_values,
+            'negative_indices': negative_indices,
+            'negative_values': negative_values
+        }
+    
+    def _compute(self, X: np.ndarray) -> Tuple[np.ndarray, float]:
+        shap_values = self._positive_class(self.explainer.shap_values(X), len(X))
+        base_value = np.ravel(self.explainer.expected_value)
+        base_value = base_value[1] if len(base_value) > 1 else base_value[0]
+        return shap_values, float(base_value)
+    
+    def _cached_compute(self, X: np.ndarray) -> Tuple[np.ndarray, float]:
+        # Cached vectors hold the contributions followed by the base value
+        keys = [self.cache.key(self.cache_namespace, row) for row in X]
+        vectors = self.cache.get_many(keys)
+        
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            shap_values, base_value = self._compute(X[missing])
+            computed = np.hstack([shap_values, np.full((len(missing), 1), base_value)])
+            for j, i in enumerate(missing):
+                vectors[i] = computed[j]
+            self.cache.put_many([keys[i] for i in missing], list(computed))
+        
+        stacked = np.vstack(vectors)
+        return stacked[:, :-1], float(stacked[0, -1])
+    
+    @staticmethod
+    def _positive_class(shap_values, n_rows: int) -> np.ndarray:
+        if isinstance(shap_values, list):
+            shap_values = shap_values[1]
+        shap_values = np.asarray(shap_values)
+        if shap_values.ndim == 3:
+            shap_values = shap_values[:, :, 1]
+        return shap_values.reshape(n_rows, -1)
+    
+    @staticmethod
+    def _top_k(shap_values: np.ndarray, top_k: int, positive: bool) -> Tuple[np.ndarray, np.ndarray]:
+        signed = -shap_values if positive else shap_values
+        k = min(top_k, signed.shape[1])
+        
+        if k < signed.shape[1]:
+            candidates = np.argpartition(signed, k - 1, axis=1)[:, :k]
+        else:
+            candidates = np.broadcast_to(np.arange(k), signed.shape).copy()
+        order = np.argsort(np.take_along_axis(signed, candidates, axis=1), axis=1, kind='stable')
+        indices = np.take_along_axis(candidates, order, axis=1)
+        values = np.take_along_axis(shap_values, indices, axis=1)
+        
+        mask = values > 0 if positive else values < 0
+        return np.where(mask, indices, -1), np.where(mask, values, 0.0)
+    
+    @staticmethod
+    def contributors(explanation: Dict[str, Any], row: int, x: np.ndarray,
+                     feature_names: List[str]) -> Dict[str, Any]:
+        """Expand one row of an explain_batch result into the payload format."""
+        def expand(indices, values):
+            return [
                 {
                     'feature': feature_names[i],
-                    'shap_value': float(shap_vals[i]),
-                    'feature_value': float(x[0, i]) if x.ndim > 1 else float(x[i])
+                    'shap_value': float(v),
+                    'feature_value': float(x[i])
                 }
-                for i in negative_indices
-                if shap_vals[i] < 0
+                for i, v in zip(indices, values)
+                if i >= 0
             ]
-            
-            return {
-                'base_value': float(base_value),
-                'top_positive_contributors': positive_contributors,
-                'top_negative_contributors': negative_contributors
-            }
-        except Exception as e:
-            logger.error(f"SHAP explanation failed: {e}")
-            return self._fallback_explanation(x, feature_names, top_k)
+        
+        return {
+            'base_value': explanation['base_value'],
+            'top_positive_contributors': expand(
+                explanation['positive_indices'][row], explanation['positive_values'][row]
+            ),
+            'top_negative_contributors': expand(
+                explanation['negative_indices'][row], explanation['negative_values'][row]
+            )
+        }
     
     def _fallback_explanation(self, x: np.ndarray, feature_names: List[str], top_k: int) -> Dict[str, Any]:
         x_flat = x[0] if x.ndim > 1 else x
@@ -0,0 +1,60 @@
+import sys
+import os
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, BACKEND_DIR)
+
+import time
+import joblib
+import numpy as np
+from sklearn.ensemble import IsolationForest
+
+from ml.models.flat_iforest import FlatIsolationForest
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BATCH_SIZES = [1, 32, 1024]
+REPEATS = 20
+
+
+def load_forest():
+    # Use the trained global model when present, otherwise a forest with the same settings
+    path = os.path.join(BASE_DIR, "iforest.pkl")
+    if os.path.exists(path):
+        model = joblib.load(path)
+        return model, model.n_features_in_
+
+    n_features = 37
+    X = np.random.default_rng(0).normal(size=(50000, n_features))
+    model = IsolationForest(n_estimators=400, contamination=0.005, max_samples=256, random_state=42)
+    model.fit(X)
+    return model, n_features
+
+
+def best_time(fn, X):
+    timings = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        fn(X)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    model, n_features = load_forest()
+
+    start = time.perf_counter()
+    flat = FlatIsolationForest.from_sklearn(model)
+    print(f"Flattened {len(model.estimators_)} trees ({len(flat.feature)} nodes) in {time.perf_counter() - start:.3f}s")
+
+    rng = np.random.default_rng(1)
+    print(f"{'rows':>6} {'sklearn ms':>11} {'flat ms':>9} {'speedup':>8} {'max |diff|':>11}")
+    for n in BATCH_SIZES:
+        X = rng.normal(size=(n, n_features)) * 1.5
+        diff = np.abs(flat.score_samples(X) - model.score_samples(X)).max()
+        sk = best_time(model.score_samples, X)
+        fl = best_time(flat.score_samples, X)
+        print(f"{n:>6} {sk * 1000:>11.2f} {fl * 1000:>9.2f} {sk / fl:>7.1f}x {diff:>11.1e}")
+
+
+if __name__ == "__main__":
+    main()
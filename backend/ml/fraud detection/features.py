@@ -1,4 +1,4 @@
-import pandas as pd
+import numpy as np
 
 NUMERIC = [
     "loan_amnt", "annual_inc", "emp_length", "open_acc", "total_acc", "mort_acc",
@@ -36,38 +36,46 @@ PURPOSE = [
 VECTOR_COLUMNS = NUMERIC + ENGINEERED + TERM + VERIFY + HOME + PURPOSE
 
 
-def preprocess_raw(app):
-    df = pd.DataFrame([app])
-
-    for c in NUMERIC:
-        df[c] = df.get(c, 0)
-
-    df["open_account_ratio"] = df["open_acc"] / (df["total_acc"] + 1)
+# (raw field, column index in VECTOR_COLUMNS, value that sets the flag)
+ONE_HOT = [
+    (field, VECTOR_COLUMNS.index(column), value)
+    for field, column, value in (
+        [("term", c, c.replace("term_", "") + " months") for c in TERM]
+        + [("verification_status", c, v) for c, v in zip(VERIFY, ["Not Verified", "Source Verified", "Verified"])]
+        + [("home_ownership", c, c.replace("home_", "")) for c in HOME]
+        + [("purpose", c, c.replace("purpose_", "")) for c in PURPOSE]
+    )
+]
 
-    df["severe_credit_event"] = (
-        (df["pub_rec"] > 0)
-        | (df["pub_rec_bankruptcies"] > 0)
-        | (df["tax_liens"] > 0)
-    ).astype(int)
 
-    df["credit_history_years"] = df["total_acc"] / 3
-    df["inquiry_density"] = df["inq_last_6mths"] / (df["credit_history_years"] + 1)
+def preprocess_batch(apps):
+    """Builds the VECTOR_COLUMNS matrix for a list of application dicts in one pass."""
+    n = len(apps)
+    X = np.zeros((n, len(VECTOR_COLUMNS)))
 
-    df.drop(columns=["credit_history_years"], inplace=True)
+    # Missing numeric fields count as 0, as in the original one-row version
+    numeric = np.array([[app.get(c, 0) for c in NUMERIC] for app in apps], dtype=float).reshape(n, len(NUMERIC))
+    X[:, :len(NUMERIC)] = numeric
+    col = {c: numeric[:, i] for i, c in enumerate(NUMERIC)}
 
-    df["term_36"] = (df["term"] == "36 months").astype(int)
-    df["term_60"] = (df["term"] == "60 months").astype(int)
+    engineered = len(NUMERIC)
+    X[:, engineered] = col["open_acc"] / (col["total_acc"] + 1)
+    X[:, engineered + 1] = (
+        (col["pub_rec"] > 0)
+        | (col["pub_rec_bankruptcies"] > 0)
+        | (col["tax_liens"] > 0)
+    )
+    credit_history_years = col["total_acc"] / 3
+    X[:, engineered + 2] = col["inq_last_6mths"] / (credit_history_years + 1)
 
-    df["verification_NotVerified"] = (df["verification_status"] == "Not Verified").astype(int)
-    df["verification_SourceVerified"] = (df["verification_status"] == "Source Verified").astype(int)
-    df["verification_Verified"] = (df["verification_status"] == "Verified").astype(int)
+    values = {}
+    for field, index, value in ONE_HOT:
+        if field not in values:
+            values[field] = np.array([app.get(field) for app in apps], dtype=object)
+        X[:, index] = values[field] == value
 
-    df["home_RENT"] = (df["home_ownership"] == "RENT").astype(int)
-    df["home_MORTGAGE"] = (df["home_ownership"] == "MORTGAGE").astype(int)
-    df["home_OWN"] = (df["home_ownership"] == "OWN").astype(int)
+    return X
 
-    for p in PURPOSE:
-        key = p.replace("purpose_", "")
-        df[p] = (df["purpose"] == key).astype(int)
 
-    return df[VECTOR_COLUMNS].values[0].astype(float)
+def preprocess_raw(app):
+    return preprocess_batch([app])[0]
@@ -1,43 +1,40 @@
-import numpy as np
+import sys
+import os
+
+BACKEND_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+sys.path.insert(0, BACKEND_DIR)
+
+import logging
 import joblib
 from sklearn.ensemble import IsolationForest
-from qdrant import scroll_collection
+from qdrant import client
+from services.vector_snapshot import VectorSnapshot
+from ml.preprocessing.sketches import QuantileSketch
 
 COLLECTION = "loans_training"
 MAX_POINTS = 50000
-BATCH = 200
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+EXPORT_WORKERS = 4
+PAGE_SIZE = 2000
 
 
 def main():
-    vectors = []
-    offset = None
-
+    logging.basicConfig(level=logging.INFO)
     print("Starting Qdrant fetch...")
 
-    while True:
-        pts, offset = scroll_collection(COLLECTION, limit=BATCH, offset=offset)
-
-        print("Batch size:", len(pts))
-
-        if len(pts) == 0:
-            print("NO POINTS RETURNED FROM QDRANT")
-            break
-
-        for p in pts:
-            vectors.append(p.vector)
-            if len(vectors) >= MAX_POINTS:
-                break
-
-        print("Fetched total:", len(vectors))
-
-        if offset is None or len(vectors) >= MAX_POINTS:
-            break
-
-    if len(vectors) == 0:
-        print("FATAL: Qdrant returned ZERO vectors.")
+    # Local snapshot of the first MAX_POINTS points; only the delta is pulled
+    # when it exists, and an interrupted first export resumes
+    snapshot = VectorSnapshot(
+        client, COLLECTION, SNAPSHOT_DIR, with_payload=False,
+        n_workers=EXPORT_WORKERS, page_size=PAGE_SIZE, max_points=MAX_POINTS
+    )
+    try:
+        snapshot.sync()
+    except ValueError as e:
+        print("FATAL:", e)
         return
 
-    X = np.array(vectors)
+    X = snapshot.vectors
 
     print("Vector shape:", X.shape)
 
@@ -51,10 +48,13 @@ def main():
     if_model.fit(X)
 
     raw = -if_model.score_samples(X)
-    lo, hi = np.percentile(raw, 1), np.percentile(raw, 99)
+    # Saved with the calibration so serving can keep folding live scores into it
+    sketch = QuantileSketch()
+    sketch.update(raw)
+    lo, hi = sketch.quantile([0.01, 0.99])
 
     joblib.dump(if_model, "iforest.pkl")
-    joblib.dump({"lo": float(lo), "hi": float(hi)}, "calibration.pkl")
+    joblib.dump({"lo": float(lo), "hi": float(hi), "sketch": sketch}, "calibration.pkl")
 
     print("Training complete.")
     print("Artifacts saved.")
@@ -1,5 +1,4 @@
 import numpy as np
-from sklearn.neighbors import NearestNeighbors
 import logging
 
 logger = logging.getLogger(__name__)
@@ -10,13 +9,46 @@ class KNNSmoother:
         self.k = k
         self.metric = metric
         self.nbrs = None
+        self.X_train = None
         self.training_proba = None
     
     def fit(self, X_train: np.ndarray, y_proba_train: np.ndarray) -> None:
+        from sklearn.neighbors import NearestNeighbors
+        
         self.nbrs = NearestNeighbors(n_neighbors=self.k, metric=self.metric, n_jobs=-1)
         self.nbrs.fit(X_train)
+        self.X_train = X_train
+        self.training_proba = y_proba_train
+    
+    def attach(self, X_train: np.ndarray, y_proba_train: np.ndarray) -> None:
+        # Brute force keeps a reference to X_train instead of building a private
+        # tree copy, so memory-mapped shared state stays shared across workers
+        from sklearn.neighbors import NearestNeighbors
+        
+        self.nbrs = NearestNeighbors(n_neighbors=self.k, metric=self.metric, algorithm='brute', n_jobs=-1)
+        self.nbrs.fit(X_train)
+        self.X_train = X_train
         self.training_proba = y_proba_train
     
+    def append(self, X_new: np.ndarray, y_proba_new: np.ndarray) -> None:
+        """
+        Adds rows to the neighbour memory. Existing rows keep their stored
+        probabilities, so history is never re-scored; only the index is
+        refitted, with the algorithm the smoother already uses.
+        """
+        if self.X_train is None:
+            self.fit(X_new, y_proba_new)
+            return
+        from sklearn.neighbors import NearestNeighbors
+        
+        algorithm = self.nbrs.algorithm if self.nbrs is not None else 'auto'
+        X_train = np.concatenate([self.X_train, X_new])
+        training_proba = np.concatenate([self.training_proba, y_proba_new])
+        self.nbrs = NearestNeighbors(n_neighbors=self.k, metric=self.metric, algorithm=algorithm, n_jobs=-1)
+        self.nbrs.fit(X_train)
+        self.X_train = X_train
+        self.training_proba = training_proba
+    
     def smooth(self, X_test: np.ndarray, y_proba_test: np.ndarray) -> np.ndarray:
         if self.nbrs is None or self.training_proba is None:
             logger.warning("KNNSmoother not fitted, returning original probabilities")
@@ -24,11 +56,5 @@ class KNNSmoother:
         
         distances, indices = self.nbrs.kneighbors(X_test)
         
-        smoothed_proba = np.zeros_like(y_proba_test)
-        for i in range(len(X_test)):
-            neighbor_indices = indices[i]
-            neighbor_proba = self.training_proba[neighbor_indices]
-            smoothed_proba[i] = np.mean(neighbor_proba, axis=0)
-        
-        return smoothed_proba
+        return np.mean(self.training_proba[indices], axis=1)
 
@@ -0,0 +1,112 @@
+import numpy as np
+
+def average_path_length(n_samples: np.ndarray) -> np.ndarray:
+    """c(n): average path length of an unsuccessful BST search, as used by IsolationForest."""
+    n_samples = np.asarray(n_samples, dtype=np.float64)
+    result = np.zeros_like(n_samples)
+    result[n_samples == 2] = 1.0
+    large = n_samples > 2
+    result[large] = 2.0 * (np.log(n_samples[large] - 1.0) + np.euler_gamma) - 2.0 * (n_samples[large] - 1.0) / n_samples[large]
+    return result
+
+class FlatIsolationForest:
+    """
+    A fitted sklearn IsolationForest flattened into contiguous node arrays
+    for all trees, evaluated level by level for every (row, tree) pair at
+    once instead of walking each tree separately.
+
+    Nodes are renumbered breadth-first so the right child always follows
+    the left one: a step is `node = left[node] + (x > threshold[node])`.
+    Leaves point to themselves with an infinite threshold, so after
+    max_depth steps every row sits in a leaf of every tree. Each leaf stores
+    its depth plus the c(n) correction for its training sample count, so
+    scoring ends with one gather and a sum.
+    """
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray,
+                 leaf_value: np.ndarray, roots: np.ndarray, n_features: int,
+                 max_depth: int, denominator: float, chunk_rows: int = 4096):
+        self.feature = np.ascontiguousarray(feature, dtype=np.int32)
+        self.threshold = np.ascontiguousarray(threshold, dtype=np.float64)
+        self.left = np.ascontiguousarray(left, dtype=np.int32)
+        self.leaf_value = np.ascontiguousarray(leaf_value, dtype=np.float64)
+        self.roots = np.ascontiguousarray(roots, dtype=np.int32)
+        self.n_features = int(n_features)
+        self.max_depth = int(max_depth)
+        self.denominator = float(denominator)
+        self.chunk_rows = chunk_rows
+
+    @classmethod
+    def from_sklearn(cls, forest) -> 'FlatIsolationForest':
+        features, thresholds, lefts, leaf_values, roots = [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for estimator, estimator_features in zip(forest.estimators_, forest.estimators_features_):
+            tree = estimator.tree_
+            children_left, children_right = tree.children_left, tree.children_right
+
+            # Breadth-first order with sibling pairs kept adjacent
+            order = [0]
+            depth = [0]
+            for position in range(tree.node_count):
+                node = order[position]
+                if children_left[node] >= 0:
+                    order += [children_left[node], children_right[node]]
+                    depth += [depth[position] + 1, depth[position] + 1]
+            order = np.array(order)
+            depth = np.array(depth)
+            new_id = np.empty(len(order), dtype=np.int64)
+            new_id[order] = np.arange(len(order))
+            max_depth = max(max_depth, int(depth.max()))
+
+            is_leaf = children_left[order] < 0
+            # Tree feature indices refer to the estimator's feature subset
+            local_feature = np.where(is_leaf, 0, tree.feature[order])
+            features.append(np.asarray(estimator_features)[local_feature])
+            thresholds.append(np.where(is_leaf, np.inf, tree.threshold[order]))
+            lefts.append(np.where(
+                is_leaf, np.arange(len(order)), new_id[np.where(is_leaf, 0, children_left[order])]
+            ) + offset)
+            leaf_values.append(np.where(
+                is_leaf, depth + average_path_length(tree.n_node_samples[order]), 0.0
+            ))
+            roots.append(offset)
+            offset += len(order)
+
+        denominator = len(forest.estimators_) * float(average_path_length([forest.max_samples_])[0])
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            leaf_value=np.concatenate(leaf_values),
+            roots=np.array(roots),
+            n_features=forest.n_features_in_,
+            max_depth=max_depth,
+            denominator=denominator
+        )
+
+    def path_lengths(self, X: np.ndarray) -> np.ndarray:
+        """Summed path length over all trees for each row."""
+        # sklearn validates score_samples input to float32; compare the same values
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if np.isnan(X).any():
+            raise ValueError("FlatIsolationForest does not route missing values")
+
+        total = np.empty(len(X))
+        for start in range(0, len(X), self.chunk_rows):
+            chunk = X[start:start + self.chunk_rows]
+            values = chunk.ravel()
+            row_offset = (np.arange(len(chunk), dtype=np.int32) * self.n_features)[:, None]
+            node = np.broadcast_to(self.roots, (len(chunk), len(self.roots))).copy()
+            for _ in range(self.max_depth):
+                node = self.left[node] + (values[row_offset + self.feature[node]] > self.threshold[node])
+            total[start:start + len(chunk)] = self.leaf_value[node].sum(axis=1)
+        return total
+
+    def score_samples(self, X: np.ndarray) -> np.ndarray:
+        """Same as IsolationForest.score_samples (lower is more anomalous)."""
+        depths = self.path_lengths(X)
+        if self.denominator == 0:
+            return -np.ones(len(depths))
+        return -(2.0 ** (-depths / self.denominator))
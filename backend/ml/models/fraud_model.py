@@ -0,0 +1,163 @@
+import numpy as np
+import joblib
+import logging
+import threading
+from typing import Any, Dict, Optional
+from ml.models.flat_iforest import FlatIsolationForest
+from ml.models.fraud_rules import FraudRules, rule_inputs, rule_segments
+from ml.preprocessing.sketches import QuantileSketch
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+FLAT_MAX_ROWS = 256
+CALIBRATION_QUANTILES = (0.01, 0.99)
+
+class FraudModel:
+    """
+    IsolationForest anomaly detector over the credit feature matrix. Raw
+    anomaly scores (-score_samples) are mapped to 0-100 with the 1st/99th
+    percentiles of a QuantileSketch over raw scores. The sketch starts from
+    the training scores and can keep absorbing live scores (observe), so
+    recalibrating never needs the training data again.
+
+    Optional FraudRules add robust ratio z-scores per segment; they need the
+    vectorizer the features came from to recover unscaled ratios.
+
+    With engine='flat' the forest is evaluated through FlatIsolationForest,
+    which avoids sklearn's per-tree overhead on small online batches;
+    batches above FLAT_MAX_ROWS or containing NaN go through sklearn.
+    """
+
+    def __init__(self, params: Optional[dict] = None, engine: Optional[str] = None):
+        default_params = {
+            'n_estimators': 400,
+            'contamination': 0.005,
+            'max_samples': 256,
+            'random_state': 42,
+            'n_jobs': -1
+        }
+        if params:
+            default_params.update(params)
+        self.params = default_params
+        self.engine = engine or settings.FRAUD_ENGINE
+        self.model = None
+        self.flat = None
+        self.lo = None
+        self.hi = None
+        self.sketch = QuantileSketch()
+        self.rules = None
+        self._lock = threading.Lock()
+
+    def fit(self, X: np.ndarray) -> None:
+        from sklearn.ensemble import IsolationForest
+
+        self.model = IsolationForest(**self.params)
+        self.model.fit(X)
+        self._flatten()
+        self.calibrate(self.raw_scores(X))
+
+    def _flatten(self) -> None:
+        self.flat = None
+        if self.engine != 'flat':
+            return
+        try:
+            self.flat = FlatIsolationForest.from_sklearn(self.model)
+        except Exception as e:
+            logger.warning(f"Could not flatten IsolationForest, using sklearn scoring: {e}")
+
+    def calibrate(self, raw: np.ndarray) -> None:
+        """Restart the calibration sketch from these raw scores."""
+        with self._lock:
+            self.sketch = QuantileSketch()
+            self.sketch.update(raw)
+        self.recalibrate()
+
+    def observe(self, raw: np.ndarray) -> None:
+        """Fold live raw scores into the sketch; lo/hi move on the next recalibrate()."""
+        with self._lock:
+            self.sketch.update(raw)
+
+    def recalibrate(self) -> None:
+        with self._lock:
+            if self.sketch.count == 0:
+                return
+            self.lo, self.hi = (float(v) for v in self.sketch.quantile(CALIBRATION_QUANTILES))
+
+    def raw_scores(self, X: np.ndarray) -> np.ndarray:
+        if self.model is None:
+            raise RuntimeError("Model not fitted")
+        # The flat evaluator wins on small batches; sklearn's compiled per-tree
+        # walk catches up around a few hundred rows
+        if self.flat is not None and len(X) <= FLAT_MAX_ROWS and not np.isnan(X).any():
+            return -self.flat.score_samples(X)
+        return -self.model.score_samples(X)
+
+    def fit_rules(self, X: np.ndarray, vectorizer) -> None:
+        self.rules = FraudRules.fit(rule_inputs(X, vectorizer), rule_segments(vectorizer))
+
+    def rule_results(self, X: np.ndarray, vectorizer) -> Optional[Dict[str, Any]]:
+        """Per-rule z-scores, triggered flags and reasons, or None without rules."""
+        if self.rules is None or vectorizer is None:
+            return None
+        columns = rule_inputs(X, vectorizer)
+        z = self.rules.z_scores(columns)
+        triggered = self.rules.triggered(z)
+        return {'z': z, 'triggered': triggered, 'reasons': self.rules.reasons(columns, z, triggered)}
+
+    def score(self, X: np.ndarray) -> np.ndarray:
+        """Calibrated 0-100 fraud scores, one per row."""
+        return self.calibrated(self.raw_scores(X))
+
+    def calibrated(self, raw: np.ndarray) -> np.ndarray:
+        span = self.hi - self.lo
+        if span <= 0:
+            return np.where(raw > self.hi, 100.0, 0.0)
+        return np.clip((raw - self.lo) / span * 100, 0.0, 100.0)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def to_state(self) -> Dict[str, Any]:
+        if self.model is None:
+            raise RuntimeError("Model not fitted")
+        return {
+            'model': self.model, 'lo': self.lo, 'hi': self.hi, 'params': self.params, 'sketch': self.sketch,
+            'rules': self.rules.to_dict() if self.rules is not None else None
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> 'FraudModel':
+        fraud = cls(params=state.get('params'))
+        fraud.model = state['model']
+        fraud.lo = state['lo']
+        fraud.hi = state['hi']
+        fraud.sketch = state.get('sketch') or QuantileSketch()
+        fraud.rules = FraudRules.from_dict(state['rules']) if state.get('rules') else None
+        fraud._flatten()
+        return fraud
+
+    @classmethod
+    def from_artifacts(cls, model, calibration: Dict[str, float]) -> 'FraudModel':
+        """Wrap the iforest.pkl / calibration.pkl pair produced by fraud detection/train_global.py."""
+        return cls.from_state({
+            'model': model, 'lo': calibration['lo'], 'hi': calibration['hi'],
+            'sketch': calibration.get('sketch')
+        })
+
+    def save(self, path: str) -> None:
+        joblib.dump(self.to_state(), path)
+
+    def load(self, path: str) -> None:
+        state = joblib.load(path)
+        self.model, self.lo, self.hi = state['model'], state['lo'], state['hi']
+        self.params = state.get('params', self.params)
+        self.sketch = state.get('sketch') or QuantileSketch()
+        self.rules = FraudRules.from_dict(state['rules']) if state.get('rules') else None
+        self._flatten()
@@ -0,0 +1,144 @@
+import numpy as np
+from typing import Any, Dict, List, Optional
+
+# (name, label, direction): 'high' flags unusually large values, 'both' either tail
+RULES = [
+    ('loan_to_income', 'Loan-to-income', 'high'),
+    ('revol_to_income', 'Revolving balance to income', 'high'),
+    ('inquiry_density', 'Inquiry density', 'high'),
+    ('open_account_ratio', 'Open account ratio', 'both')
+]
+
+SEGMENT_FEATURE = 'purpose'
+RATIO_INPUTS = ['loan_amnt', 'annual_inc', 'revol_bal', 'inquiry_density', 'open_account_ratio']
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, numerator / denominator, np.nan)
+
+def rule_inputs(X: np.ndarray, vectorizer) -> Dict[str, np.ndarray]:
+    """
+    Unscaled ratio inputs and the segment index (-1 if unknown) recovered
+    from a feature matrix built by a CompiledLoanVectorizer.
+    """
+    numeric = {name: i for i, name in enumerate(vectorizer.numeric_features)}
+    missing = [name for name in RATIO_INPUTS if name not in numeric]
+    if missing:
+        raise ValueError(f"Vectorizer has no {missing} features for the fraud rules")
+
+    X = np.asarray(X, dtype=np.float64)
+    columns = {
+        name: X[:, numeric[name]] * vectorizer.scales[numeric[name]] + vectorizer.means[numeric[name]]
+        for name in RATIO_INPUTS
+    }
+
+    segment = np.full(len(X), -1)
+    if SEGMENT_FEATURE in vectorizer.categorical_features:
+        j = vectorizer.categorical_features.index(SEGMENT_FEATURE)
+        start = len(vectorizer.numeric_features) + sum(len(c) for c in vectorizer.categories[:j])
+        block = X[:, start:start + len(vectorizer.categories[j])]
+        # handle_unknown='ignore' leaves an all-zero block for unseen categories
+        segment = np.where(block.max(axis=1) > 0, block.argmax(axis=1), -1)
+    columns['segment'] = segment
+    return columns
+
+def rule_segments(vectorizer) -> List[Any]:
+    if SEGMENT_FEATURE not in vectorizer.categorical_features:
+        return []
+    return list(vectorizer.categories[vectorizer.categorical_features.index(SEGMENT_FEATURE)])
+
+def rule_ratios(columns: Dict[str, np.ndarray]) -> np.ndarray:
+    """(n_rows, n_rules) ratio matrix in RULES order."""
+    return np.column_stack([
+        _ratio(columns['loan_amnt'], columns['annual_inc']),
+        _ratio(columns['revol_bal'], columns['annual_inc']),
+        columns['inquiry_density'],
+        columns['open_account_ratio']
+    ])
+
+class FraudRules:
+    """
+    Robust ratio z-scores: for each rule, (ratio - median) / (1.4826 * MAD)
+    against the applicant's segment, with medians and MADs taken at
+    training time. The lookup table has one row per segment plus a final
+    global row used for unknown or small segments. When the MAD is zero
+    (e.g. mostly-zero inquiry counts) the mean absolute deviation scaled by
+    1.2533 stands in for it.
+    """
+
+    def __init__(self, segments: List[Any], medians: np.ndarray, scales: np.ndarray,
+                 z_threshold: float = 3.5):
+        self.segments = list(segments)
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.z_threshold = z_threshold
+        self._upper_only = np.array([direction == 'high' for _, _, direction in RULES])
+
+    @classmethod
+    def fit(cls, columns: Dict[str, np.ndarray], segments: List[Any], min_segment_rows: int = 200,
+            z_threshold: float = 3.5) -> 'FraudRules':
+        ratios = rule_ratios(columns)
+        segment = columns['segment']
+
+        def robust(rows: np.ndarray):
+            median = np.nanmedian(rows, axis=0)
+            deviation = np.abs(rows - median)
+            mad = np.nanmedian(deviation, axis=0)
+            scale = np.where(mad > 0, 1.4826 * mad, 1.2533 * np.nanmean(deviation, axis=0))
+            return median, scale
+
+        global_median, global_scale = robust(ratios)
+        medians = np.tile(global_median, (len(segments) + 1, 1))
+        scales = np.tile(global_scale, (len(segments) + 1, 1))
+        for s in range(len(segments)):
+            rows = ratios[segment == s]
+            if len(rows) >= min_segment_rows:
+                medians[s], scales[s] = robust(rows)
+                # A column with no observations in the segment keeps the global entry
+                fallback = np.isnan(medians[s]) | np.isnan(scales[s])
+                medians[s][fallback], scales[s][fallback] = global_median[fallback], global_scale[fallback]
+
+        return cls(segments, medians, scales, z_threshold)
+
+    def z_scores(self, columns: Dict[str, np.ndarray]) -> np.ndarray:
+        """(n_rows, n_rules) signed robust z-scores; 0 where a ratio is undefined."""
+        ratios = rule_ratios(columns)
+        row = np.where(columns['segment'] >= 0, columns['segment'], len(self.segments))
+        scale = self.scales[row]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (ratios - self.medians[row]) / scale
+        return np.where(np.isfinite(z) & (scale > 0), z, 0.0)
+
+    def triggered(self, z: np.ndarray) -> np.ndarray:
+        return np.where(self._upper_only, z, np.abs(z)) >= self.z_threshold
+
+    def reasons(self, columns: Dict[str, np.ndarray], z: np.ndarray,
+                triggered: Optional[np.ndarray] = None) -> List[List[str]]:
+        """Human-readable reasons for the triggered rules of each row."""
+        triggered = self.triggered(z) if triggered is None else triggered
+        ratios = rule_ratios(columns)
+        out = [[] for _ in range(len(z))]
+        for i in np.flatnonzero(triggered.any(axis=1)):
+            segment = columns['segment'][i]
+            where = f"{self.segments[segment]} applications" if segment >= 0 else "all applications"
+            for r in np.flatnonzero(triggered[i]):
+                side = 'above' if z[i, r] > 0 else 'below'
+                out[i].append(
+                    f"{RULES[r][1]} {ratios[i, r]:.2f} is {abs(z[i, r]):.1f} robust SDs {side} the median for {where}"
+                )
+        return out
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'rules': [name for name, _, _ in RULES],
+            'segments': self.segments,
+            'medians': self.medians.astype(np.float32),
+            'scales': self.scales.astype(np.float32),
+            'z_threshold': self.z_threshold
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'FraudRules':
+        if state['rules'] != [name for name, _, _ in RULES]:
+            raise ValueError(f"Fraud rules table was built for {state['rules']}")
+        return cls(state['segments'], state['medians'], state['scales'], state['z_threshold'])
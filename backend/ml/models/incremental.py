@@ -0,0 +1,70 @@
+import io
+import json
+import joblib
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+from ml.models.model_registry import MODEL_CLASSES, OPTIONAL_ARTIFACTS, download_version
+from ml.models.fraud_model import FraudModel
+from ml.preprocessing.fast_vectorize import CompiledLoanVectorizer
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ParentVersion:
+    """
+    A trained version loaded to continue training from: its models,
+    smoother memory, explainer background, compiled vectorizer and fraud
+    model. Read from the local artifact directory when the version was
+    trained on this host, otherwise downloaded from Qdrant.
+    """
+
+    def __init__(self, version: str, metadata: Dict[str, Any], models: Dict[str, Any],
+                 smoother=None, background: Optional[Dict[str, Any]] = None,
+                 vectorizer: Optional[CompiledLoanVectorizer] = None, fraud: Optional[FraudModel] = None):
+        self.version = version
+        self.metadata = metadata
+        self.models = models
+        self.smoother = smoother
+        self.background = background
+        self.vectorizer = vectorizer
+        self.fraud = fraud
+
+    @property
+    def feature_names(self):
+        return self.metadata.get('feature_names', [])
+
+    @property
+    def lineage(self) -> Dict[str, Any]:
+        # Versions trained before lineage was recorded count as full runs
+        return self.metadata.get('lineage') or {'mode': 'full', 'parent_version': None, 'ancestors': []}
+
+    @classmethod
+    def load(cls, version: str) -> 'ParentVersion':
+        model_dir = Path(settings.MODEL_PATH) / version
+        if (model_dir / 'metadata.json').exists():
+            with open(model_dir / 'metadata.json') as f:
+                metadata = json.load(f)
+            sources = {name: str(model_dir / f"{name}.joblib") for name in MODEL_CLASSES}
+            optional = {}
+            for artifact in OPTIONAL_ARTIFACTS:
+                path = model_dir / f"{artifact}.joblib"
+                optional[artifact] = joblib.load(path) if path.exists() else None
+        else:
+            from services.qdrant_service import QdrantService
+            metadata, binaries, optional = download_version(QdrantService(), version)
+            sources = {name: io.BytesIO(binary) for name, binary in binaries.items()}
+
+        models = {}
+        for name, source in sources.items():
+            models[name] = MODEL_CLASSES[name]()
+            models[name].load(source)
+
+        logger.info(f"Loaded version {version} to continue training from")
+        return cls(
+            version, metadata, models,
+            smoother=optional['knn_smoother'],
+            background=optional['explainer_background'],
+            vectorizer=CompiledLoanVectorizer.from_dict(optional['vectorizer']) if optional['vectorizer'] else None,
+            fraud=FraudModel.from_state(optional['fraud']) if optional['fraud'] else None
+        )
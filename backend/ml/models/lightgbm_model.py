@@ -1,4 +1,3 @@
-import lightgbm as lgb
 import numpy as np
 import joblib
 from typing import Optional
@@ -25,9 +24,12 @@ class LightGBMModel(ModelInterface):
         self.params = default_params
         self.model = None
     
-    def fit(self, X: np.ndarray, y: np.ndarray) -> None:
+    def fit(self, X: np.ndarray, y: np.ndarray, init_model: Optional['LightGBMModel'] = None) -> None:
+        """With init_model, boosting continues from its trees for n_estimators more rounds."""
+        import lightgbm as lgb
+        
         self.model = lgb.LGBMClassifier(**self.params)
-        self.model.fit(X, y)
+        self.model.fit(X, y, init_model=init_model.model.booster_ if init_model is not None else None)
     
     def predict_proba(self, X: np.ndarray) -> np.ndarray:
         if self.model is None:
@@ -1,4 +1,3 @@
-from sklearn.linear_model import LogisticRegression
 import numpy as np
 import joblib
 from typing import Optional
@@ -19,6 +18,8 @@ class LogisticModel(ModelInterface):
         self.model = None
     
     def fit(self, X: np.ndarray, y: np.ndarray) -> None:
+        from sklearn.linear_model import LogisticRegression
+        
         self.model = LogisticRegression(**self.params)
         self.model.fit(X, y)
     
@@ -1,60 +1,202 @@
+import io
+import time
+import joblib
 import logging
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable
 from services.qdrant_service import QdrantService
 from ml.models.xgboost_model import XGBoostModel
 from ml.models.lightgbm_model import LightGBMModel
 from ml.models.logistic_model import LogisticModel
+from ml.models.fraud_model import FraudModel
+from ml.models.shared_state import SharedStateStore
 from ml.knn.knn_smoother import KNNSmoother
+from ml.preprocessing.fast_vectorize import CompiledLoanVectorizer
+from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+MODEL_CLASSES = {
+    'xgboost': XGBoostModel,
+    'lightgbm': LightGBMModel,
+    'logistic': LogisticModel
+}
+
+# Artifacts a version may ship without; older versions predate them
+OPTIONAL_ARTIFACTS = ('knn_smoother', 'explainer_background', 'vectorizer', 'fraud')
+
+def download_version(qdrant: QdrantService, version: str):
+    """(metadata, model binaries, optional artifacts) of a version stored in Qdrant."""
+    metadata = qdrant.get_metadata(version)
+    if not metadata:
+        raise FileNotFoundError(f"Metadata not found for version {version}")
+
+    binaries = {}
+    for model_type in MODEL_CLASSES:
+        payload = qdrant.get_model_artifact(version, model_type)
+        if not payload:
+            raise FileNotFoundError(f"Model artifacts not found for version {version}")
+        binaries[model_type] = payload['binary']
+
+    optional = {}
+    for artifact in OPTIONAL_ARTIFACTS:
+        payload = qdrant.get_model_artifact(version, artifact)
+        optional[artifact] = joblib.load(io.BytesIO(payload['binary'])) if payload else None
+    return metadata, binaries, optional
+
 class ModelRegistry:
-    def __init__(self):
+    def __init__(self, shared: Optional[bool] = None):
         self.active_version = None
         self.models = {}
         self.smoother = None
+        self.background = None
+        self.vectorizer = None
+        self.fraud = None
         self.metadata = {}
         self.feature_names = []
         self.qdrant = QdrantService()
+        if shared is None:
+            shared = settings.SHARED_STATE_ENABLED
+        self.shared_state = SharedStateStore() if shared else None
+        self._active_mtime = None
+        self._last_refresh_check = 0.0
+        self._activation_listeners = []
         self._load_latest_active_version()
 
+    def add_activation_listener(self, listener: Callable[[str], None]) -> None:
+        self._activation_listeners.append(listener)
+
     def _load_latest_active_version(self):
-        versions = self.qdrant.list_versions()
-        if versions:
-            latest = sorted(versions, key=lambda v: v['created_at'])[-1]['version']
+        if self.shared_state is not None:
+            announced = self.shared_state.active()
+            if announced and self.shared_state.is_published(announced['version']):
+                self._attach(announced['version'])
+                return
+
+        latest = self._latest_version()
+        if latest:
             try:
                 self.activate_version(latest)
             except Exception as e:
                 logger.error(f"Failed to activate latest version {latest}: {e}")
 
+    def _latest_version(self) -> Optional[str]:
+        versions = self.qdrant.list_versions()
+        if versions:
+            return sorted(versions, key=lambda v: v['created_at'])[-1]['version']
+        return None
+
+    def _download_version(self, version: str):
+        return download_version(self.qdrant, version)
+
     def activate_version(self, version: str) -> str:
-        metadata = self.qdrant.get_metadata(version)
-        if not metadata:
-            raise FileNotFoundError(f"Metadata not found for version {version}")
-
-        xgb_payload = self.qdrant.get_model_artifact(version, 'xgboost')
-        lgb_payload = self.qdrant.get_model_artifact(version, 'lightgbm')
-        lr_payload = self.qdrant.get_model_artifact(version, 'logistic')
-        if not xgb_payload or not lgb_payload or not lr_payload:
-            raise FileNotFoundError(f"Model artifacts not found for version {version}")
+        if self.shared_state is not None:
+            return self._activate_shared(version)
+
+        metadata, binaries, optional = self._download_version(version)
+
+        models = {}
+        for model_type, binary in binaries.items():
+            model = MODEL_CLASSES[model_type]()
+            model.load(io.BytesIO(binary))
+            models[model_type] = model
 
-        xgb_model = XGBoostModel()
-        xgb_model.load(xgb_payload['binary'])
-        lgb_model = LightGBMModel()
-        lgb_model.load(lgb_payload['binary'])
-        lr_model = LogisticModel()
-        lr_model.load(lr_payload['binary'])
-
-        self.models = {
-            'xgboost': xgb_model,
-            'lightgbm': lgb_model,
-            'logistic': lr_model
-        }
+        self._set_active(version, metadata, models, optional)
+        return version
+
+    def _activate_shared(self, version: str) -> str:
+        with self.shared_state.lock():
+            if not self.shared_state.is_published(version):
+                metadata, binaries, optional = self._download_version(version)
+                arrays = {}
+                manifest = {'metadata': metadata}
+                smoother = optional['knn_smoother']
+                if smoother is not None and smoother.X_train is not None:
+                    arrays['knn_X'] = smoother.X_train
+                    arrays['knn_proba'] = smoother.training_proba
+                    manifest['knn'] = {'k': smoother.k, 'metric': smoother.metric}
+                background = optional['explainer_background']
+                if background is not None:
+                    arrays['background_data'] = background['data']
+                    arrays['background_weights'] = background['weights']
+                if optional['vectorizer'] is not None:
+                    manifest['vectorizer'] = optional['vectorizer']
+                files = dict(binaries)
+                if optional['fraud'] is not None:
+                    buffer = io.BytesIO()
+                    joblib.dump(optional['fraud'], buffer)
+                    files['fraud'] = buffer.getvalue()
+                self.shared_state.publish(version, arrays, files, manifest)
+            self.shared_state.announce(version)
+        self._attach(version)
+        return version
+
+    def _attach(self, version: str) -> None:
+        manifest, arrays, files = self.shared_state.attach(version)
+
+        models = {}
+        for model_type in MODEL_CLASSES:
+            model = MODEL_CLASSES[model_type]()
+            model.load(str(files[model_type]))
+            models[model_type] = model
+
+        optional = {artifact: None for artifact in OPTIONAL_ARTIFACTS}
+        optional['vectorizer'] = manifest.get('vectorizer')
+        if 'fraud' in files:
+            optional['fraud'] = joblib.load(files['fraud'])
+        if 'knn' in manifest:
+            smoother = KNNSmoother(k=manifest['knn']['k'], metric=manifest['knn']['metric'])
+            smoother.attach(arrays['knn_X'], arrays['knn_proba'])
+            optional['knn_smoother'] = smoother
+        if 'background_data' in arrays:
+            optional['explainer_background'] = {
+                'data': arrays['background_data'],
+                'weights': arrays['background_weights']
+            }
+
+        self._active_mtime = self.shared_state.active_mtime()
+        self._set_active(version, manifest['metadata'], models, optional)
+
+    def _set_active(self, version: str, metadata: Dict[str, Any], models: Dict[str, Any],
+                    optional: Dict[str, Any]) -> None:
+        self.models = models
+        self.smoother = optional['knn_smoother']
+        self.background = optional['explainer_background']
+        # The vectorizer artifact is the compiled state dict, see CompiledLoanVectorizer.to_dict
+        vectorizer_state = optional['vectorizer']
+        self.vectorizer = CompiledLoanVectorizer.from_dict(vectorizer_state) if vectorizer_state else None
+        self.fraud = FraudModel.from_state(optional['fraud']) if optional['fraud'] else None
         self.metadata = metadata
         self.feature_names = metadata.get('feature_names', [])
         self.active_version = version
         logger.info(f"Activated model version {version}")
-        return version
+
+        for listener in self._activation_listeners:
+            try:
+                listener(version)
+            except Exception as e:
+                logger.error(f"Activation listener failed for version {version}: {e}")
+
+    def refresh(self) -> bool:
+        """Re-attach when another process has announced a new active version."""
+        if self.shared_state is None:
+            return False
+
+        now = time.monotonic()
+        if now - self._last_refresh_check < settings.SHARED_STATE_POLL_SECONDS:
+            return False
+        self._last_refresh_check = now
+
+        if self.shared_state.active_mtime() == self._active_mtime:
+            return False
+        announced = self.shared_state.active()
+        if not announced:
+            return False
+        if announced['version'] == self.active_version:
+            self._active_mtime = self.shared_state.active_mtime()
+            return False
+
+        self._attach(announced['version'])
+        return True
 
     def get_active_model(self, model_type: str = 'xgboost'):
         if self.active_version is None:
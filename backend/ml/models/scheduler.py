@@ -0,0 +1,125 @@
+import os
+import time
+import logging
+import tempfile
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Relative share of the cores when no explicit budget is given
+DEFAULT_CORE_WEIGHTS = {'xgboost': 2, 'lightgbm': 2, 'logistic': 1}
+
+def parse_core_budget(spec: str) -> Dict[str, int]:
+    """'xgboost:4,lightgbm:3,logistic:1' -> {'xgboost': 4, ...}"""
+    budget = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, cores = item.split(':')
+        budget[name.strip()] = int(cores)
+    return budget
+
+def _fit_task(name: str, model_class, params: Dict[str, Any], cores: int,
+              x_path: str, y_path: str) -> Tuple[str, Any, Dict[str, float]]:
+    # Both arrays are opened read-only from the page cache; nothing is pickled
+    X = np.load(x_path, mmap_mode='r')
+    y = np.load(y_path, mmap_mode='r')
+
+    model = model_class(params=dict(params or {}, n_jobs=cores))
+    try:
+        from threadpoolctl import threadpool_limits
+        limits = threadpool_limits(limits=cores)
+    except ImportError:
+        limits = None
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        model.fit(X, y)
+    finally:
+        if limits is not None:
+            limits.restore_original_limits()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    return name, model, {
+        'cores': cores,
+        'wall_seconds': wall,
+        'cpu_seconds': cpu,
+        'cpu_utilisation': cpu / (wall * cores) if wall > 0 else 0.0
+    }
+
+class TrainingScheduler:
+    """
+    Fits independent models concurrently in worker processes, each pinned
+    to its own core budget (n_jobs plus BLAS/OpenMP thread limits) so the
+    budgets add up to at most the machine instead of every model assuming
+    all cores. Training data goes to .npy files that workers memory-map.
+
+    A model starts as soon as enough of the total cores are free; models
+    are started largest budget first.
+    """
+
+    def __init__(self, core_budget: Optional[Dict[str, int]] = None, total_cores: Optional[int] = None):
+        self.total_cores = total_cores or os.cpu_count() or 1
+        self.core_budget = dict(core_budget or {})
+
+    def _cores_for(self, names: List[str]) -> Dict[str, int]:
+        cores = {name: self.core_budget[name] for name in names if name in self.core_budget}
+        weights = {name: DEFAULT_CORE_WEIGHTS.get(name, 1) for name in names if name not in cores}
+        if weights:
+            # Cores left over by explicit budgets, split by weight with largest-remainder rounding
+            free = max(self.total_cores - sum(cores.values()), 0)
+            shares = {name: free * w / sum(weights.values()) for name, w in weights.items()}
+            split = {name: int(share) for name, share in shares.items()}
+            leftover = free - sum(split.values())
+            for name in sorted(shares, key=lambda n: split[n] - shares[n])[:leftover]:
+                split[name] += 1
+            cores.update(split)
+        return {name: max(1, min(cores[name], self.total_cores)) for name in names}
+
+    def fit(self, tasks: List[Tuple[str, Any, Optional[Dict[str, Any]]]], X: np.ndarray, y: np.ndarray,
+            workdir: Optional[str] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        tasks are (name, model class, params). Returns the fitted models by
+        name and a report with per-model wall time, CPU time and utilisation
+        under 'models', plus the overall wall time and core count.
+        """
+        cores = self._cores_for([name for name, _, _ in tasks])
+        queue = sorted(tasks, key=lambda task: -cores[task[0]])
+        models, per_model = {}, {}
+        start = time.perf_counter()
+
+        with tempfile.TemporaryDirectory(dir=workdir, prefix='training_') as tmp:
+            x_path, y_path = str(Path(tmp) / 'X.npy'), str(Path(tmp) / 'y.npy')
+            np.save(x_path, np.ascontiguousarray(X))
+            np.save(y_path, np.ascontiguousarray(y))
+
+            running = {}
+            free = self.total_cores
+            with ProcessPoolExecutor(max_workers=len(tasks)) as pool:
+                while queue or running:
+                    # Start everything that fits; an idle machine always starts the next model
+                    while queue and (cores[queue[0][0]] <= free or not running):
+                        name, model_class, params = queue.pop(0)
+                        future = pool.submit(_fit_task, name, model_class, params, cores[name], x_path, y_path)
+                        running[future] = name
+                        free -= cores[name]
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        free += cores[running.pop(future)]
+                        name, model, stats = future.result()
+                        models[name] = model
+                        per_model[name] = stats
+                        logger.info(
+                            f"Trained {name} on {stats['cores']} cores in {stats['wall_seconds']:.1f}s "
+                            f"({stats['cpu_utilisation']:.0%} CPU utilisation)"
+                        )
+
+        report = {
+            'models': per_model,
+            'total_wall_seconds': time.perf_counter() - start,
+            'total_cores': self.total_cores
+        }
+        return models, report
@@ -0,0 +1,108 @@
+import os
+import sys
+import json
+import fcntl
+import shutil
+import logging
+import numpy as np
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class SharedStateStore:
+    """
+    Publishes the large state of a model version (neighbour matrix, training
+    probabilities, serialized models) once on local disk so every uvicorn
+    worker can attach to it read-only through memory-mapped files.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.SHARED_STATE_PATH)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.active_file = self.root / 'active.json'
+
+    def version_dir(self, version: str) -> Path:
+        return self.root / version
+
+    def is_published(self, version: str) -> bool:
+        return (self.version_dir(version) / 'manifest.json').exists()
+
+    @contextmanager
+    def lock(self):
+        with open(self.root / '.lock', 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def publish(self, version: str, arrays: Dict[str, np.ndarray],
+                files: Dict[str, bytes], manifest: Dict[str, Any]) -> None:
+        tmp_dir = self.root / f".{version}.{os.getpid()}"
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir(parents=True)
+
+        for name, array in arrays.items():
+            np.save(tmp_dir / f"{name}.npy", np.ascontiguousarray(array))
+        for name, binary in files.items():
+            (tmp_dir / name).write_bytes(binary)
+
+        manifest = dict(manifest, version=version, arrays=sorted(arrays), files=sorted(files))
+        with open(tmp_dir / 'manifest.json', 'w') as f:
+            json.dump(manifest, f)
+
+        target = self.version_dir(version)
+        if target.exists():
+            shutil.rmtree(target)
+        os.replace(tmp_dir, target)
+        logger.info(f"Published shared state for version {version} to {target}")
+
+    def attach(self, version: str) -> Tuple[Dict[str, Any], Dict[str, np.ndarray], Dict[str, Path]]:
+        version_dir = self.version_dir(version)
+        with open(version_dir / 'manifest.json') as f:
+            manifest = json.load(f)
+
+        arrays = {
+            name: np.load(version_dir / f"{name}.npy", mmap_mode='r')
+            for name in manifest['arrays']
+        }
+        files = {name: version_dir / name for name in manifest['files']}
+        return manifest, arrays, files
+
+    def announce(self, version: str) -> int:
+        current = self.active()
+        generation = (current['generation'] + 1) if current else 1
+        tmp_file = self.root / f".active.{os.getpid()}.json"
+        with open(tmp_file, 'w') as f:
+            json.dump({'version': version, 'generation': generation}, f)
+        os.replace(tmp_file, self.active_file)
+        logger.info(f"Announced active version {version} (generation {generation})")
+        return generation
+
+    def active(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.active_file) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def active_mtime(self) -> Optional[int]:
+        try:
+            return self.active_file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+if __name__ == "__main__":
+    # Pre-fork loading: run once before starting uvicorn workers so they only attach.
+    from ml.models.model_registry import ModelRegistry
+    from utils.logging_config import setup_logging
+
+    setup_logging()
+    registry = ModelRegistry(shared=True)
+    if len(sys.argv) > 1:
+        registry.activate_version(sys.argv[1])
+    logger.info(f"Shared state ready for version {registry.active_version}")
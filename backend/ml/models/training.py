@@ -3,35 +3,113 @@ import pandas as pd
 import logging
 import json
 import time
+import joblib
 from datetime import datetime
 from pathlib import Path
+from typing import Callable, Optional
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import (
-    roc_auc_score, precision_recall_curve, auc, confusion_matrix,
-    roc_curve, accuracy_score, precision_score, recall_score, f1_score
-)
 from ml.models.xgboost_model import XGBoostModel
 from ml.models.lightgbm_model import LightGBMModel
 from ml.models.logistic_model import LogisticModel
+from ml.models.fraud_model import FraudModel
+from ml.models.scheduler import TrainingScheduler, parse_core_budget
+from ml.models.tuning import HyperparameterSearch, DEFAULT_SEARCH_SPACES
 from ml.knn.knn_smoother import KNNSmoother
+from ml.explanation.background import summarize_background
+from ml.evaluation.metrics import EvaluationEngine, evaluation_segments
+from ml.preprocessing.fast_vectorize import CompiledLoanVectorizer
+from services.qdrant_service import QdrantService
 from core.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Columns that identify a raw export LoanVectorizer can engineer features from
+RAW_LOAN_COLUMNS = ['term', 'emp_length', 'earliest_cr_line', 'inq_last_6mths', 'loan_status']
+
+# Stages reported through TrainingPipeline.train's progress callback, in order.
+# Parallel training reports fit_models instead of the three per-model stages,
+# and a search config adds a search stage before them.
+TRAINING_STAGES = [
+    'load', 'split', 'fit_xgboost', 'fit_lightgbm', 'fit_logistic', 'fit_fraud',
+    'smoother', 'background', 'metrics', 'artifacts'
+]
+
+def load_training_data(data_path: str, vectorizer: Optional[CompiledLoanVectorizer] = None):
+    """
+    Returns (X, y, feature_names, vectorizer) for a training data path. With
+    a vectorizer (e.g. a parent version's), raw data is transformed with it
+    instead of fitting a new one, so the feature space stays the same.
+    """
+    from ml.preprocessing.streaming import is_vectorized_dataset, load_vectorized, VALID_STATUSES, TARGET_MAP
+    
+    if is_vectorized_dataset(data_path):
+        # Output of ml.preprocessing.streaming, opened as memory-mapped arrays
+        X, y, manifest = load_vectorized(data_path)
+        if vectorizer is not None and manifest['feature_names'] != vectorizer.feature_names:
+            raise ValueError(f"{data_path} was vectorized with different features than the parent version")
+        return X, y, manifest['feature_names'], CompiledLoanVectorizer.from_dict(manifest['vectorizer'])
+    
+    if settings.DATASET_CACHE_ENABLED:
+        # Parsed once into a columnar cache; later runs memory-map it
+        from ml.preprocessing.dataset_cache import DatasetCache
+        df = DatasetCache().load_csv(data_path)
+    else:
+        df = pd.read_csv(data_path)
+    
+    if vectorizer is not None and set(RAW_LOAN_COLUMNS).issubset(df.columns):
+        from ml.preprocessing.loan_vectorize import LoanVectorizer
+        df = df[df['loan_status'].isin(VALID_STATUSES)]
+        y = df['loan_status'].astype(object).map(TARGET_MAP).to_numpy(dtype=np.int8)
+        df_eng = LoanVectorizer()._engineer(df, n_jobs=settings.FEATURE_ENGINEERING_WORKERS)
+        return vectorizer.transform_frame(df_eng), y, list(vectorizer.feature_names), vectorizer
+    
+    if set(RAW_LOAN_COLUMNS).issubset(df.columns):
+        # Raw LendingClub export: fit a vectorizer and ship it with the models
+        from ml.preprocessing.loan_vectorize import LoanVectorizer
+        vectorizer = LoanVectorizer()
+        n_jobs = settings.FEATURE_ENGINEERING_WORKERS
+        vectorizer.fit(df, n_jobs=n_jobs)
+        X_df, y = vectorizer.transform(df, n_jobs=n_jobs)
+        return X_df.values, y.values, list(X_df.columns), vectorizer
+    
+    feature_cols = [
+        'loan_amnt', 'annual_inc', 'open_acc', 'total_acc', 'mort_acc',
+        'delinq_2yrs', 'revol_bal', 'tot_cur_bal', 'avg_cur_bal',
+        'acc_open_past_24mths', 'term_int', 'emp_length_int',
+        'open_account_ratio', 'severe_credit_event', 'inquiry_density',
+        'purpose', 'verification_status', 'home_ownership'
+    ]
+    return df[feature_cols].values, df['loan_status'].values, feature_cols, None
+
 class TrainingPipeline:
     
     def __init__(self):
         self.models = {}
         self.smoother = None
+        self.background = None
+        self.vectorizer = None
+        self.fraud = None
         self.feature_names = None
         self.preprocessor = None
         self.metrics = {}
+        self.training_report = {}
+        self.search_report = None
+        self.lineage = None
+        self.parent_comparison = None
+        self.evaluation = None
     
     def train(self, X: np.ndarray, y: np.ndarray, feature_names: list, 
-              training_config: dict = None) -> dict:
-        
+              training_config: dict = None, vectorizer=None,
+              progress: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        progress, if given, is called with each stage name as it starts
+        (see TRAINING_STAGES); an exception raised from it aborts training.
+        """
+        progress = progress or (lambda stage: None)
         start_time = time.time()
+        self.vectorizer = vectorizer
         
+        progress('split')
         X_train, X_test, y_train, y_test = train_test_split(
             X, y, 
             test_size=training_config.get('test_size', 0.2) if training_config else 0.2,
@@ -45,26 +123,70 @@ class TrainingPipeline:
         lgb_params = training_config.get('lightgbm_params') if training_config else None
         lr_params = training_config.get('logistic_params') if training_config else None
         
-        self.models['xgboost'] = XGBoostModel(params=xgb_params)
-        self.models['xgboost'].fit(X_train, y_train)
-        
-        self.models['lightgbm'] = LightGBMModel(params=lgb_params)
-        self.models['lightgbm'].fit(X_train, y_train)
+        tasks = [
+            ('xgboost', XGBoostModel, xgb_params),
+            ('lightgbm', LightGBMModel, lgb_params),
+            ('logistic', LogisticModel, lr_params)
+        ]
+        search_config = training_config.get('search') if training_config else None
+        if search_config:
+            progress('search')
+            tasks = self._search(tasks, X_train, y_train, dict(search_config), training_config)
+        parallel = training_config.get('parallel', settings.TRAINING_PARALLEL) if training_config else settings.TRAINING_PARALLEL
+        if parallel:
+            progress('fit_models')
+            core_budget = parse_core_budget(settings.TRAINING_CORE_BUDGET)
+            if training_config and training_config.get('core_budget'):
+                core_budget.update(training_config['core_budget'])
+            fitted, self.training_report = TrainingScheduler(core_budget).fit(tasks, X_train, y_train)
+            self.models.update(fitted)
+        else:
+            # Same shape as TrainingScheduler's report
+            self.training_report = {'models': {}}
+            fit_start = time.perf_counter()
+            for name, model_class, params in tasks:
+                progress(f"fit_{name}")
+                wall_start, cpu_start = time.perf_counter(), time.process_time()
+                self.models[name] = model_class(params=params)
+                self.models[name].fit(X_train, y_train)
+                self.training_report['models'][name] = {
+                    'wall_seconds': time.perf_counter() - wall_start,
+                    'cpu_seconds': time.process_time() - cpu_start
+                }
+            self.training_report['total_wall_seconds'] = time.perf_counter() - fit_start
         
-        self.models['logistic'] = LogisticModel(params=lr_params)
-        self.models['logistic'].fit(X_train, y_train)
+        progress('fit_fraud')
+        self.fraud = FraudModel(params=training_config.get('fraud_params') if training_config else None)
+        self.fraud.fit(X_train)
+        if vectorizer is not None:
+            try:
+                self.fraud.fit_rules(X_train, self._compiled_vectorizer())
+            except ValueError as e:
+                logger.warning(f"Skipping fraud ratio rules: {e}")
         
+        progress('smoother')
         xgb_proba_train = self.models['xgboost'].predict_proba(X_train)[:, 1]
         self.smoother = KNNSmoother(k=settings.KNN_K, metric=settings.KNN_METRIC)
         self.smoother.fit(X_train, xgb_proba_train.reshape(-1, 1))
         
-        self.metrics = self._compute_metrics(
-            self.models['xgboost'], X_test, y_test
+        progress('background')
+        self.background = summarize_background(
+            X_train,
+            n_clusters=settings.SHAP_BACKGROUND_SIZE,
+            random_state=training_config.get('random_state', 42) if training_config else 42
         )
         
+        progress('metrics')
+        self.evaluation = self._evaluate(self.models['xgboost'], X_test, y_test)
+        self.metrics = self.evaluation['metrics']
+        
+        self.lineage = {
+            'mode': 'full', 'parent_version': None, 'ancestors': [], 'training_rows': int(len(X))
+        }
         training_time = time.time() - start_time
         
-        version = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        version = self._new_version()
+        progress('artifacts')
         artifact_path = self._save_artifacts(version)
         
         return {
@@ -74,35 +196,173 @@ class TrainingPipeline:
             'artifact_path': artifact_path
         }
     
-    def _compute_metrics(self, model, X_test, y_test) -> dict:
-        y_pred_proba = model.predict_proba(X_test)[:, 1]
-        y_pred = (y_pred_proba >= settings.DEFAULT_THRESHOLD).astype(int)
+    def train_incremental(self, X: np.ndarray, y: np.ndarray, feature_names: list, parent,
+                          training_config: dict = None,
+                          progress: Optional[Callable[[str], None]] = None) -> dict:
+        """
+        Continues a parent version (ml.models.incremental.ParentVersion) on
+        new outcomes only: the boosters add TRAINING_INCREMENTAL_ROUNDS trees
+        (or the configured n_estimators) on top of the parent's and the
+        smoother memory is appended to. Logistic regression is carried over
+        unchanged: refitting a convex model on the delta, warm-started or
+        not, would just replace it with a fit to the delta. The fraud model,
+        explainer background and vectorizer carry over too; lineage records
+        what happened to each model. X and y hold just the delta, which is split
+        into train and test like a full run; metrics are reported for both the
+        new and the parent model on the same test rows.
+        """
+        progress = progress or (lambda stage: None)
+        training_config = training_config or {}
+        start_time = time.time()
+        if list(feature_names) != list(parent.feature_names):
+            raise ValueError(f"Features differ from parent version {parent.version}; run a full training instead")
+        self.vectorizer = parent.vectorizer
+        self.feature_names = feature_names
+        
+        progress('split')
+        X_train, X_test, y_train, y_test = train_test_split(
+            X, y,
+            test_size=training_config.get('test_size', 0.2),
+            random_state=training_config.get('random_state', 42),
+            stratify=y
+        )
+        
+        rounds = training_config.get('incremental_rounds') or settings.TRAINING_INCREMENTAL_ROUNDS
+        self.training_report = {'models': {}}
+        fit_start = time.perf_counter()
+        for name, model_class in (('xgboost', XGBoostModel), ('lightgbm', LightGBMModel)):
+            progress(f"fit_{name}")
+            base = parent.models[name]
+            # The parent's hyperparameters, with any configured overrides
+            params = dict(base.model.get_params(), **(training_config.get(f"{name}_params") or {}))
+            if not (training_config.get(f"{name}_params") or {}).get('n_estimators'):
+                params['n_estimators'] = rounds
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            self.models[name] = model_class(params=params)
+            self.models[name].fit(X_train, y_train, init_model=base)
+            self.training_report['models'][name] = {
+                'wall_seconds': time.perf_counter() - wall_start,
+                'cpu_seconds': time.process_time() - cpu_start,
+                'added_rounds': params['n_estimators'],
+                'update': 'continued'
+            }
+        
+        progress('fit_logistic')
+        self.models['logistic'] = parent.models['logistic']
+        self.training_report['models']['logistic'] = {
+            'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'added_rounds': None, 'update': 'carried_over'
+        }
+        self.training_report['total_wall_seconds'] = time.perf_counter() - fit_start
+        
+        progress('fit_fraud')
+        # Kept current in serving by FraudRefresher; refitting on the delta alone would forget history
+        self.fraud = parent.fraud
+        if self.fraud is None:
+            self.fraud = FraudModel(params=training_config.get('fraud_params'))
+            self.fraud.fit(X_train)
         
-        auc_score = roc_auc_score(y_test, y_pred_proba)
+        progress('smoother')
+        xgb_proba_train = self.models['xgboost'].predict_proba(X_train)[:, 1].reshape(-1, 1)
+        self.smoother = parent.smoother or KNNSmoother(k=settings.KNN_K, metric=settings.KNN_METRIC)
+        self.smoother.append(X_train, xgb_proba_train)
         
-        precision, recall, _ = precision_recall_curve(y_test, y_pred_proba)
-        pr_auc = auc(recall, precision)
+        progress('background')
+        self.background = parent.background
+        if self.background is None:
+            self.background = summarize_background(
+                X_train, n_clusters=settings.SHAP_BACKGROUND_SIZE,
+                random_state=training_config.get('random_state', 42)
+            )
         
-        fpr, tpr, thresholds = roc_curve(y_test, y_pred_proba)
-        ks = np.max(tpr - fpr)
+        progress('metrics')
+        self.evaluation = self._evaluate(self.models['xgboost'], X_test, y_test)
+        self.metrics = self.evaluation['metrics']
+        parent_metrics = self._compute_metrics(parent.models['xgboost'], X_test, y_test)
+        self.parent_comparison = {
+            'parent_version': parent.version,
+            'test_rows': int(len(y_test)),
+            'parent_metrics': parent_metrics,
+            'change': {
+                key: self.metrics[key] - parent_metrics[key]
+                for key in ('auc', 'pr_auc', 'ks_statistic', 'accuracy', 'precision', 'recall', 'f1')
+            }
+        }
+        logger.info(
+            f"Incremental AUC {self.metrics['auc']:.4f} vs parent {parent.version} "
+            f"{parent_metrics['auc']:.4f} on {len(y_test)} new test rows"
+        )
         
-        tn, fp, fn, tp = confusion_matrix(y_test, y_pred).ravel()
+        parent_lineage = parent.lineage
+        parent_rows = parent_lineage.get('training_rows')
+        self.lineage = {
+            'mode': 'incremental',
+            'parent_version': parent.version,
+            'ancestors': list(parent_lineage.get('ancestors', [])) + [parent.version],
+            'delta_rows': int(len(X)),
+            'training_rows': int(parent_rows) + int(len(X)) if parent_rows is not None else None,
+            # continued: trained further on the delta; carried_over: the parent's model as is
+            'models': {name: report['update'] for name, report in self.training_report['models'].items()}
+        }
+        training_time = time.time() - start_time
+        
+        version = self._new_version()
+        progress('artifacts')
+        artifact_path = self._save_artifacts(version)
         
         return {
-            'auc': float(auc_score),
-            'pr_auc': float(pr_auc),
-            'ks_statistic': float(ks),
-            'accuracy': float(accuracy_score(y_test, y_pred)),
-            'precision': float(precision_score(y_test, y_pred)),
-            'recall': float(recall_score(y_test, y_pred)),
-            'f1': float(f1_score(y_test, y_pred)),
-            'true_negatives': int(tn),
-            'false_positives': int(fp),
-            'false_negatives': int(fn),
-            'true_positives': int(tp),
-            'threshold': settings.DEFAULT_THRESHOLD
+            'model_version': version,
+            'training_time_seconds': training_time,
+            'metrics': self.metrics,
+            'artifact_path': artifact_path
         }
     
+    def _new_version(self) -> str:
+        # Incremental runs can finish within a second of their parent
+        version = datetime.utcnow().strftime('%Y%m%d_%H%M%S')
+        candidate, n = version, 1
+        while (Path(settings.MODEL_PATH) / candidate).exists():
+            candidate, n = f"{version}_{n}", n + 1
+        return candidate
+    
+    def _search(self, tasks: list, X_train: np.ndarray, y_train: np.ndarray,
+                search_config: dict, training_config: dict) -> list:
+        """Tunes the models named in search_config['models'] and returns tasks with the best params."""
+        names = search_config.pop('models', [name for name, _, _ in tasks])
+        spaces = search_config.pop('spaces', {})
+        search_config.setdefault('random_state', training_config.get('random_state', 42))
+        
+        models = {
+            # Spaces are sampled on top of the model's full default params
+            name: (model_class(params=params).params, spaces.get(name, DEFAULT_SEARCH_SPACES[name]))
+            for name, model_class, params in tasks if name in names
+        }
+        tuned, self.search_report = HyperparameterSearch(**search_config).run(models, X_train, y_train)
+        return [(name, model_class, tuned.get(name, params)) for name, model_class, params in tasks]
+    
+    def _compiled_vectorizer(self) -> CompiledLoanVectorizer:
+        if isinstance(self.vectorizer, CompiledLoanVectorizer):
+            return self.vectorizer
+        return self.vectorizer.compile()
+
+    def _evaluation_engine(self, n_bootstrap: int = 0) -> EvaluationEngine:
+        return EvaluationEngine(
+            threshold=settings.DEFAULT_THRESHOLD,
+            n_bootstrap=n_bootstrap,
+            confidence=settings.EVALUATION_CONFIDENCE
+        )
+    
+    def _compute_metrics(self, model, X_test, y_test) -> dict:
+        y_pred_proba = model.predict_proba(X_test)[:, 1]
+        return self._evaluation_engine().metrics(y_test, y_pred_proba)
+    
+    def _evaluate(self, model, X_test, y_test) -> dict:
+        """Full report for metadata: metrics, bootstrap intervals, threshold table and segments."""
+        y_pred_proba = model.predict_proba(X_test)[:, 1]
+        segments = evaluation_segments(X_test, self._compiled_vectorizer()) if self.vectorizer is not None else None
+        return self._evaluation_engine(settings.EVALUATION_BOOTSTRAP_SAMPLES).evaluate(
+            y_test, y_pred_proba, segments=segments
+        )
+    
     def _save_artifacts(self, version: str) -> str:
         model_dir = Path(settings.MODEL_PATH) / version
         model_dir.mkdir(parents=True, exist_ok=True)
@@ -110,6 +370,12 @@ class TrainingPipeline:
         self.models['xgboost'].save(str(model_dir / 'xgboost.joblib'))
         self.models['lightgbm'].save(str(model_dir / 'lightgbm.joblib'))
         self.models['logistic'].save(str(model_dir / 'logistic.joblib'))
+        joblib.dump(self.smoother, model_dir / 'knn_smoother.joblib')
+        joblib.dump(self.background, model_dir / 'explainer_background.joblib')
+        self.fraud.save(str(model_dir / 'fraud.joblib'))
+        if self.vectorizer is not None:
+            # Stored compiled so serving never needs the sklearn ColumnTransformer
+            joblib.dump(self._compiled_vectorizer().to_dict(), model_dir / 'vectorizer.joblib')
         
         metadata = {
             'version': version,
@@ -118,11 +384,31 @@ class TrainingPipeline:
             'metrics': self.metrics,
             'threshold': settings.DEFAULT_THRESHOLD,
             'knn_k': settings.KNN_K,
-            'knn_metric': settings.KNN_METRIC
+            'knn_metric': settings.KNN_METRIC,
+            'fraud_calibration': {'lo': self.fraud.lo, 'hi': self.fraud.hi},
+            'training_report': self.training_report,
+            'hyperparameter_search': self.search_report,
+            'lineage': self.lineage,
+            'parent_comparison': self.parent_comparison,
+            'evaluation': self.evaluation
         }
         
         with open(model_dir / 'metadata.json', 'w') as f:
             json.dump(metadata, f, indent=2)
         
         logger.info(f"Artifacts saved to {model_dir}")
+        self._publish_artifacts(version, model_dir, metadata)
         return str(model_dir)
+    
+    def _publish_artifacts(self, version: str, model_dir: Path, metadata: dict) -> None:
+        try:
+            qdrant = QdrantService()
+            for artifact in sorted(model_dir.glob('*.joblib')):
+                qdrant.upsert_model_artifact(
+                    version, artifact.stem, artifact.read_bytes(),
+                    {'created_at': metadata['created_at']}
+                )
+            qdrant.upsert_metadata(version, metadata)
+            logger.info(f"Artifacts for version {version} published to Qdrant")
+        except Exception as e:
+            logger.error(f"Failed to publish artifacts for version {version}: {e}")
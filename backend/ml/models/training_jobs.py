@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import uuid
+import fcntl
+import logging
+import multiprocessing
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATES = ('queued', 'running')
+CANCEL_FILE = 'cancel'
+PID_FILE = 'pid'
+# A job directory may exist briefly before its process has a pid
+START_GRACE_SECONDS = 30.0
+
+class TrainingCancelled(Exception):
+    pass
+
+class TooManyTrainingJobs(Exception):
+    pass
+
+def _write_json(path: Path, data: Dict[str, Any]) -> None:
+    tmp = path.with_suffix('.tmp')
+    tmp.write_text(json.dumps(data, indent=2, default=str))
+    tmp.replace(path)
+
+def _pid_alive(pid: Optional[int]) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+def run_training_job(job_dir: str, config: Dict[str, Any]) -> None:
+    """Entry point of the training process: runs the pipeline and records progress in status.json."""
+    from utils.logging_config import setup_logging
+    from ml.models.training import TrainingPipeline, load_training_data
+
+    setup_logging()
+    directory = Path(job_dir)
+    status_path = directory / 'status.json'
+    status = json.loads(status_path.read_text())
+
+    def finish_stage() -> None:
+        if status['stage'] is not None:
+            status['stages'].append({
+                'stage': status['stage'], 'seconds': time.time() - status['stage_started_at']
+            })
+
+    def progress(stage: str) -> None:
+        # Cancellation is checked at every stage boundary
+        if (directory / CANCEL_FILE).exists():
+            raise TrainingCancelled(f"Cancelled before {stage}")
+        finish_stage()
+        status.update(state='running', stage=stage, stage_started_at=time.time())
+        _write_json(status_path, status)
+
+    try:
+        progress('load')
+        if config.get('incremental'):
+            from ml.models.incremental import ParentVersion
+            parent = ParentVersion.load(config['parent_version'])
+            X, y, feature_names, _ = load_training_data(config['data_path'], vectorizer=parent.vectorizer)
+            result = TrainingPipeline().train_incremental(X, y, feature_names, parent, config, progress=progress)
+        else:
+            X, y, feature_names, vectorizer = load_training_data(config['data_path'])
+            result = TrainingPipeline().train(X, y, feature_names, config, vectorizer=vectorizer, progress=progress)
+        finish_stage()
+        status.update(state='succeeded', stage=None, result=result)
+    except TrainingCancelled as e:
+        status.update(state='cancelled', error=str(e))
+    except FileNotFoundError as e:
+        status.update(state='failed', error=f"Data file not found: {e}")
+    except Exception as e:
+        logger.exception("Training job failed")
+        status.update(state='failed', error=str(e))
+    status['finished_at'] = time.time()
+    _write_json(status_path, status)
+
+class TrainingJobManager:
+    """
+    Runs training requests as separate processes so the API worker only
+    submits and reports. Each job has a directory under TRAINING_JOBS_PATH
+    holding status.json, which the training process rewrites at every
+    stage, so any API worker on the host can report on any job.
+
+    Cancellation drops a marker the job checks between stages; a job started
+    by this worker is also terminated right away. At most
+    TRAINING_MAX_CONCURRENT_JOBS jobs run at once across all workers (the
+    count and the start happen under a file lock in TRAINING_JOBS_PATH);
+    further submissions are rejected rather than queued so scoring keeps
+    its cores.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_concurrent: Optional[int] = None):
+        self.root = Path(root or settings.TRAINING_JOBS_PATH)
+        self.max_concurrent = max_concurrent or settings.TRAINING_MAX_CONCURRENT_JOBS
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._processes: Dict[str, multiprocessing.Process] = {}
+
+    @contextmanager
+    def lock(self):
+        # flock excludes other workers as well as other threads of this one
+        with open(self.root / '.lock', 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _status_path(self, job_id: str) -> Path:
+        return self.root / job_id / 'status.json'
+
+    def _reap(self, job_id: str, status: Dict[str, Any]) -> Dict[str, Any]:
+        """Mark jobs whose process exited without a final status as failed."""
+        process = self._processes.get(job_id)
+        if process is not None and not process.is_alive():
+            process.join()
+            del self._processes[job_id]
+        if process is not None:
+            alive = process.is_alive()
+        else:
+            pid_path = self.root / job_id / PID_FILE
+            if pid_path.exists():
+                alive = _pid_alive(int(pid_path.read_text()))
+            else:
+                alive = time.time() - status['submitted_at'] < START_GRACE_SECONDS
+
+        if status['state'] in ACTIVE_STATES and not alive:
+            # Re-read: the process may have written its final status while exiting
+            status = json.loads(self._status_path(job_id).read_text())
+            if status['state'] in ACTIVE_STATES:
+                cancelled = (self.root / job_id / CANCEL_FILE).exists()
+                status.update(
+                    state='cancelled' if cancelled else 'failed',
+                    error=status.get('error') or ('Cancelled' if cancelled else 'Training process exited unexpectedly'),
+                    finished_at=time.time()
+                )
+                _write_json(self._status_path(job_id), status)
+        return status
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        jobs = []
+        for path in sorted(self.root.glob('*/status.json')):
+            try:
+                jobs.append(self._reap(path.parent.name, json.loads(path.read_text())))
+            except (OSError, ValueError):
+                continue
+        return jobs
+
+    def get(self, job_id: str) -> Dict[str, Any]:
+        path = self._status_path(job_id)
+        if not path.exists():
+            raise KeyError(job_id)
+        return self._reap(job_id, json.loads(path.read_text()))
+
+    def submit(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        with self.lock():
+            active = [job for job in self.list_jobs() if job['state'] in ACTIVE_STATES]
+            if len(active) >= self.max_concurrent:
+                raise TooManyTrainingJobs(
+                    f"{len(active)} training job(s) already running (limit {self.max_concurrent})"
+                )
+
+            job_id = uuid.uuid4().hex[:12]
+            directory = self.root / job_id
+            directory.mkdir()
+            status = {
+                'job_id': job_id,
+                'state': 'queued',
+                'stage': None,
+                'stages': [],
+                'stage_started_at': None,
+                'submitted_at': time.time(),
+                'finished_at': None,
+                'error': None,
+                'result': None
+            }
+            _write_json(directory / 'status.json', status)
+
+            # spawn: a forked copy of a threaded server is not safe to train in,
+            # and a non-daemon process may still start its own worker pool
+            process = multiprocessing.get_context('spawn').Process(
+                target=run_training_job, args=(str(directory), config), name=f"training-{job_id}"
+            )
+            process.start()
+            self._processes[job_id] = process
+            # Kept apart from status.json, which only the job process writes from now on
+            (directory / PID_FILE).write_text(str(process.pid))
+            logger.info(f"Started training job {job_id} (pid {process.pid})")
+            return status
+
+    def cancel(self, job_id: str) -> Dict[str, Any]:
+        status = self.get(job_id)
+        if status['state'] not in ACTIVE_STATES:
+            return status
+
+        (self.root / job_id / CANCEL_FILE).touch()
+        process = self._processes.get(job_id)
+        if process is not None and process.is_alive():
+            process.terminate()
+            process.join(timeout=10)
+        logger.info(f"Cancelled training job {job_id}")
+        return self.get(job_id)
@@ -0,0 +1,325 @@
+import os
+import math
+import time
+import logging
+import tempfile
+import warnings
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Dict, List, Optional, Tuple
+from sklearn.model_selection import train_test_split
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# A space maps a parameter to a list of choices or a {'low', 'high', 'log', 'type'} range
+DEFAULT_SEARCH_SPACES = {
+    'xgboost': {
+        'learning_rate': {'low': 0.01, 'high': 0.3, 'log': True},
+        'max_depth': {'low': 3, 'high': 10, 'type': 'int'},
+        'min_child_weight': {'low': 1.0, 'high': 20.0, 'log': True},
+        'subsample': {'low': 0.5, 'high': 1.0},
+        'colsample_bytree': {'low': 0.5, 'high': 1.0},
+        'reg_lambda': {'low': 1e-3, 'high': 10.0, 'log': True}
+    },
+    'lightgbm': {
+        'learning_rate': {'low': 0.01, 'high': 0.3, 'log': True},
+        'num_leaves': {'low': 15, 'high': 255, 'log': True, 'type': 'int'},
+        'max_depth': [-1, 6, 8, 12],
+        'min_child_samples': {'low': 5, 'high': 200, 'log': True, 'type': 'int'},
+        'colsample_bytree': {'low': 0.5, 'high': 1.0},
+        'reg_lambda': {'low': 1e-3, 'high': 10.0, 'log': True}
+    },
+    'logistic': {
+        'C': {'low': 1e-3, 'high': 100.0, 'log': True}
+    }
+}
+
+# What a rung's budget buys: boosting rounds, or a fraction of the training rows
+RESOURCES = {'xgboost': 'rounds', 'lightgbm': 'rounds', 'logistic': 'rows'}
+
+def sample_params(space: Dict[str, Any], rng: np.random.Generator) -> Dict[str, Any]:
+    params = {}
+    for name, spec in space.items():
+        if isinstance(spec, (list, tuple)):
+            params[name] = spec[int(rng.integers(len(spec)))]
+            continue
+        low, high = spec['low'], spec['high']
+        if spec.get('log'):
+            value = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            value = float(rng.uniform(low, high))
+        params[name] = int(round(value)) if spec.get('type') == 'int' else value
+    return params
+
+# Per worker process: binned training/validation matrices, built once per search
+_matrices: Dict[Tuple, Any] = {}
+
+def _load_split(data_dir: str):
+    root = Path(data_dir)
+    return tuple(np.load(root / f"{name}.npy", mmap_mode='r') for name in ('X_fit', 'y_fit', 'X_valid', 'y_valid'))
+
+def _binned(model: str, data_dir: str, max_bin: int):
+    key = (model, data_dir, max_bin)
+    if key not in _matrices:
+        _matrices.clear()
+        X_fit, y_fit, X_valid, y_valid = _load_split(data_dir)
+        if model == 'xgboost':
+            import xgboost as xgb
+            train = xgb.QuantileDMatrix(X_fit, y_fit, max_bin=max_bin)
+            valid = xgb.QuantileDMatrix(X_valid, y_valid, ref=train)
+        else:
+            import lightgbm as lgb
+            # feature_pre_filter off so min_child_samples can vary across trials on one Dataset
+            train = lgb.Dataset(X_fit, y_fit, free_raw_data=False,
+                                params={'max_bin': max_bin, 'feature_pre_filter': False, 'verbosity': -1})
+            valid = lgb.Dataset(X_valid, y_valid, reference=train)
+            train.construct()
+            valid.construct()
+        _matrices[key] = (train, valid)
+    return _matrices[key]
+
+def _run_trial(model: str, params: Dict[str, Any], budget: float, data_dir: str, cores: int,
+               early_stopping_rounds: int) -> Dict[str, Any]:
+    try:
+        from threadpoolctl import threadpool_limits
+        limits = threadpool_limits(limits=cores)
+    except ImportError:
+        limits = None
+    try:
+        return _fit_trial(model, params, budget, data_dir, cores, early_stopping_rounds)
+    finally:
+        if limits is not None:
+            limits.restore_original_limits()
+
+def _fit_trial(model: str, params: Dict[str, Any], budget: float, data_dir: str, cores: int,
+               early_stopping_rounds: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    seed = params.get('random_state', 42)
+    native = {k: v for k, v in params.items() if k not in ('n_estimators', 'n_jobs', 'random_state')}
+    # Trials are ranked by validation AUC whatever metric the model params configure
+
+    if model == 'xgboost':
+        import xgboost as xgb
+        max_bin = native.setdefault('max_bin', 256)
+        train, valid = _binned(model, data_dir, max_bin)
+        native.update(nthread=cores, seed=seed, tree_method='hist', eval_metric='auc')
+        booster = xgb.train(native, train, int(budget), evals=[(valid, 'valid')],
+                            early_stopping_rounds=early_stopping_rounds, verbose_eval=False)
+        score, rounds = float(booster.best_score), booster.best_iteration + 1
+    elif model == 'lightgbm':
+        import lightgbm as lgb
+        max_bin = native.setdefault('max_bin', 255)
+        native.update(num_threads=cores, seed=seed, metric='auc')
+        with warnings.catch_warnings():
+            # Booster params differing from the Dataset's are expected here
+            warnings.simplefilter('ignore', UserWarning)
+            train, valid = _binned(model, data_dir, max_bin)
+            booster = lgb.train(native, train, int(budget), valid_sets=[valid], valid_names=['valid'],
+                                callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)])
+        score, rounds = float(booster.best_score['valid']['auc']), booster.best_iteration
+    else:
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.metrics import roc_auc_score
+        X_fit, y_fit, X_valid, y_valid = _load_split(data_dir)
+        # Rows were shuffled by the split, so a prefix is a random sample
+        n = max(int(len(X_fit) * budget), min(len(X_fit), 1000))
+        estimator = LogisticRegression(**dict(params, n_jobs=cores)).fit(X_fit[:n], y_fit[:n])
+        score, rounds = float(roc_auc_score(y_valid, estimator.predict_proba(X_valid)[:, 1])), None
+
+    return {
+        'score': score if np.isfinite(score) else -np.inf,
+        'rounds': rounds,
+        # A trial that stopped before its budget would not improve with a larger one
+        'converged': rounds is not None and rounds + early_stopping_rounds < budget,
+        'seconds': time.perf_counter() - start
+    }
+
+class _Bracket:
+    """One successive-halving bracket: n configurations, budgets growing by eta per rung."""
+
+    def __init__(self, model: str, configs: List[Dict[str, Any]], budgets: List[float], eta: int):
+        self.model = model
+        self.configs = configs
+        self.budgets = budgets
+        self.eta = eta
+        self.rung = 0
+        self.alive = list(range(len(configs)))
+        self.results: Dict[int, Dict[str, Any]] = {}
+        self.pending: set = set()
+        self.history: List[Dict[str, Any]] = []
+
+    def start_rung(self) -> List[int]:
+        """Config ids that need training at the current rung."""
+        budget = self.budgets[self.rung]
+        todo = []
+        for i in self.alive:
+            result = self.results.get(i)
+            if result is not None and result['converged']:
+                # Carried over: it early-stopped below the previous budget
+                self.history.append(dict(result, config=i, rung=self.rung, budget=budget, carried=True))
+            else:
+                todo.append(i)
+        self.pending = set(todo)
+        return todo
+
+    def report(self, i: int, result: Dict[str, Any]) -> bool:
+        """Record a trial; True once the rung is complete."""
+        self.results[i] = result
+        self.history.append(dict(result, config=i, rung=self.rung, budget=self.budgets[self.rung], carried=False))
+        self.pending.discard(i)
+        return not self.pending
+
+    def promote(self) -> bool:
+        """Keep the best 1/eta; False once the last rung is done."""
+        if self.rung + 1 == len(self.budgets):
+            return False
+        keep = max(1, len(self.alive) // self.eta)
+        self.alive = sorted(self.alive, key=lambda i: -self.results[i]['score'])[:keep]
+        self.rung += 1
+        return True
+
+    def best(self) -> Tuple[int, Dict[str, Any]]:
+        i = max(self.alive, key=lambda i: self.results[i]['score'])
+        return i, self.results[i]
+
+class HyperparameterSearch:
+    """
+    Successive halving (or Hyperband, a set of halving brackets trading
+    breadth for budget) over model parameter spaces. Each configuration is
+    trained with native early stopping against a validation split carved
+    out of the training set; a rung keeps the best 1/eta by validation AUC
+    and gives them eta times the budget (boosting rounds, or training rows
+    for logistic regression). Trials that early-stopped short of their
+    budget are carried to the next rung without retraining.
+
+    Trials run in a process pool. The split is written once to .npy files
+    that workers memory-map, and each worker bins it into an xgboost
+    QuantileDMatrix / LightGBM Dataset once and reuses it for every trial.
+    """
+
+    def __init__(self, method: str = 'successive_halving', n_trials: int = 27, eta: int = 3,
+                 min_rounds: int = 20, max_rounds: int = 500, early_stopping_rounds: int = 20,
+                 validation_size: float = 0.2, n_workers: Optional[int] = None,
+                 total_cores: Optional[int] = None, random_state: int = 42):
+        if method not in ('successive_halving', 'hyperband'):
+            raise ValueError(f"Unknown search method: {method}")
+        if eta < 2 or not 1 <= min_rounds <= max_rounds:
+            raise ValueError("Search needs eta >= 2 and 1 <= min_rounds <= max_rounds")
+        self.method = method
+        self.n_trials = n_trials
+        self.eta = eta
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.early_stopping_rounds = early_stopping_rounds
+        self.validation_size = validation_size
+        self.total_cores = total_cores or os.cpu_count() or 1
+        self.n_workers = max(1, min(n_workers or settings.TRAINING_SEARCH_WORKERS or self.total_cores, self.total_cores))
+        self.random_state = random_state
+
+    def _schedule(self) -> List[Tuple[int, int]]:
+        """(n_configs, n_rungs) per bracket."""
+        s_max = int(math.floor(math.log(self.max_rounds / self.min_rounds) / math.log(self.eta) + 1e-9))
+        if self.method == 'successive_halving':
+            rungs = min(int(math.floor(math.log(self.n_trials) / math.log(self.eta) + 1e-9)), s_max)
+            return [(self.n_trials, rungs + 1)]
+        return [
+            (int(math.ceil((s_max + 1) / (s + 1) * self.eta ** s)), s + 1)
+            for s in range(s_max, -1, -1)
+        ]
+
+    def _brackets(self, model: str, base_params: Dict[str, Any], space: Dict[str, Any],
+                  rng: np.random.Generator) -> List[_Bracket]:
+        brackets = []
+        for n_configs, n_rungs in self._schedule():
+            # The last rung always gets the full budget
+            scale = [self.eta ** -(n_rungs - 1 - r) for r in range(n_rungs)]
+            if RESOURCES[model] == 'rounds':
+                budgets = [max(self.min_rounds, int(round(self.max_rounds * f))) for f in scale]
+            else:
+                budgets = scale
+            configs = [dict(base_params, **sample_params(space, rng)) for _ in range(n_configs)]
+            brackets.append(_Bracket(model, configs, budgets, self.eta))
+        return brackets
+
+    def run(self, models: Dict[str, Tuple[Dict[str, Any], Dict[str, Any]]], X: np.ndarray, y: np.ndarray,
+            workdir: Optional[str] = None) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+        """
+        models maps a model name to (base params, search space). Returns the
+        tuned parameters per model (base params, best sample and, for boosted
+        models, n_estimators set to the early-stopped round count) and a
+        report for the version metadata.
+        """
+        start = time.perf_counter()
+        rng = np.random.default_rng(self.random_state)
+        brackets = [b for name, (params, space) in models.items() for b in self._brackets(name, params, space, rng)]
+        cores = max(1, self.total_cores // self.n_workers)
+
+        X_fit, X_valid, y_fit, y_valid = train_test_split(
+            X, y, test_size=self.validation_size, random_state=self.random_state, stratify=y
+        )
+        with tempfile.TemporaryDirectory(dir=workdir, prefix='search_') as tmp:
+            for name, array in (('X_fit', X_fit), ('y_fit', y_fit), ('X_valid', X_valid), ('y_valid', y_valid)):
+                np.save(Path(tmp) / f"{name}.npy", np.ascontiguousarray(array))
+            del X_fit, X_valid
+
+            # Model-major order keeps a worker on one model, so its binned matrices stay warm
+            queue = [(b, i) for b in brackets for i in b.start_rung()]
+            running = {}
+            with ProcessPoolExecutor(max_workers=self.n_workers) as pool:
+                while queue or running:
+                    while queue and len(running) < self.n_workers:
+                        bracket, i = queue.pop(0)
+                        future = pool.submit(
+                            _run_trial, bracket.model, bracket.configs[i], bracket.budgets[bracket.rung],
+                            tmp, cores, self.early_stopping_rounds
+                        )
+                        running[future] = (bracket, i)
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        bracket, i = running.pop(future)
+                        if not bracket.report(i, future.result()):
+                            continue
+                        # Rungs where every survivor converged complete without new trials
+                        while bracket.promote():
+                            todo = bracket.start_rung()
+                            if todo:
+                                queue.extend((bracket, j) for j in todo)
+                                break
+
+        tuned = {}
+        report = {'method': self.method, 'eta': self.eta, 'n_workers': self.n_workers, 'models': {}}
+        for name, (params, _) in models.items():
+            own = [b for b in brackets if b.model == name]
+            bracket, (i, result) = max(((b, b.best()) for b in own), key=lambda item: item[1][1]['score'])
+            tuned[name] = dict(bracket.configs[i])
+            if result['rounds'] is not None:
+                tuned[name]['n_estimators'] = int(result['rounds'])
+            trials = [t for b in own for t in b.history if not t['carried']]
+            report['models'][name] = {
+                'best_params': tuned[name],
+                'best_validation_auc': result['score'],
+                'n_configs': sum(len(b.configs) for b in own),
+                'n_trials': len(trials),
+                'trial_seconds': sum(t['seconds'] for t in trials),
+                'brackets': [
+                    {
+                        'n_configs': len(b.configs),
+                        'budgets': b.budgets,
+                        'trials': [
+                            {'rung': t['rung'], 'budget': t['budget'], 'validation_auc': t['score'],
+                             'rounds': t['rounds'], 'carried': t['carried'], 'params': b.configs[t['config']]}
+                            for t in b.history
+                        ]
+                    }
+                    for b in own
+                ]
+            }
+            logger.info(
+                f"Search for {name}: best validation AUC {result['score']:.4f} "
+                f"after {len(trials)} trials over {report['models'][name]['n_configs']} configurations"
+            )
+        report['total_wall_seconds'] = time.perf_counter() - start
+        return tuned, report
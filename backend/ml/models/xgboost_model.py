@@ -1,4 +1,3 @@
-import xgboost as xgb
 import numpy as np
 import joblib
 from typing import Optional
@@ -23,9 +22,13 @@ class XGBoostModel(ModelInterface):
         self.params = default_params
         self.model = None
     
-    def fit(self, X: np.ndarray, y: np.ndarray) -> None:
+    def fit(self, X: np.ndarray, y: np.ndarray, init_model: Optional['XGBoostModel'] = None) -> None:
+        """With init_model, boosting continues from its trees for n_estimators more rounds."""
+        import xgboost as xgb
+        
         self.model = xgb.XGBClassifier(**self.params)
-        self.model.fit(X, y, verbose=False)
+        xgb_model = init_model.model.get_booster() if init_model is not None else None
+        self.model.fit(X, y, xgb_model=xgb_model, verbose=False)
     
     def predict_proba(self, X: np.ndarray) -> np.ndarray:
         if self.model is None:
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import fcntl
+import shutil
+import hashlib
+import logging
+import uuid
+import numpy as np
+import pandas as pd
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Optional
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_FILE = 'schema.json'
+SCHEMA_VERSION = 1
+HASH_BLOCK_BYTES = 1 << 20
+
+def file_fingerprint(path: str) -> Dict[str, Any]:
+    """Size, mtime and sha256 of a file's contents."""
+    stat = os.stat(path)
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_BYTES), b''):
+            digest.update(block)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+
+def _smallest_int(low: int, high: int) -> np.dtype:
+    for dtype in (np.int8, np.int16, np.int32, np.int64):
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return np.dtype(dtype)
+    raise ValueError(f"Integer range {low}..{high} does not fit in int64")
+
+def compact_column(values: pd.Series):
+    """
+    (array, column schema) for one parsed CSV column. Integers and
+    integral floats without gaps go to the smallest integer type, other
+    floats to float32 only when every value survives the round trip
+    exactly (float64 otherwise), and text to dictionary codes with the
+    sorted categories in the schema.
+    """
+    if pd.api.types.is_bool_dtype(values):
+        return values.to_numpy(dtype=bool), {'kind': 'numeric', 'dtype': 'bool'}
+
+    if pd.api.types.is_numeric_dtype(values):
+        array = values.to_numpy()
+        if np.issubdtype(array.dtype, np.floating):
+            observed = array[~np.isnan(array)]
+            if len(observed) == len(array) and len(array) and np.all(observed == np.round(observed)) \
+                    and np.abs(observed).max() < 2 ** 53:
+                array = array.astype(np.int64)
+            elif np.array_equal(array.astype(np.float32).astype(array.dtype), array, equal_nan=True):
+                array = array.astype(np.float32)
+        if np.issubdtype(array.dtype, np.integer):
+            dtype = _smallest_int(int(array.min()), int(array.max())) if len(array) else np.dtype(np.int8)
+            array = array.astype(dtype)
+        return array, {'kind': 'numeric', 'dtype': array.dtype.name}
+
+    # Anything else is stored as text so it round-trips as LoanVectorizer reads it
+    codes, categories = pd.factorize(values.astype(object).where(values.notna(), None), sort=True)
+    codes = codes.astype(_smallest_int(-1, max(len(categories) - 1, 0)))
+    return codes, {'kind': 'text', 'dtype': codes.dtype.name, 'categories': [str(c) for c in categories]}
+
+class DatasetCache:
+    """
+    Columnar, dtype-compacted copies of training CSVs.
+
+    The first load of a CSV parses it once and writes one .npy per column
+    (see compact_column) plus schema.json holding the column schema and the
+    source fingerprint. Later loads memory-map the columns instead of
+    parsing text. An entry is reused while the source's size and mtime
+    match; if only the mtime moved, the content hash decides and a match
+    refreshes the recorded mtime. Entries are keyed by the source's
+    resolved path and rebuilt in a temporary directory that replaces the
+    old entry once complete. Builds hold an flock on the cache root, so
+    concurrent loaders of the same CSV parse it once.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or settings.DATASET_CACHE_PATH)
+
+    @contextmanager
+    def lock(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / '.lock', 'w') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def entry_dir(self, source: str) -> Path:
+        key = hashlib.sha256(str(Path(source).resolve()).encode()).hexdigest()[:16]
+        return self.root / key
+
+    def _read_schema(self, entry: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(entry / SCHEMA_FILE) as f:
+                schema = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return schema if schema.get('version') == SCHEMA_VERSION else None
+
+    def lookup(self, source: str) -> Optional[Dict[str, Any]]:
+        """The schema of a current cache entry for source, or None."""
+        entry = self.entry_dir(source)
+        schema = self._read_schema(entry)
+        if schema is None:
+            return None
+
+        stat = os.stat(source)
+        recorded = schema['source_fingerprint']
+        if stat.st_size != recorded['size']:
+            return None
+        if stat.st_mtime_ns == recorded['mtime_ns']:
+            return schema
+
+        fingerprint = file_fingerprint(source)
+        if fingerprint['sha256'] != recorded['sha256']:
+            return None
+        # Touched but unchanged: remember the new mtime so the next lookup skips hashing
+        schema['source_fingerprint'] = fingerprint
+        self._write_schema(entry, schema)
+        return schema
+
+    def _write_schema(self, entry: Path, schema: Dict[str, Any]) -> None:
+        tmp = entry / f"{SCHEMA_FILE}.{uuid.uuid4().hex[:8]}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(schema, f, indent=2)
+        tmp.replace(entry / SCHEMA_FILE)
+
+    def build(self, source: str) -> Dict[str, Any]:
+        """Parse source and write a fresh cache entry for it; returns the schema."""
+        with self.lock():
+            return self._build(source)
+
+    def _build(self, source: str) -> Dict[str, Any]:
+        start = time.perf_counter()
+        fingerprint = file_fingerprint(source)
+        df = pd.read_csv(source, low_memory=False)
+
+        entry = self.entry_dir(source)
+        tmp = self.root / f"{entry.name}.{uuid.uuid4().hex[:8]}.tmp"
+        tmp.mkdir()
+        try:
+            columns = []
+            for i, name in enumerate(df.columns):
+                array, column = compact_column(df[name])
+                column.update(name=str(name), file=f"{i:04d}.npy")
+                np.save(tmp / column['file'], array)
+                columns.append(column)
+
+            schema = {
+                'version': SCHEMA_VERSION,
+                'source': str(Path(source).resolve()),
+                'source_fingerprint': fingerprint,
+                'n_rows': len(df),
+                'columns': columns,
+                'created_at': time.time()
+            }
+            self._write_schema(tmp, schema)
+
+            # Readers still holding maps of the old entry keep their (unlinked) files
+            if entry.exists():
+                stale = self.root / f"{entry.name}.{uuid.uuid4().hex[:8]}.old"
+                entry.rename(stale)
+                shutil.rmtree(stale, ignore_errors=True)
+            tmp.rename(entry)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        parsed = int(df.memory_usage(deep=True).sum())
+        cached = sum(f.stat().st_size for f in entry.glob('*.npy'))
+        logger.info(
+            f"Cached {source} as {len(columns)} columns in {time.perf_counter() - start:.1f}s "
+            f"({parsed / 2**20:.1f} MiB parsed -> {cached / 2**20:.1f} MiB on disk)"
+        )
+        return schema
+
+    def open(self, entry: Path, schema: Dict[str, Any], text_as: str = 'object') -> pd.DataFrame:
+        """
+        DataFrame over a cache entry. Numeric columns are read-only memory
+        maps; text columns are decoded from their codes as object strings
+        (text_as='object', what LoanVectorizer expects) or pandas
+        categoricals over the mapped codes (text_as='category').
+        """
+        data = {}
+        for column in schema['columns']:
+            values = np.load(entry / column['file'], mmap_mode='r')
+            if column['kind'] == 'text':
+                categories = pd.Index(column['categories'], dtype=object)
+                if text_as == 'category':
+                    values = pd.Categorical.from_codes(values, categories)
+                else:
+                    decoded = categories.to_numpy()[values]
+                    decoded[values < 0] = np.nan
+                    values = decoded
+            data[column['name']] = values
+        return pd.DataFrame(data, copy=False)
+
+    def load_csv(self, source: str, text_as: str = 'object') -> pd.DataFrame:
+        """Load source through the cache, building or rebuilding the entry if needed."""
+        schema = self.lookup(source)
+        if schema is None:
+            with self.lock():
+                # Another loader may have built it while we waited
+                schema = self.lookup(source) or self._build(source)
+        else:
+            logger.info(f"Loading {source} from dataset cache ({schema['n_rows']} rows)")
+        return self.open(self.entry_dir(source), schema, text_as=text_as)
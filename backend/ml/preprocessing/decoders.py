@@ -0,0 +1,156 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, List, Optional
+
+EMP_LENGTH_MAP = {
+    '< 1 year': 0, '1 year': 1, '2 years': 2, '3 years': 3, '4 years': 4,
+    '5 years': 5, '6 years': 6, '7 years': 7, '8 years': 8, '9 years': 9,
+    '10+ years': 10
+}
+
+# Parsers take the distinct raw values of a column and return one decoded
+# value each, with the same semantics as the per-row pandas code they replace
+
+def parse_term(values: List[Any]) -> List[Any]:
+    # Parsed one by one so '36' stays an int and '36.0' a float, which keeps
+    # the column dtype the same as to_numeric over every row
+    cleaned = pd.Series(values, dtype=object).astype(str).str.replace(' months', '', regex=False)
+    return [pd.to_numeric(pd.Series([v]), errors='coerce').iloc[0].item() for v in cleaned]
+
+def parse_emp_length(values: List[Any]) -> List[Any]:
+    return [EMP_LENGTH_MAP.get(v, np.nan) for v in values]
+
+NAT = np.datetime64('NaT', 'ns')
+
+def parse_cr_line(values: List[Any]) -> List[Any]:
+    # numpy datetimes rather than Timestamps so serving can build arrays directly
+    return list(pd.to_datetime(pd.Series(values, dtype=object), format='%b-%Y', errors='coerce').to_numpy())
+
+def parse_date(values: List[Any]) -> List[Any]:
+    return pd.to_datetime(pd.Series(values, dtype=object), errors='coerce').tolist()
+
+def is_text(series: pd.Series) -> bool:
+    """Object or pandas string dtype (the default for text from pandas 3 on)."""
+    return series.dtype == 'O' or isinstance(series.dtype, pd.StringDtype)
+
+def factorize_decode(series: pd.Series, parse: Callable[[List[Any]], List[Any]],
+                     table: Optional[Dict[Any, Any]] = None, na_value: Any = np.nan) -> pd.Series:
+    """
+    Decode a low-cardinality column by parsing each distinct value once and
+    scattering the results back to the rows. Values already in `table` are
+    not parsed again; newly parsed ones are added to it.
+    """
+    codes, uniques = pd.factorize(series, use_na_sentinel=True)
+    uniques = uniques.tolist()
+
+    if table is None:
+        decoded = parse(uniques) if uniques else []
+    else:
+        unknown = [u for u in uniques if u not in table]
+        if unknown:
+            table.update(zip(unknown, parse(unknown)))
+        decoded = [table[u] for u in uniques]
+
+    has_na = bool((codes < 0).any())
+    if has_na:
+        # Code -1 picks this trailing entry when scattering
+        decoded.append(na_value)
+    values = pd.Series(decoded) if decoded else pd.Series([], dtype=np.float64)
+    if not uniques and isinstance(na_value, np.datetime64):
+        values = values.astype('datetime64[ns]')
+
+    return pd.Series(values.to_numpy()[codes], index=series.index, name=series.name)
+
+class MemoizedDecoder:
+    """factorize_decode with a lookup table that persists across calls."""
+
+    def __init__(self, parse: Callable[[List[Any]], List[Any]], na_value: Any = np.nan,
+                 table: Optional[Dict[Any, Any]] = None, max_entries: int = 100000):
+        self.parse = parse
+        self.na_value = na_value
+        self.table = dict(table or {})
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def decode(self, series: pd.Series) -> pd.Series:
+        with self._lock:
+            if len(self.table) > self.max_entries:
+                # High-cardinality junk should not grow the table without bound
+                return factorize_decode(series, self.parse, None, self.na_value)
+            return factorize_decode(series, self.parse, self.table, self.na_value)
+
+    def lookup(self, values: List[Any]) -> List[Any]:
+        """Decode a short list of scalars (serving path); missing values decode to na_value."""
+        with self._lock:
+            unknown = list({v for v in values if not _is_na(v) and v not in self.table})
+            if unknown and len(self.table) <= self.max_entries:
+                self.table.update(zip(unknown, self.parse(unknown)))
+                unknown = []
+            parsed = dict(zip(unknown, self.parse(unknown))) if unknown else {}
+            return [
+                self.na_value if _is_na(v) else self.table[v] if v in self.table else parsed[v]
+                for v in values
+            ]
+
+def _is_na(value: Any) -> bool:
+    return value is None or (isinstance(value, float) and value != value)
+
+class DecoderSet:
+    """
+    Memoized decoders for the raw string columns LoanVectorizer parses. A
+    fitted vectorizer carries one, so the distinct values seen in training
+    ship with the model version and serving only parses unseen values.
+    """
+
+    def __init__(self, tables: Optional[Dict[str, Dict[Any, Any]]] = None):
+        tables = tables or {}
+        self.term = MemoizedDecoder(parse_term, table=tables.get('term'))
+        self.emp_length = MemoizedDecoder(parse_emp_length, table=tables.get('emp_length'))
+        self.earliest_cr_line = MemoizedDecoder(parse_cr_line, na_value=NAT, table=tables.get('earliest_cr_line'))
+
+    def tables(self) -> Dict[str, Dict[Any, Any]]:
+        return {
+            'term': self.term.table,
+            'emp_length': self.emp_length.table,
+            'earliest_cr_line': self.earliest_cr_line.table
+        }
+
+    def merge(self, tables: Dict[str, Dict[Any, Any]]) -> None:
+        """Add entries decoded elsewhere (e.g. by a feature engineering worker)."""
+        for name, decoder in (('term', self.term), ('emp_length', self.emp_length),
+                              ('earliest_cr_line', self.earliest_cr_line)):
+            with decoder._lock:
+                if len(decoder.table) <= decoder.max_entries:
+                    decoder.table.update(tables.get(name) or {})
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """JSON-safe tables: string keys only, NaN/NaT as None, dates as ISO strings."""
+        def clean(table, encode):
+            return {k: (None if pd.isna(v) else encode(v)) for k, v in table.items() if isinstance(k, str)}
+
+        return {
+            'term': clean(self.term.table, lambda v: v),
+            'emp_length': clean(self.emp_length.table, lambda v: v),
+            'earliest_cr_line': clean(self.earliest_cr_line.table, str)
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Dict[str, Any]]) -> 'DecoderSet':
+        def restore(table, decode, na_value):
+            return {k: (na_value if v is None else decode(v)) for k, v in (table or {}).items()}
+
+        return cls({
+            'term': restore(state.get('term'), lambda v: v, np.nan),
+            'emp_length': restore(state.get('emp_length'), lambda v: v, np.nan),
+            'earliest_cr_line': restore(state.get('earliest_cr_line'), lambda v: np.datetime64(v, 'ns'), NAT)
+        })
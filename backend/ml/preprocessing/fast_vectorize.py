@@ -0,0 +1,198 @@
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Union
+from ml.preprocessing.decoders import EMP_LENGTH_MAP, DecoderSet
+
+SEVERE_COLUMNS = ['pub_rec', 'pub_rec_bankruptcies', 'tax_liens']
+
+def _category_key(value: Any) -> Any:
+    # Mirrors SimpleImputer(missing_values=np.nan): NaN becomes 'missing',
+    # while an explicit None is kept as its own category
+    if isinstance(value, float) and value != value:
+        return 'missing'
+    return value
+
+def _to_float(values: List[Any]) -> np.ndarray:
+    """Elementwise equivalent of pd.to_numeric(errors='coerce') for a list of scalars."""
+    out = np.empty(len(values), dtype=np.float64)
+    for i, value in enumerate(values):
+        try:
+            out[i] = np.nan if value is None else float(value)
+        except (TypeError, ValueError):
+            out[i] = np.nan
+    return out
+
+class CompiledLoanVectorizer:
+    """
+    Plain-array version of a fitted LoanVectorizer. Turns a dict or a list
+    of dicts into the same feature matrix as LoanVectorizer.transform,
+    without building DataFrames or running the ColumnTransformer.
+
+    Engineered features are derived from their raw inputs like
+    LoanVectorizer does. When none of the raw inputs are present (e.g. the
+    API's LoanApplication already carries term_int or inquiry_density) the
+    provided engineered value is used instead.
+    """
+
+    def __init__(self, numeric_features: List[str], medians: np.ndarray, means: np.ndarray,
+                 scales: np.ndarray, categorical_features: List[str], categories: List[List[Any]],
+                 feature_names: List[str], lookups: Optional[Dict[str, Dict[str, Any]]] = None):
+        self.numeric_features = list(numeric_features)
+        self.medians = np.asarray(medians, dtype=np.float64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.scales = np.asarray(scales, dtype=np.float64)
+        self.categorical_features = list(categorical_features)
+        self.categories = [list(c) for c in categories]
+        self.feature_names = list(feature_names)
+        # Decoded raw values from training; serving only parses values not in here
+        self.decoders = DecoderSet.from_dict(lookups or {})
+
+        self._category_index = [{c: i for i, c in enumerate(cats)} for cats in self.categories]
+        self._offsets = len(self.numeric_features) + np.concatenate(
+            [[0], np.cumsum([len(c) for c in self.categories])]
+        )[:-1].astype(int)
+
+    @classmethod
+    def from_vectorizer(cls, vectorizer) -> 'CompiledLoanVectorizer':
+        if not vectorizer.is_fitted:
+            raise ValueError("Vectorizer not fitted! Call fit() or load() first.")
+
+        transformers = dict((name, (pipe, cols)) for name, pipe, cols in vectorizer.preprocessor.transformers_)
+        num_pipe, num_cols = transformers['num']
+        cat_pipe, cat_cols = transformers['cat']
+
+        medians = num_pipe.named_steps['imputer'].statistics_
+        # SimpleImputer drops numeric columns that had no observed values during fit
+        keep = ~np.isnan(medians)
+        scaler = num_pipe.named_steps['scaler']
+
+        return cls(
+            numeric_features=[c for c, k in zip(num_cols, keep) if k],
+            medians=medians[keep],
+            means=scaler.mean_,
+            scales=scaler.scale_,
+            categorical_features=list(cat_cols),
+            categories=[list(c) for c in cat_pipe.named_steps['onehot'].categories_],
+            feature_names=list(vectorizer.preprocessor.get_feature_names_out()),
+            lookups=vectorizer._decoders().to_dict()
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'numeric_features': self.numeric_features,
+            'medians': self.medians.tolist(),
+            'means': self.means.tolist(),
+            'scales': self.scales.tolist(),
+            'categorical_features': self.categorical_features,
+            'categories': self.categories,
+            'feature_names': self.feature_names,
+            'lookups': self.decoders.to_dict()
+        }
+
+    @classmethod
+    def from_dict(cls, state: Dict[str, Any]) -> 'CompiledLoanVectorizer':
+        return cls(**state)
+
+    def transform_records(self, records: Union[Dict[str, Any], List[Dict[str, Any]]],
+                          reference_date: Optional[Any] = None) -> np.ndarray:
+        if isinstance(records, dict):
+            records = [records]
+
+        columns = self._engineer(records, reference_date)
+        n_rows = len(records)
+        X = np.zeros((n_rows, len(self.feature_names)), dtype=np.float64)
+
+        for j, name in enumerate(self.numeric_features):
+            values = columns.get(name)
+            if values is None:
+                values = _to_float([r.get(name) for r in records])
+            X[:, j] = np.where(np.isnan(values), self.medians[j], values)
+        n_numeric = len(self.numeric_features)
+        X[:, :n_numeric] = (X[:, :n_numeric] - self.means) / self.scales
+
+        rows = np.arange(n_rows)
+        for j, name in enumerate(self.categorical_features):
+            index = self._category_index[j]
+            codes = np.array([index.get(_category_key(r.get(name, np.nan)), -1) for r in records])
+            known = codes >= 0
+            X[rows[known], self._offsets[j] + codes[known]] = 1.0
+
+        return X.astype(np.float32)
+
+    def transform_frame(self, df_eng) -> np.ndarray:
+        """Vectorize a DataFrame that already went through LoanVectorizer._engineer_features."""
+        n_rows = len(df_eng)
+        n_numeric = len(self.numeric_features)
+        X = np.zeros((n_rows, len(self.feature_names)), dtype=np.float32)
+
+        numeric = df_eng[self.numeric_features].to_numpy(dtype=np.float64)
+        numeric = np.where(np.isnan(numeric), self.medians, numeric)
+        X[:, :n_numeric] = (numeric - self.means) / self.scales
+
+        rows = np.arange(n_rows)
+        for j, name in enumerate(self.categorical_features):
+            index = self._category_index[j]
+            # Look up each distinct value once; missing rows are resolved one by
+            # one because None and NaN encode differently
+            values = df_eng[name].astype(object)
+            factor, uniques = pd.factorize(values, use_na_sentinel=True)
+            lookup = np.array([index.get(u, -1) for u in uniques] + [-1], dtype=np.int64)
+            codes = lookup[factor]
+            missing = np.flatnonzero(factor < 0)
+            codes[missing] = [index.get(_category_key(v), -1) for v in values.iloc[missing]]
+            known = codes >= 0
+            X[rows[known], self._offsets[j] + codes[known]] = 1.0
+
+        return X
+
+    def _engineer(self, records: List[Dict[str, Any]], reference_date: Optional[Any]) -> Dict[str, np.ndarray]:
+        def has(name):
+            return any(name in r for r in records)
+
+        def raw(name):
+            return [r.get(name) for r in records]
+
+        columns = {}
+
+        if has('term'):
+            columns['term_int'] = _to_float(self.decoders.term.lookup(raw('term')))
+
+        if has('emp_length'):
+            columns['emp_length_int'] = np.nan_to_num(_to_float([
+                EMP_LENGTH_MAP.get(v, 0) if isinstance(v, str) else v for v in raw('emp_length')
+            ]), nan=0.0)
+
+        if has('open_acc') and has('total_acc'):
+            open_acc = np.nan_to_num(_to_float(raw('open_acc')), nan=0.0)
+            total_acc = np.nan_to_num(_to_float(raw('total_acc')), nan=0.0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                columns['open_account_ratio'] = np.where(total_acc > 0, open_acc / total_acc, 0.0)
+
+        if any(has(c) for c in SEVERE_COLUMNS):
+            severe = np.zeros(len(records), dtype=bool)
+            for c in SEVERE_COLUMNS:
+                severe |= np.nan_to_num(_to_float(raw(c)), nan=0.0) > 0
+            columns['severe_credit_event'] = severe.astype(np.float64)
+
+        if has('inq_last_6mths') or has('earliest_cr_line'):
+            reference = pd.Timestamp(reference_date) if reference_date is not None else pd.to_datetime("today")
+            earliest = np.array(self.decoders.earliest_cr_line.lookup([
+                v if isinstance(v, str) else None for v in raw('earliest_cr_line')
+            ]), dtype='datetime64[ns]')
+
+            if has('Application Date'):
+                app_date = pd.to_datetime(pd.Series(raw('Application Date')), errors='coerce')
+                app_date = app_date.fillna(reference).to_numpy(dtype='datetime64[ns]')
+            else:
+                app_date = np.full(len(records), reference.to_datetime64(), dtype='datetime64[ns]')
+
+            valid = ~np.isnat(earliest)
+            days = np.full(len(records), np.nan)
+            days[valid] = (app_date[valid] - earliest[valid]) // np.timedelta64(1, 'D')
+            years = np.nan_to_num(days / 365.25, nan=1.0)
+            years[years <= 0] = 0.5
+
+            inquiries = np.nan_to_num(_to_float(raw('inq_last_6mths')), nan=0.0)
+            columns['inquiry_density'] = inquiries / years
+
+        return columns
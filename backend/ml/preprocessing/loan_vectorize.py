@@ -5,6 +5,7 @@ from sklearn.preprocessing import StandardScaler, OneHotEncoder
 from sklearn.impute import SimpleImputer
 from sklearn.compose import ColumnTransformer
 from sklearn.pipeline import Pipeline
+from ml.preprocessing.decoders import NAT, DecoderSet, factorize_decode, is_text, parse_date
 import os
 
 class LoanVectorizer:
@@ -34,28 +35,32 @@ class LoanVectorizer:
             verbose_feature_names_out=False
         )
         
+        # Distinct raw values seen so far, decoded once (see ml.preprocessing.decoders)
+        self.decoders = DecoderSet()
         self.is_fitted = False
 
-    def _engineer_features(self, df):
+    def _decoders(self):
+        # Vectorizers pickled before decoders existed get a fresh set
+        if getattr(self, 'decoders', None) is None:
+            self.decoders = DecoderSet()
+        return self.decoders
+
+    def _engineer_features(self, df, reference_date=None):
         """Internal method to clean and engineer features."""
         df_eng = df.copy()
+        decoders = self._decoders()
 
         # --- A. Text Cleaning ---
+        # String columns are decoded once per distinct value and scattered back
         # 1. Term cleaning (Handle ' 36 months' vs numeric)
-        if df_eng['term'].dtype == 'O':
-            df_eng['term_int'] = df_eng['term'].astype(str).str.replace(' months', '', regex=False)
+        if is_text(df_eng['term']):
+            df_eng['term_int'] = decoders.term.decode(df_eng['term'])
         else:
             df_eng['term_int'] = df_eng['term']
 
         # 2. Emp Length Mapping
-        emp_map = {
-            '< 1 year': 0, '1 year': 1, '2 years': 2, '3 years': 3, '4 years': 4,
-            '5 years': 5, '6 years': 6, '7 years': 7, '8 years': 8, '9 years': 9,
-            '10+ years': 10
-        }
-        # Force string conversion before mapping to handle mixed types
-        if df_eng['emp_length'].dtype == 'O':
-            df_eng['emp_length_int'] = df_eng['emp_length'].map(emp_map).fillna(0)
+        if is_text(df_eng['emp_length']):
+            df_eng['emp_length_int'] = decoders.emp_length.decode(df_eng['emp_length']).fillna(0)
         else:
             df_eng['emp_length_int'] = df_eng['emp_length'].fillna(0)
 
@@ -83,15 +88,17 @@ class LoanVectorizer:
 
         # 5. Inquiry Density
         # Date parsing
-        df_eng['earliest_cr_line_dt'] = pd.to_datetime(df_eng['earliest_cr_line'], format='%b-%Y', errors='coerce')
+        df_eng['earliest_cr_line_dt'] = decoders.earliest_cr_line.decode(df_eng['earliest_cr_line'])
         
+        # A fixed reference date makes the output reproducible across calls
+        reference = pd.Timestamp(reference_date) if reference_date is not None else pd.to_datetime("today")
         if 'Application Date' in df_eng.columns:
-             df_eng['app_date_dt'] = pd.to_datetime(df_eng['Application Date'], errors='coerce')
+             df_eng['app_date_dt'] = factorize_decode(df_eng['Application Date'], parse_date, na_value=NAT)
         else:
-             df_eng['app_date_dt'] = pd.to_datetime("today")
+             df_eng['app_date_dt'] = reference
 
         # Fallback for null dates
-        df_eng['app_date_dt'] = df_eng['app_date_dt'].fillna(pd.Timestamp.now())
+        df_eng['app_date_dt'] = df_eng['app_date_dt'].fillna(reference)
 
         # History Years
         df_eng['credit_history_years'] = (df_eng['app_date_dt'] - df_eng['earliest_cr_line_dt']).dt.days / 365.25
@@ -111,18 +118,26 @@ class LoanVectorizer:
 
         return df_eng
 
-    def fit(self, df):
+    def _engineer(self, df, reference_date=None, n_jobs=1):
+        """Runs _engineer_features, sharded across n_jobs processes when n_jobs != 1."""
+        if n_jobs == 1:
+            return self._engineer_features(df, reference_date)
+        from ml.preprocessing.parallel import engineer_parallel
+        return engineer_parallel(df, n_workers=None if n_jobs == -1 else n_jobs, reference_date=reference_date,
+                                 decoders=self._decoders())
+
+    def fit(self, df, reference_date=None, n_jobs=1):
         """Learns the scaling and encoding parameters from Training Data."""
         valid_statuses = ['Fully Paid', 'Charged Off', 'Default']
         df_clean = df[df['loan_status'].isin(valid_statuses)].copy()
         
-        df_eng = self._engineer_features(df_clean)
+        df_eng = self._engineer(df_clean, reference_date, n_jobs)
         
         self.preprocessor.fit(df_eng)
         self.is_fitted = True
         print("✅ Vectorizer fitted successfully.")
 
-    def transform(self, df):
+    def transform(self, df, reference_date=None, n_jobs=1):
         """Transforms data into vectors using the fitted parameters."""
         if not self.is_fitted:
             raise Exception("Vectorizer not fitted! Call fit() or load() first.")
@@ -138,13 +153,18 @@ class LoanVectorizer:
             df_clean = df.copy()
             Y = None
 
-        df_eng = self._engineer_features(df_clean)
+        df_eng = self._engineer(df_clean, reference_date, n_jobs)
         vectors = self.preprocessor.transform(df_eng)
         
         X_df = pd.DataFrame(vectors, columns=self.preprocessor.get_feature_names_out(), index=df_clean.index)
         
         return X_df, Y
 
+    def compile(self):
+        """Export the fitted state as a CompiledLoanVectorizer for fast online transforms."""
+        from ml.preprocessing.fast_vectorize import CompiledLoanVectorizer
+        return CompiledLoanVectorizer.from_vectorizer(self)
+
     def save(self, filepath=None):
         base_dir = os.path.dirname(os.path.abspath(__file__))
 
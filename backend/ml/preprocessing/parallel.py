@@ -0,0 +1,116 @@
+import os
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+from ml.preprocessing.loan_vectorize import LoanVectorizer
+from ml.preprocessing.fast_vectorize import SEVERE_COLUMNS
+from ml.preprocessing.decoders import DecoderSet
+
+logger = logging.getLogger(__name__)
+
+# Raw columns _engineer_features reads besides the numeric features
+ENGINEERING_INPUTS = [
+    'term', 'emp_length', 'open_acc', 'total_acc', 'pub_rec', 'pub_rec_bankruptcies',
+    'tax_liens', 'earliest_cr_line', 'Application Date', 'inq_last_6mths'
+]
+
+def _write_column(directory: Path, j: int, series: pd.Series) -> Dict[str, Any]:
+    # Object columns travel as fixed-width unicode plus a null mask so no
+    # worker ever unpickles a DataFrame; everything else is saved as is
+    if series.dtype.kind in 'biufmM':
+        np.save(directory / f"in_{j}.npy", series.to_numpy())
+        return {'name': series.name, 'kind': 'array'}
+
+    values = series.astype(object)
+    mask = values.isna().to_numpy()
+    np.save(directory / f"in_{j}.npy", values.where(~mask, '').to_numpy().astype(str))
+    np.save(directory / f"in_{j}_mask.npy", mask)
+    return {'name': series.name, 'kind': 'object', 'dtype': str(series.dtype)}
+
+def _read_column(directory: Path, j: int, spec: Dict[str, Any]) -> pd.Series:
+    values = np.load(directory / f"in_{j}.npy", mmap_mode='r')
+    if spec['kind'] == 'array':
+        return pd.Series(np.asarray(values), name=spec['name'])
+
+    values = values.astype(object)
+    values[np.load(directory / f"in_{j}_mask.npy")] = np.nan
+    series = pd.Series(values, name=spec['name'], dtype=object)
+    return series if spec['dtype'] == 'object' else series.astype(spec['dtype'])
+
+def _engineer_shard(shard_dir: str, specs: List[Dict[str, Any]], outputs: List[str],
+                    reference_date: str) -> Dict[str, Dict[Any, Any]]:
+    """Engineers one shard; returns the decoder tables it filled for the parent to merge."""
+    directory = Path(shard_dir)
+    df = pd.DataFrame({spec['name']: _read_column(directory, j, spec) for j, spec in enumerate(specs)})
+    vectorizer = LoanVectorizer()
+    df_eng = vectorizer._engineer_features(df, pd.Timestamp(reference_date))
+
+    for j, name in enumerate(outputs):
+        values = df_eng[name].to_numpy()
+        if values.dtype.kind not in 'biufmM':
+            raise TypeError(f"Engineered column {name} has non-numeric dtype {values.dtype}")
+        np.save(directory / f"out_{j}.npy", values)
+    return vectorizer.decoders.tables()
+
+def engineer_parallel(df: pd.DataFrame, n_workers: Optional[int] = None,
+                      reference_date: Optional[Any] = None, shard_rows: Optional[int] = None,
+                      workdir: Optional[str] = None, decoders: Optional[DecoderSet] = None) -> pd.DataFrame:
+    """
+    Row-sharded, multi-process equivalent of LoanVectorizer._engineer_features.
+
+    The frame is split into row shards whose input columns are written to
+    .npy files; each worker engineers its shard and writes the derived
+    columns back as .npy files, which are concatenated in shard order.
+    With the same reference_date the result is identical to the sequential
+    path. reference_date defaults to one "today" shared by all shards.
+
+    decoders (a vectorizer's DecoderSet) receives the decoder tables the
+    workers fill, so it ends up in the same state as after a sequential run.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    reference = pd.Timestamp(reference_date) if reference_date is not None else pd.to_datetime("today")
+    base = LoanVectorizer()
+    if decoders is not None:
+        base.decoders = decoders
+
+    # Engineering one row gives the output column order and which columns change
+    template = base._engineer_features(df.iloc[:1], reference)
+    outputs = [
+        c for c in template.columns
+        if c not in df.columns or c in base.numeric_features or c in SEVERE_COLUMNS
+    ]
+    inputs = [c for c in df.columns if c in ENGINEERING_INPUTS or c in base.numeric_features]
+
+    if n_workers == 1 or len(df) < 2:
+        return base._engineer_features(df, reference)
+
+    shard_rows = shard_rows or -(-len(df) // n_workers)
+    bounds = list(range(0, len(df), shard_rows)) + [len(df)]
+
+    with tempfile.TemporaryDirectory(dir=workdir, prefix='engineer_') as tmp:
+        jobs = []
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            for i, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+                shard_dir = Path(tmp) / f"shard_{i:05d}"
+                shard_dir.mkdir()
+                shard = df.iloc[start:end]
+                specs = [_write_column(shard_dir, j, shard[c]) for j, c in enumerate(inputs)]
+                jobs.append((shard_dir, pool.submit(
+                    _engineer_shard, str(shard_dir), specs, outputs, reference.isoformat()
+                )))
+
+            for _, job in jobs:
+                base.decoders.merge(job.result())
+
+        engineered = {
+            name: np.concatenate([np.load(shard_dir / f"out_{j}.npy") for shard_dir, _ in jobs])
+            for j, name in enumerate(outputs)
+        }
+
+    columns = {c: engineered[c] if c in engineered else df[c].array for c in template.columns}
+    logger.info(f"Engineered {len(df)} rows in {len(jobs)} shards across {n_workers} workers")
+    return pd.DataFrame(columns, index=df.index)
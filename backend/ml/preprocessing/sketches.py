@@ -0,0 +1,121 @@
+import numpy as np
+from typing import List, Optional
+
+class QuantileSketch:
+    """
+    Mergeable KLL-style quantile sketch. Level h holds items that each stand
+    for 2**h observations; a level that grows past k items is sorted and
+    every other item (random offset) is promoted to the next level. Exact
+    until the first compaction, so small inputs give the same answer as
+    np.quantile. NaNs are ignored.
+    """
+
+    def __init__(self, k: int = 2048, seed: Optional[int] = 0):
+        self.k = k
+        self.count = 0
+        self.levels: List[np.ndarray] = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: 'QuantileSketch') -> 'QuantileSketch':
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, items in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], items])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        h = 0
+        while h < len(self.levels):
+            items = self.levels[h]
+            if len(items) > self.k:
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                items = np.sort(items)
+                # An odd item out stays behind so total weight is preserved
+                carry = items[-1:] if len(items) % 2 else items[:0]
+                items = items[:len(items) - len(carry)]
+                offset = int(self._rng.integers(2))
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], items[offset::2]])
+                self.levels[h] = carry
+            h += 1
+
+    def _sorted_weights(self):
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(items), 2.0 ** h) for h, items in enumerate(self.levels)])
+        order = np.argsort(values, kind='stable')
+        return values[order], np.cumsum(weights[order])
+
+    @property
+    def exact(self) -> bool:
+        return len(self.levels) == 1
+
+    def quantile(self, q) -> np.ndarray:
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(q.shape, np.nan)
+        if self.exact:
+            return np.quantile(self.levels[0], q)
+
+        values, cumulative = self._sorted_weights()
+        idx = np.searchsorted(cumulative, q * cumulative[-1], side='left')
+        return values[np.clip(idx, 0, len(values) - 1)]
+
+    def median(self) -> float:
+        return float(self.quantile(0.5))
+
+    def cdf(self, x) -> np.ndarray:
+        """Fraction of observations <= x."""
+        x = np.asarray(x, dtype=np.float64)
+        if self.count == 0:
+            return np.full(x.shape, np.nan)
+        values, cumulative = self._sorted_weights()
+        idx = np.searchsorted(values, x, side='right')
+        return np.where(idx > 0, cumulative[np.maximum(idx - 1, 0)], 0.0) / cumulative[-1]
+
+class RunningMoments:
+    """Count, mean and sum of squared deviations, merged chunk by chunk (Chan et al.)."""
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        chunk_mean = float(values.mean())
+        self._combine(len(values), chunk_mean, float(((values - chunk_mean) ** 2).sum()))
+
+    def merge(self, other: 'RunningMoments') -> 'RunningMoments':
+        if other.count:
+            self._combine(other.count, other.mean, other.m2)
+        return self
+
+    def add_constant(self, value: float, count: int) -> None:
+        """Account for `count` copies of `value`, e.g. imputed missing entries."""
+        if count:
+            self._combine(count, float(value), 0.0)
+
+    def _combine(self, count: int, mean: float, m2: float) -> None:
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta ** 2 * self.count * count / total
+        self.count = total
+
+    @property
+    def variance(self) -> float:
+        return self.m2 / self.count if self.count else 0.0
@@ -0,0 +1,181 @@
+import json
+import logging
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+from ml.preprocessing.loan_vectorize import LoanVectorizer
+from ml.preprocessing.fast_vectorize import CompiledLoanVectorizer
+from ml.preprocessing.sketches import QuantileSketch, RunningMoments
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+VALID_STATUSES = ['Fully Paid', 'Charged Off', 'Default']
+TARGET_MAP = {'Fully Paid': 0, 'Charged Off': 1, 'Default': 1}
+
+# Compact dtypes for the raw export. term and emp_length stay object because
+# LoanVectorizer parses them as strings.
+RAW_DTYPES = {
+    'loan_amnt': 'float32', 'annual_inc': 'float32', 'open_acc': 'float32',
+    'total_acc': 'float32', 'mort_acc': 'float32', 'delinq_2yrs': 'float32',
+    'revol_bal': 'float32', 'tot_cur_bal': 'float32', 'avg_cur_bal': 'float32',
+    'acc_open_past_24mths': 'float32', 'pub_rec': 'float32',
+    'pub_rec_bankruptcies': 'float32', 'tax_liens': 'float32', 'inq_last_6mths': 'float32',
+    'term': 'object', 'emp_length': 'object', 'earliest_cr_line': 'object',
+    'Application Date': 'object', 'purpose': 'category',
+    'verification_status': 'category', 'home_ownership': 'category', 'loan_status': 'category'
+}
+
+MANIFEST_FILE = 'manifest.json'
+
+class StreamingLoanVectorizer:
+    """
+    Two-pass, out-of-core LoanVectorizer for CSVs that do not fit in memory.
+
+    Pass one reads the CSV in chunks and accumulates the fitting statistics:
+    a quantile sketch per numeric column for the imputer median, running
+    moments for the scaler, and the category sets. Pass two writes vectors
+    and labels to memory-mapped .npy files that training can open directly.
+    """
+
+    def __init__(self, chunksize: Optional[int] = None, sketch_size: int = 4096,
+                 reference_date: Optional[Any] = None):
+        self.chunksize = chunksize or settings.STREAM_CHUNK_SIZE
+        self.sketch_size = sketch_size
+        # Both passes must engineer inquiry_density against the same date
+        self.reference_date = pd.Timestamp(reference_date) if reference_date is not None else pd.Timestamp.now()
+        self.base = LoanVectorizer()
+        self.compiled = None
+        self.n_rows = 0
+
+    def _chunks(self, path: str) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+        columns = pd.read_csv(path, nrows=0).columns
+        dtypes = {c: t for c, t in RAW_DTYPES.items() if c in columns}
+
+        reader = pd.read_csv(path, usecols=list(dtypes), dtype=dtypes, chunksize=self.chunksize)
+        for chunk in reader:
+            chunk = chunk[chunk['loan_status'].isin(VALID_STATUSES)]
+            if chunk.empty:
+                continue
+            labels = chunk['loan_status'].astype(object).map(TARGET_MAP).to_numpy(dtype=np.int8)
+            yield self.base._engineer_features(chunk, self.reference_date), labels
+
+    def fit(self, path: str) -> CompiledLoanVectorizer:
+        numeric = self.base.numeric_features
+        categorical = self.base.categorical_features
+        sketches = {c: QuantileSketch(self.sketch_size) for c in numeric}
+        moments = {c: RunningMoments() for c in numeric}
+        missing = {c: 0 for c in numeric}
+        categories = {c: set() for c in categorical}
+
+        self.n_rows = 0
+        for df_eng, _ in self._chunks(path):
+            self.n_rows += len(df_eng)
+            for c in numeric:
+                values = df_eng[c].to_numpy(dtype=np.float64)
+                observed = values[~np.isnan(values)]
+                sketches[c].update(observed)
+                moments[c].update(observed)
+                missing[c] += len(values) - len(observed)
+            for c in categorical:
+                values = df_eng[c].astype(object)
+                categories[c].update(values.where(values.notna(), 'missing').unique())
+
+        if self.n_rows == 0:
+            raise ValueError(f"No rows with a valid loan_status in {path}")
+
+        # Like SimpleImputer, columns never observed are dropped
+        kept = [c for c in numeric if sketches[c].count > 0]
+        medians, means, scales = [], [], []
+        for c in kept:
+            median = sketches[c].median()
+            # The scaler sees imputed data, so missing entries count as the median
+            moments[c].add_constant(median, missing[c])
+            std = np.sqrt(moments[c].variance)
+            medians.append(median)
+            means.append(moments[c].mean)
+            scales.append(std if std > 0 else 1.0)
+
+        category_lists = [sorted(categories[c]) for c in categorical]
+        feature_names = kept + [
+            f"{c}_{value}" for c, values in zip(categorical, category_lists) for value in values
+        ]
+
+        self.compiled = CompiledLoanVectorizer(
+            numeric_features=kept,
+            medians=np.array(medians),
+            means=np.array(means),
+            scales=np.array(scales),
+            categorical_features=categorical,
+            categories=category_lists,
+            feature_names=feature_names
+        )
+        logger.info(f"Streaming vectorizer fitted on {self.n_rows} rows from {path}")
+        return self.compiled
+
+    def transform_to_npy(self, path: str, out_dir: str) -> Dict[str, Any]:
+        if self.compiled is None:
+            raise ValueError("Vectorizer not fitted! Call fit() first.")
+
+        from numpy.lib.format import open_memmap
+
+        out = Path(out_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        # Remove a stale manifest first; it is only written once the vectors are complete
+        (out / MANIFEST_FILE).unlink(missing_ok=True)
+
+        X = open_memmap(out / 'X.npy', mode='w+', dtype=np.float32,
+                        shape=(self.n_rows, len(self.compiled.feature_names)))
+        y = open_memmap(out / 'y.npy', mode='w+', dtype=np.int8, shape=(self.n_rows,))
+
+        start = 0
+        for df_eng, labels in self._chunks(path):
+            end = start + len(df_eng)
+            if end > self.n_rows:
+                raise ValueError(f"{path} changed between passes")
+            X[start:end] = self.compiled.transform_frame(df_eng)
+            y[start:end] = labels
+            start = end
+        if start != self.n_rows:
+            raise ValueError(f"{path} changed between passes")
+        X.flush()
+        y.flush()
+        del X, y
+
+        manifest = {
+            'source': str(path),
+            'n_rows': self.n_rows,
+            'feature_names': self.compiled.feature_names,
+            'reference_date': self.reference_date.isoformat(),
+            'vectorizer': self.compiled.to_dict()
+        }
+        with open(out / MANIFEST_FILE, 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"Wrote {self.n_rows} vectors to {out}")
+        return manifest
+
+    def fit_transform_to_npy(self, path: str, out_dir: str) -> Dict[str, Any]:
+        self.fit(path)
+        return self.transform_to_npy(path, out_dir)
+
+def is_vectorized_dataset(path: str) -> bool:
+    return (Path(path) / MANIFEST_FILE).is_file()
+
+def load_vectorized(path: str, mmap_mode: Optional[str] = 'r') -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+    """Open a dataset written by transform_to_npy: (X, y, manifest)."""
+    root = Path(path)
+    with open(root / MANIFEST_FILE) as f:
+        manifest = json.load(f)
+    X = np.load(root / 'X.npy', mmap_mode=mmap_mode)
+    y = np.load(root / 'y.npy', mmap_mode=mmap_mode)
+    return X, y, manifest
+
+if __name__ == '__main__':
+    import sys
+
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 3:
+        sys.exit("usage: python -m ml.preprocessing.streaming <input.csv> <output_dir>")
+    StreamingLoanVectorizer().fit_transform_to_npy(sys.argv[1], sys.argv[2])
@@ -1,4 +1,5 @@
 from pydantic import BaseModel
+from typing import Dict
 
 class HealthResponse(BaseModel):
     status: str
@@ -10,3 +11,4 @@ class ReadyResponse(BaseModel):
     model_loaded: bool
     storage_accessible: bool
     message: str
+    timings: Dict[str, float] = {}
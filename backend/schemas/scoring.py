@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 
 class LoanApplication(BaseModel):
     loan_amnt: float
@@ -24,15 +24,18 @@ class LoanApplication(BaseModel):
 class ScoringRequest(BaseModel):
     application: LoanApplication
     include_shap: bool = True
+    explanation_engine: Literal['template', 'llm', 'auto'] = 'auto'
 
 class BatchScoringRequest(BaseModel):
     applications: List[LoanApplication] = Field(..., max_items=1000)
     include_shap: bool = True
+    explanation_engine: Literal['template', 'llm', 'auto'] = 'auto'
 
 class FraudDetectionResult(BaseModel):
     is_fraud: bool
     fraud_score: float
     fraud_reason: Optional[str] = None
+    rule_z_scores: Optional[Dict[str, float]] = None
 
 class SHAPContributor(BaseModel):
     feature: str
@@ -49,8 +52,8 @@ class ScoringResponse(BaseModel):
     request_id: str
     application_id: Optional[str] = None
     fraud_detection: FraudDetectionResult
-    risk_score_raw: float
-    risk_score_smoothed: float
+    risk_score_raw: Optional[float] = None
+    risk_score_smoothed: Optional[float] = None
     decision: str
     reason_codes: List[str]
     shap_payload: Optional[SHAPPayload] = None
@@ -58,6 +61,8 @@ class ScoringResponse(BaseModel):
     model_version: str
     model_active: bool
     threshold: float
+    degraded_stages: List[str] = []
+    explanation_engine: Optional[str] = None
 
 class BatchScoringResponse(BaseModel):
     request_id: str
@@ -65,6 +70,17 @@ class BatchScoringResponse(BaseModel):
     processed_count: int
     failed_count: int
 
+class ExplanationCacheStats(BaseModel):
+    enabled: bool
+    entries: int = 0
+    max_entries: int = 0
+    hits: int = 0
+    spill_hits: int = 0
+    misses: int = 0
+    hit_rate: float = 0.0
+    invalidations: int = 0
+    spill_enabled: bool = False
+
 class TrainingConfig(BaseModel):
     data_path: str
     test_size: float = 0.2
@@ -72,6 +88,12 @@ class TrainingConfig(BaseModel):
     xgboost_params: Optional[Dict[str, Any]] = None
     lightgbm_params: Optional[Dict[str, Any]] = None
     logistic_params: Optional[Dict[str, Any]] = None
+    fraud_params: Optional[Dict[str, Any]] = None
+    search: Optional[Dict[str, Any]] = None
+    # Continue parent_version (default: the active version) on data_path alone
+    incremental: bool = False
+    parent_version: Optional[str] = None
+    incremental_rounds: Optional[int] = None
 
 class TrainingResponse(BaseModel):
     model_version: str
@@ -79,6 +101,21 @@ class TrainingResponse(BaseModel):
     metrics: Dict[str, float]
     artifact_path: str
 
+class TrainingStageTiming(BaseModel):
+    stage: str
+    seconds: float
+
+class TrainingJobStatus(BaseModel):
+    job_id: str
+    state: Literal['queued', 'running', 'succeeded', 'failed', 'cancelled']
+    stage: Optional[str] = None
+    progress: float
+    stages: List[TrainingStageTiming] = []
+    submitted_at: float
+    finished_at: Optional[float] = None
+    error: Optional[str] = None
+    result: Optional[TrainingResponse] = None
+
 class ModelVersion(BaseModel):
     version: str
     created_at: str
@@ -0,0 +1,232 @@
+import json
+import time
+import hashlib
+import logging
+import threading
+import numpy as np
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FILE = 'checkpoint.json'
+VECTORS_FILE = 'X.npy'
+
+def scroll_ids(client, collection: str, page_size: int = 10000,
+               max_points: Optional[int] = None) -> List[Any]:
+    """All point ids of a collection in scroll (id) order."""
+    ids = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection, limit=page_size, offset=offset,
+            with_vectors=False, with_payload=False
+        )
+        ids.extend(p.id for p in points)
+        if offset is None or not points or (max_points and len(ids) >= max_points):
+            return ids
+
+def ids_digest(ids: List[Any]) -> str:
+    """Order-sensitive digest of point ids; rows of an export follow this order."""
+    return hashlib.sha256(json.dumps([str(i) for i in ids]).encode()).hexdigest()
+
+def point_vector(point, vector_name: Optional[str] = None) -> List[float]:
+    """A point's vector; named-vector collections use vector_name or the first name."""
+    vector = point.vector
+    if isinstance(vector, dict):
+        vector = vector[vector_name] if vector_name else next(iter(vector.values()))
+    return vector
+
+class CollectionExporter:
+    """
+    Parallel, resumable export of a Qdrant collection's vectors to a
+    memory-mapped float32 .npy file.
+
+    A first ids-only scroll fixes the point count and splits the id order
+    into contiguous partitions, each owning a known slice of output rows.
+    Worker threads then scroll their partitions concurrently with large
+    pages and write vectors straight into their rows. Progress is
+    checkpointed so an interrupted export continues where it stopped; the
+    collection is assumed not to change while an export is in progress.
+    """
+
+    def __init__(self, client, collection: str, out_dir: str, n_workers: int = 4,
+                 page_size: int = 2000, id_page_size: int = 10000,
+                 vector_name: Optional[str] = None, checkpoint_seconds: float = 10.0):
+        self.client = client
+        self.collection = collection
+        self.out_dir = Path(out_dir)
+        self.n_workers = n_workers
+        self.page_size = page_size
+        self.id_page_size = id_page_size
+        self.vector_name = vector_name
+        self.checkpoint_seconds = checkpoint_seconds
+        self._lock = threading.Lock()
+        self._state = None
+        self._X = None
+        self._last_checkpoint = 0.0
+        self._started = 0.0
+        self._done_at_start = 0
+
+    def _vector(self, point) -> List[float]:
+        return point_vector(point, self.vector_name)
+
+    def _plan(self, max_points: Optional[int], ids: Optional[List[Any]] = None) -> Dict[str, Any]:
+        # Ids only: cheap compared to the vectors and gives exact row offsets
+        if ids is None:
+            ids = scroll_ids(self.client, self.collection, self.id_page_size, max_points)
+        if max_points:
+            ids = ids[:max_points]
+        if not ids:
+            raise ValueError(f"Collection {self.collection} returned no points")
+
+        probe, _ = self.client.scroll(
+            collection_name=self.collection, limit=1, offset=ids[0],
+            with_vectors=True, with_payload=False
+        )
+        dim = len(self._vector(probe[0]))
+
+        n_partitions = min(self.n_workers, len(ids))
+        bounds = np.linspace(0, len(ids), n_partitions + 1).astype(int)
+        partitions = [
+            {'start_id': ids[start], 'next_offset': ids[start], 'row_start': int(start),
+             'row_end': int(end), 'written': 0}
+            for start, end in zip(bounds[:-1], bounds[1:])
+        ]
+        return {'collection': self.collection, 'max_points': max_points, 'total': len(ids), 'dim': dim,
+                'ids_digest': ids_digest(ids), 'partitions': partitions, 'complete': False}
+
+    def _write_checkpoint(self) -> None:
+        # Rows must reach the file before the checkpoint claims them
+        self._X.flush()
+        path = self.out_dir / CHECKPOINT_FILE
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self._state, indent=2))
+        tmp.replace(path)
+
+    def _progress(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if not force and now - self._last_checkpoint < self.checkpoint_seconds:
+            return
+        self._last_checkpoint = now
+        self._write_checkpoint()
+
+        done = sum(p['written'] for p in self._state['partitions'])
+        elapsed = max(now - self._started, 1e-9)
+        rate = (done - self._done_at_start) / elapsed
+        mb_rate = rate * self._state['dim'] * 4 / 1e6
+        logger.info(
+            f"Exported {done}/{self._state['total']} vectors from {self.collection} "
+            f"({rate:.0f} points/s, {mb_rate:.1f} MB/s)"
+        )
+
+    def _export_partition(self, partition: Dict[str, Any]) -> None:
+        remaining = partition['row_end'] - partition['row_start'] - partition['written']
+        offset = partition['next_offset']
+
+        while remaining > 0:
+            points, next_offset = self.client.scroll(
+                collection_name=self.collection, limit=min(self.page_size, remaining), offset=offset,
+                with_vectors=True, with_payload=False
+            )
+            points = points[:remaining]
+            if not points:
+                raise RuntimeError(
+                    f"Partition starting at {partition['start_id']} ended early; "
+                    f"the collection changed during export"
+                )
+
+            block = np.asarray([self._vector(p) for p in points], dtype=np.float32)
+            row = partition['row_start'] + partition['written']
+            self._X[row:row + len(block)] = block
+            remaining -= len(block)
+
+            with self._lock:
+                partition['written'] += len(block)
+                partition['next_offset'] = next_offset
+                self._progress()
+
+            offset = next_offset
+            if offset is None:
+                break
+
+        if remaining > 0:
+            raise RuntimeError(f"Partition starting at {partition['start_id']} is short by {remaining} points")
+
+    def _resumable(self, state: Dict[str, Any], max_points: Optional[int],
+                   ids: Optional[List[Any]]) -> bool:
+        if state.get('complete'):
+            logger.info(f"Previous export of {self.collection} is complete; exporting again")
+            return False
+        if state.get('max_points') != max_points:
+            logger.info(
+                f"Checkpoint of {self.collection} was planned for max_points={state.get('max_points')}, "
+                f"not {max_points}; exporting again"
+            )
+            return False
+        if ids is not None and state.get('ids_digest') != ids_digest(ids[:max_points] if max_points else ids):
+            # Rows are laid out by the checkpoint's id order; resuming would misalign them
+            logger.info(f"{self.collection} changed since the checkpoint was planned; exporting again")
+            return False
+        return True
+
+    def export(self, max_points: Optional[int] = None, ids: Optional[List[Any]] = None,
+               reuse: bool = False) -> np.ndarray:
+        """
+        Export (or resume exporting) and return the vectors as a read-only
+        memmap. `ids` skips the ids-only scroll when the caller already has
+        the collection's ids in scroll order.
+
+        An unfinished checkpoint planned with the same max_points (and,
+        when ids are given, the same ids in the same order) is resumed. A
+        completed export is redone unless reuse is True and it was planned
+        with the same max_points, in which case it is returned as is
+        without checking the collection for changes.
+        """
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        checkpoint = self.out_dir / CHECKPOINT_FILE
+        vectors = self.out_dir / VECTORS_FILE
+
+        state = None
+        if checkpoint.exists() and vectors.exists():
+            state = json.loads(checkpoint.read_text())
+            if state['collection'] != self.collection:
+                raise ValueError(f"{self.out_dir} holds an export of {state['collection']}")
+            if reuse and state.get('complete') and state.get('max_points') == max_points:
+                logger.info(f"Reusing completed export of {self.collection} in {self.out_dir}")
+                return np.load(vectors, mmap_mode='r')
+
+        if state is not None and self._resumable(state, max_points, ids):
+            self._state = state
+            self._X = np.load(vectors, mmap_mode='r+')
+            logger.info(f"Resuming export of {self.collection} from {checkpoint}")
+        else:
+            self._state = self._plan(max_points, ids)
+            # A fresh file rather than truncating one a reader may still have mapped
+            vectors.unlink(missing_ok=True)
+            self._X = np.lib.format.open_memmap(
+                vectors, mode='w+', dtype=np.float32, shape=(self._state['total'], self._state['dim'])
+            )
+            self._write_checkpoint()
+
+        pending = [
+            p for p in self._state['partitions']
+            if p['written'] < p['row_end'] - p['row_start']
+        ]
+        self._started = time.perf_counter()
+        self._done_at_start = sum(p['written'] for p in self._state['partitions'])
+
+        with ThreadPoolExecutor(max_workers=max(len(pending), 1)) as pool:
+            jobs = [pool.submit(self._export_partition, p) for p in pending]
+
+        # Checkpoint whatever finished before surfacing a failed partition
+        self._progress(force=True)
+        for job in jobs:
+            job.result()
+
+        self._state['complete'] = True
+        self._write_checkpoint()
+        del self._X
+        self._X = None
+        return np.load(vectors, mmap_mode='r')
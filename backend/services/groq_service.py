@@ -1,8 +1,7 @@
+import time
 import logging
-import asyncio
 import hashlib
 from typing import Dict, List, Any, Optional
-from groq import Groq
 from core.config import settings
 from utils.cache import get_cache
 
@@ -11,6 +10,8 @@ logger = logging.getLogger(__name__)
 class GroqService:
     
     def __init__(self):
+        from groq import Groq
+        
         self.client = Groq(api_key=settings.GROQ_API_KEY)
         self.model = settings.GROQ_MODEL
         self.cache = get_cache() if settings.REDIS_ENABLED else None
@@ -19,8 +20,15 @@ class GroqService:
                            shap_payload: Dict[str, Any],
                            risk_score_smoothed: float,
                            fraud_detected: bool,
-                           decision: str) -> str:
-        
+                           decision: str,
+                           time_budget: Optional[float] = None,
+                           fallback: bool = True) -> str:
+        """
+        Banker explanation from the LLM. If the call fails, returns
+        _fallback_explanation, or re-raises when fallback is False so the
+        caller can substitute its own explanation and report the failure.
+        """
+
         cache_key = self._get_cache_key(shap_payload, risk_score_smoothed, fraud_detected)
         
         if self.cache:
@@ -34,7 +42,8 @@ class GroqService:
                 shap_payload, 
                 risk_score_smoothed, 
                 fraud_detected, 
-                decision
+                decision,
+                time_budget=time_budget
             )
             
             if self.cache:
@@ -43,6 +52,8 @@ class GroqService:
             return explanation
         except Exception as e:
             logger.error(f"Groq API call failed: {e}")
+            if not fallback:
+                raise
             return self._fallback_explanation(shap_payload, risk_score_smoothed, fraud_detected, decision)
     
     def _call_groq(self, 
@@ -50,11 +61,18 @@ class GroqService:
                    risk_score_smoothed: float,
                    fraud_detected: bool,
                    decision: str,
-                   max_retries: int = 3) -> str:
+                   max_retries: int = 3,
+                   time_budget: Optional[float] = None) -> str:
         
         prompt = self._build_prompt(shap_payload, risk_score_smoothed, fraud_detected, decision)
+        expires_at = time.monotonic() + time_budget if time_budget is not None else None
         
         for attempt in range(max_retries):
+            timeout = settings.REQUEST_TIMEOUT_SECONDS
+            if expires_at is not None:
+                timeout = min(timeout, expires_at - time.monotonic())
+                if timeout <= 0:
+                    raise TimeoutError("Explanation time budget exhausted")
             try:
                 message = self.client.chat.completions.create(
                     model=self.model,
@@ -70,14 +88,16 @@ class GroqService:
                     ],
                     temperature=0.3,
                     max_tokens=200,
-                    timeout=settings.REQUEST_TIMEOUT_SECONDS
+                    timeout=timeout
                 )
                 
                 return message.choices[0].message.content.strip()
             except Exception as e:
                 logger.warning(f"Groq attempt {attempt + 1} failed: {e}")
-                if attempt < max_retries - 1:
-                    asyncio.sleep(2 ** attempt)
+                backoff = 2 ** attempt
+                out_of_budget = expires_at is not None and time.monotonic() + backoff >= expires_at
+                if attempt < max_retries - 1 and not out_of_budget:
+                    time.sleep(backoff)
                 else:
                     raise
     
@@ -111,10 +131,10 @@ Provide a brief, professional explanation suitable for review by a loan officer.
         return prompt
     
     def _fallback_explanation(self,
-                            shap_payload: Dict[str, Any],
-                            risk_score_smoothed: float,
-                            fraud_detected: bool,
-                            decision: str) -> str:
+                              shap_payload: Dict[str, Any],
+                              risk_score_smoothed: float,
+                              fraud_detected: bool,
+                              decision: str) -> str:
         
         factors = []
         for contrib in shap_payload.get('top_positive_contributors', [])[:2]:
@@ -1,19 +1,21 @@
 import os
+import uuid
 import base64
 from typing import Any, Dict, Optional
-import qdrant_client
-from qdrant_client import QdrantClient
-from qdrant_client.http.models import PointStruct, Filter, FieldCondition, MatchValue
 from core.config import settings
 
 class QdrantService:
     def __init__(self):
+        from qdrant_client import QdrantClient
+        
         self.client = QdrantClient(
             url=os.getenv("QDRANT_URL", settings.QDRANT_URL),
             api_key=os.getenv("QDRANT_API_KEY", settings.QDRANT_API_KEY)
         )
 
     def upsert_model_artifact(self, version: str, model_type: str, binary: bytes, metadata: Dict[str, Any]):
+        from qdrant_client.http.models import PointStruct
+        
         collection = "model_artifacts"
         payload = metadata.copy()
         payload["version"] = version
@@ -22,13 +24,15 @@ class QdrantService:
         self.client.upsert(
             collection_name=collection,
             points=[PointStruct(
-                id=f"{version}_{model_type}",
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, f"{version}_{model_type}")),
                 vector=[0.0],
                 payload=payload
             )]
         )
 
     def get_model_artifact(self, version: str, model_type: str) -> Optional[Dict[str, Any]]:
+        from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+        
         collection = "model_artifacts"
         result = self.client.scroll(
             collection_name=collection,
@@ -47,19 +51,23 @@ class QdrantService:
         return None
 
     def upsert_metadata(self, version: str, metadata: Dict[str, Any]):
+        from qdrant_client.http.models import PointStruct
+        
         collection = "model_metadata"
         payload = metadata.copy()
         payload["version"] = version
         self.client.upsert(
             collection_name=collection,
             points=[PointStruct(
-                id=version,
+                id=str(uuid.uuid5(uuid.NAMESPACE_URL, version)),
                 vector=[0.0],
                 payload=payload
             )]
         )
 
     def get_metadata(self, version: str) -> Optional[Dict[str, Any]]:
+        from qdrant_client.http.models import Filter, FieldCondition, MatchValue
+        
         collection = "model_metadata"
         result = self.client.scroll(
             collection_name=collection,
@@ -0,0 +1,155 @@
+import re
+import logging
+from typing import Dict, List, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_VERSION = "v2"
+
+# Phrase templates per version. Bump TEMPLATE_VERSION instead of editing a
+# released version so stored explanations stay reproducible.
+TEMPLATES = {
+    "v1": {
+        "decision": {
+            "APPROVE": "The application is recommended for approval.",
+            "DECLINE": "The application is recommended for decline.",
+            "REVIEW": "The application is referred for manual review."
+        },
+        "risk": "The estimated default risk is {risk:.1%} ({band} risk).",
+        "precedent": "Comparable past applications defaulted at an average rate of {smoothed:.1%}, against a model estimate of {raw:.1%} for this application alone.",
+        "precedent_agree": "Comparable past applications support this estimate.",
+        "drivers": "Risk is mainly increased by {factors}.",
+        "mitigants": "It is reduced by {factors}.",
+        "no_factors": "No individual factor stands out in the model's assessment.",
+        "fraud": "Fraud screening flagged this application; verify the applicant's documents before proceeding.",
+        "fraud_review": "The application was referred for manual review by fraud screening (score {score:.0f}/100) before any credit assessment.",
+        "reasons": "Reason codes: {codes}.",
+        "closing": "Review recommended before final approval."
+    }
+}
+
+# v2: the closing line depends on the decision; declines get none
+TEMPLATES["v2"] = dict(TEMPLATES["v1"], closing={
+    "APPROVE": "Review recommended before final approval.",
+    "REVIEW": "Review recommended before a final decision."
+})
+
+# (wording when the feature raises risk, wording when it lowers risk). The
+# parenthesised value is only rendered from the raw application field, never
+# from the standardized model input; without one it is left out.
+FEATURE_PHRASES = {
+    "loan_amnt": ("the requested loan amount ({value:,.0f})", "the modest loan amount ({value:,.0f})"),
+    "annual_inc": ("the applicant's income level ({value:,.0f})", "the applicant's income ({value:,.0f})"),
+    "open_acc": ("the number of open credit lines ({value:.0f})", "the number of open credit lines ({value:.0f})"),
+    "total_acc": ("the total number of credit accounts ({value:.0f})", "an established credit file ({value:.0f} accounts)"),
+    "mort_acc": ("the number of mortgage accounts ({value:.0f})", "existing mortgage accounts ({value:.0f})"),
+    "delinq_2yrs": ("delinquencies in the last two years ({value:.0f})", "a clean recent delinquency record"),
+    "revol_bal": ("the revolving balance ({value:,.0f})", "a low revolving balance ({value:,.0f})"),
+    "tot_cur_bal": ("the total current balance ({value:,.0f})", "the total current balance ({value:,.0f})"),
+    "avg_cur_bal": ("the average account balance ({value:,.0f})", "a healthy average account balance ({value:,.0f})"),
+    "acc_open_past_24mths": ("accounts opened in the past 24 months ({value:.0f})", "few recently opened accounts ({value:.0f})"),
+    "term_int": ("the loan term ({value:.0f} months)", "the loan term ({value:.0f} months)"),
+    "emp_length_int": ("the employment length ({value:.0f} years)", "stable employment ({value:.0f} years)"),
+    "open_account_ratio": ("the share of accounts still open ({value:.0%})", "the share of accounts still open ({value:.0%})"),
+    "severe_credit_event": ("a past severe credit event", "no severe credit events"),
+    "inquiry_density": ("the rate of recent credit inquiries ({value:.2f} per year)", "a low rate of credit inquiries ({value:.2f} per year)"),
+    "purpose": ("the loan purpose", "the loan purpose"),
+    "verification_status": ("the income verification status", "the income verification status"),
+    "home_ownership": ("the home ownership status", "the home ownership status")
+}
+
+VALUE_PATTERN = re.compile(r"\s*\([^()]*\{value[^()]*\)")
+
+class TemplateExplanationService:
+    """
+    Deterministic banker explanations rendered from SHAP contributors,
+    neighbour precedent and reason codes. Used for batch and offline
+    scoring where LLM prose per row is not needed.
+    """
+
+    def __init__(self, version: str = TEMPLATE_VERSION):
+        if version not in TEMPLATES:
+            raise ValueError(f"Unknown explanation template version {version}")
+        self.version = version
+        self.templates = TEMPLATES[version]
+
+    def generate_explanation(self,
+                             shap_payload: Dict[str, Any],
+                             risk_score_smoothed: float,
+                             fraud_detected: bool,
+                             decision: str,
+                             risk_score_raw: Optional[float] = None,
+                             reason_codes: Optional[List[str]] = None,
+                             raw_values: Optional[Dict[str, Any]] = None) -> str:
+        """
+        raw_values maps feature names to the application's own values; SHAP
+        payload feature_value entries are scaled model inputs and are not
+        quoted.
+        """
+        t = self.templates
+        raw_values = raw_values or {}
+        parts = [
+            t["decision"].get(decision, f"Decision: {decision}."),
+            t["risk"].format(risk=risk_score_smoothed, band=self._risk_band(risk_score_smoothed))
+        ]
+
+        if risk_score_raw is not None:
+            if abs(risk_score_smoothed - risk_score_raw) >= 0.05:
+                parts.append(t["precedent"].format(smoothed=risk_score_smoothed, raw=risk_score_raw))
+            else:
+                parts.append(t["precedent_agree"])
+
+        drivers = self._describe(shap_payload.get('top_positive_contributors', [])[:3], raw_values, increases=True)
+        mitigants = self._describe(shap_payload.get('top_negative_contributors', [])[:2], raw_values, increases=False)
+        if drivers:
+            parts.append(t["drivers"].format(factors=drivers))
+        if mitigants:
+            parts.append(t["mitigants"].format(factors=mitigants))
+        if not drivers and not mitigants:
+            parts.append(t["no_factors"])
+
+        if fraud_detected:
+            parts.append(t["fraud"])
+        if reason_codes:
+            parts.append(t["reasons"].format(codes=", ".join(reason_codes)))
+        closing = t["closing"]
+        if isinstance(closing, dict):
+            closing = closing.get(decision)
+        if closing:
+            parts.append(closing)
+
+        return " ".join(parts)
+
+    def generate_fraud_explanation(self, fraud_score: float,
+                                   reason_codes: Optional[List[str]] = None) -> str:
+        """Explanation for applications stopped at fraud screening, with no credit scores."""
+        t = self.templates
+        parts = [t["fraud_review"].format(score=fraud_score), t["fraud"]]
+        if reason_codes:
+            parts.append(t["reasons"].format(codes=", ".join(reason_codes)))
+        return " ".join(parts)
+
+    def _describe(self, contributors: List[Dict[str, Any]], raw_values: Dict[str, Any], increases: bool) -> str:
+        phrases = [self._phrase(c['feature'], raw_values.get(c['feature']), increases) for c in contributors]
+        if len(phrases) <= 1:
+            return "".join(phrases)
+        return ", ".join(phrases[:-1]) + " and " + phrases[-1]
+
+    @staticmethod
+    def _phrase(feature: str, value: Any, increases: bool) -> str:
+        wording = FEATURE_PHRASES.get(feature)
+        if wording is None:
+            return feature.replace('_', ' ')
+        wording = wording[0 if increases else 1]
+        try:
+            return wording.format(value=float(value))
+        except (TypeError, ValueError):
+            return VALUE_PATTERN.sub('', wording)
+
+    @staticmethod
+    def _risk_band(score: float) -> str:
+        if score > 0.7:
+            return "high"
+        if score > 0.5:
+            return "medium"
+        return "low"
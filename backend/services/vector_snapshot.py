@@ -0,0 +1,271 @@
+import json
+import time
+import shutil
+import hashlib
+import logging
+import numpy as np
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from services.collection_export import CollectionExporter, VECTORS_FILE, point_vector, scroll_ids
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+SNAPSHOT_FILE = 'snapshot.json'
+IDS_FILE = 'ids.json'
+PAYLOAD_FILE = 'payload.json'
+
+def ids_fingerprint(ids: List[Any]) -> str:
+    # Order-free: a delta-pulled snapshot keeps rows in a different order than scroll
+    return hashlib.sha256(json.dumps(sorted(str(i) for i in ids)).encode()).hexdigest()
+
+def content_fingerprint(ids: List[Any], X: np.ndarray, chunk_rows: int = 65536) -> str:
+    digest = hashlib.sha256(json.dumps(ids).encode())
+    for start in range(0, len(X), chunk_rows):
+        digest.update(np.ascontiguousarray(X[start:start + chunk_rows]).tobytes())
+    return digest.hexdigest()
+
+class VectorSnapshot:
+    """
+    Local, versioned snapshot of a Qdrant collection: vectors in a
+    memory-mapped float32 X.npy, point ids in row order, and payload fields
+    as columns. Each version is tagged with its point count and fingerprints
+    of the ids and of the content.
+
+    sync() builds the first version with CollectionExporter and afterwards
+    pulls only the delta: points added since the snapshot are retrieved and
+    appended, deleted points are dropped. Points whose vector changes under
+    an existing id are not detected; refresh them with sync(full=True).
+
+    With max_points the snapshot holds only the first max_points points in
+    scroll order, and the delta is taken against that prefix of the
+    collection. A snapshot built with a different cap is rebuilt.
+
+    Readers only need the directory, so offline jobs can use
+    VectorSnapshot(None, collection, root).load() without network access.
+    """
+
+    def __init__(self, client, collection: str, root: str, payload_fields: Optional[List[str]] = None,
+                 with_payload: bool = True, n_workers: int = 4, page_size: int = 2000,
+                 keep_versions: int = 2, max_points: Optional[int] = None):
+        self.client = client
+        self.collection = collection
+        self.root = Path(root) / collection
+        self.payload_fields = payload_fields
+        self.with_payload = with_payload
+        self.n_workers = n_workers
+        self.page_size = page_size
+        self.keep_versions = keep_versions
+        self.max_points = max_points
+        self.info = None
+        self.vectors = None
+        self.ids = None
+        self.payload = None
+
+    def _manifest(self) -> Optional[Dict[str, Any]]:
+        path = self.root / MANIFEST_FILE
+        return json.loads(path.read_text()) if path.exists() else None
+
+    def _payload_selector(self):
+        if not self.with_payload:
+            return False
+        return self.payload_fields or True
+
+    def _columns(self, payloads: List[Optional[Dict[str, Any]]]) -> Dict[str, List[Any]]:
+        if not self.with_payload:
+            return {}
+        fields = self.payload_fields
+        if fields is None:
+            fields = sorted({k for p in payloads if p for k in p})
+        return {f: [(p or {}).get(f) for p in payloads] for f in fields}
+
+    def _live_ids(self) -> List[Any]:
+        ids = scroll_ids(self.client, self.collection, max_points=self.max_points)
+        return ids[:self.max_points] if self.max_points else ids
+
+    def exists(self) -> bool:
+        return self._manifest() is not None
+
+    def load(self) -> 'VectorSnapshot':
+        """Open the current version: vectors as a read-only memmap, ids and payload columns in memory."""
+        manifest = self._manifest()
+        if manifest is None:
+            raise FileNotFoundError(f"No snapshot of {self.collection} under {self.root}")
+
+        directory = self.root / manifest['current']
+        self.info = json.loads((directory / SNAPSHOT_FILE).read_text())
+        self.vectors = np.load(directory / VECTORS_FILE, mmap_mode='r')
+        self.ids = json.loads((directory / IDS_FILE).read_text())
+        payload_path = directory / PAYLOAD_FILE
+        self.payload = json.loads(payload_path.read_text()) if payload_path.exists() else {}
+        return self
+
+    def is_stale(self, thorough: bool = False) -> bool:
+        """
+        Compare the snapshot with the live collection. The quick check only
+        compares point counts; thorough also compares the id fingerprint,
+        which catches deletes balanced by inserts (and, with max_points,
+        any change inside the capped prefix).
+        """
+        if self.info is None:
+            if not self.exists():
+                return True
+            self.load()
+
+        if self.info.get('max_points') != self.max_points:
+            return True
+        count = self.client.count(collection_name=self.collection, exact=True).count
+        if self.max_points:
+            count = min(count, self.max_points)
+        if count != self.info['points']:
+            return True
+        if thorough:
+            return ids_fingerprint(self._live_ids()) != self.info['ids_fingerprint']
+        return False
+
+    def sync(self, full: bool = False) -> bool:
+        """Bring the snapshot up to date; returns True when a new version was written."""
+        started = time.perf_counter()
+        if not full and self.exists():
+            self.load()
+            if self.info.get('max_points') != self.max_points:
+                logger.info(
+                    f"Snapshot {self.info['version']} of {self.collection} holds max_points="
+                    f"{self.info.get('max_points')}, not {self.max_points}; rebuilding"
+                )
+                full = True
+
+        if full or not self.exists():
+            self._build_full()
+        else:
+            if not self._pull_delta():
+                logger.info(f"Snapshot {self.info['version']} of {self.collection} is up to date")
+                return False
+
+        self.load()
+        logger.info(
+            f"Snapshot {self.info['version']} of {self.collection}: {self.info['points']} points "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        return True
+
+    def _next_version(self) -> str:
+        manifest = self._manifest()
+        number = manifest['latest'] + 1 if manifest else 1
+        return f"v{number:06d}"
+
+    def _build_full(self) -> None:
+        version = self._next_version()
+        directory = self.root / version
+
+        # One ids + payload scroll; its id order is also the exporter's row order
+        ids, payloads = [], []
+        offset = None
+        while True:
+            points, offset = self.client.scroll(
+                collection_name=self.collection, limit=10000, offset=offset,
+                with_vectors=False, with_payload=self._payload_selector()
+            )
+            ids.extend(p.id for p in points)
+            payloads.extend(p.payload for p in points)
+            if offset is None or not points or (self.max_points and len(ids) >= self.max_points):
+                break
+        if self.max_points:
+            ids, payloads = ids[:self.max_points], payloads[:self.max_points]
+
+        # A partial directory from an interrupted build resumes from its
+        # checkpoint, provided the ids just scrolled still match its plan
+        exporter = CollectionExporter(
+            self.client, self.collection, str(directory),
+            n_workers=self.n_workers, page_size=self.page_size
+        )
+        X = exporter.export(max_points=self.max_points, ids=ids)
+        self._publish(version, directory, ids, X, self._columns(payloads), parent=None)
+
+    def _pull_delta(self) -> bool:
+        current = self._live_ids()
+        if ids_fingerprint(current) == self.info['ids_fingerprint']:
+            return False
+
+        live = set(current)
+        known = set(self.ids)
+        keep = np.array([i for i, point_id in enumerate(self.ids) if point_id in live], dtype=np.int64)
+        added = [point_id for point_id in current if point_id not in known]
+        if not added and len(keep) == len(self.ids):
+            return False
+
+        version = self._next_version()
+        directory = self.root / version
+        directory.mkdir(parents=True, exist_ok=True)
+
+        X = np.lib.format.open_memmap(
+            directory / VECTORS_FILE, mode='w+', dtype=np.float32,
+            shape=(len(keep) + len(added), self.info['dim'])
+        )
+        chunk = 65536
+        for start in range(0, len(keep), chunk):
+            rows = keep[start:start + chunk]
+            X[start:start + len(rows)] = self.vectors[rows]
+
+        ids = [self.ids[i] for i in keep]
+        payloads = {f: [values[i] for i in keep] for f, values in self.payload.items()}
+        new_payloads = []
+        for start in range(0, len(added), self.page_size):
+            points = self.client.retrieve(
+                collection_name=self.collection, ids=added[start:start + self.page_size],
+                with_vectors=True, with_payload=self._payload_selector()
+            )
+            row = len(ids)
+            X[row:row + len(points)] = np.asarray([point_vector(p) for p in points], dtype=np.float32)
+            ids.extend(p.id for p in points)
+            new_payloads.extend(p.payload for p in points)
+        X.flush()
+        if len(ids) != len(X):
+            del X
+            shutil.rmtree(directory, ignore_errors=True)
+            raise RuntimeError(f"{self.collection} changed during the delta pull; sync again")
+
+        new_columns = self._columns(new_payloads)
+        for f in set(payloads) | set(new_columns):
+            payloads[f] = payloads.get(f, [None] * len(keep)) + new_columns.get(f, [None] * len(new_payloads))
+
+        logger.info(
+            f"Pulled delta for {self.collection}: {len(added)} added, "
+            f"{len(self.ids) - len(keep)} removed"
+        )
+        self._publish(version, directory, ids, X, payloads, parent=self.info['version'])
+        return True
+
+    def _publish(self, version: str, directory: Path, ids: List[Any], X: np.ndarray,
+                 payload: Dict[str, List[Any]], parent: Optional[str]) -> None:
+        if len(ids) != len(X):
+            raise RuntimeError(f"Snapshot {version} of {self.collection} has {len(X)} vectors for {len(ids)} ids")
+        (directory / IDS_FILE).write_text(json.dumps(ids))
+        if payload:
+            (directory / PAYLOAD_FILE).write_text(json.dumps(payload))
+        info = {
+            'collection': self.collection,
+            'version': version,
+            'parent': parent,
+            'points': len(ids),
+            'max_points': self.max_points,
+            'dim': int(X.shape[1]),
+            'ids_fingerprint': ids_fingerprint(ids),
+            'fingerprint': content_fingerprint(ids, X),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+        }
+        (directory / SNAPSHOT_FILE).write_text(json.dumps(info, indent=2))
+
+        # Switching the manifest is what makes the version visible to readers
+        number = int(version[1:])
+        manifest_path = self.root / MANIFEST_FILE
+        tmp = manifest_path.with_suffix('.tmp')
+        tmp.write_text(json.dumps({'current': version, 'latest': number}))
+        tmp.replace(manifest_path)
+        self._prune(number)
+
+    def _prune(self, latest: int) -> None:
+        for directory in self.root.glob('v*'):
+            if directory.is_dir() and int(directory.name[1:]) <= latest - self.keep_versions:
+                # Open memmaps in other processes stay valid after unlink
+                shutil.rmtree(directory, ignore_errors=True)
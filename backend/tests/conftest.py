@@ -0,0 +1,50 @@
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+from pathlib import Path
+
+# Modules import from the backend root (core, ml, services, ...)
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+PURPOSES = ['debt_consolidation', 'credit_card', 'home_improvement', 'car']
+VERIFICATION = ['Verified', 'Source Verified', 'Not Verified']
+OWNERSHIP = ['RENT', 'MORTGAGE', 'OWN']
+EMP_LENGTHS = {'< 1 year': 0.0, '1 year': 1.0, '3 years': 3.0, '10+ years': 10.0}
+
+def _loans(n_rows, seed, text=True):
+    """Synthetic raw LendingClub-style loans with missing values sprinkled in."""
+    rng = np.random.default_rng(seed)
+    terms = rng.choice([36, 60], n_rows)
+    emp = rng.choice(list(EMP_LENGTHS), n_rows)
+    df = pd.DataFrame({
+        'loan_amnt': rng.uniform(1000, 40000, n_rows).round(),
+        'annual_inc': rng.lognormal(11, 0.5, n_rows).round(),
+        'open_acc': rng.integers(0, 30, n_rows).astype(float),
+        'total_acc': rng.integers(0, 60, n_rows).astype(float),
+        'mort_acc': rng.integers(0, 5, n_rows).astype(float),
+        'delinq_2yrs': rng.integers(0, 3, n_rows).astype(float),
+        'revol_bal': rng.uniform(0, 50000, n_rows).round(),
+        'tot_cur_bal': rng.uniform(0, 300000, n_rows).round(),
+        'avg_cur_bal': rng.uniform(0, 30000, n_rows).round(),
+        'acc_open_past_24mths': rng.integers(0, 10, n_rows).astype(float),
+        'term': [f" {t} months" for t in terms] if text else terms.astype(float),
+        'emp_length': emp if text else [EMP_LENGTHS[e] for e in emp],
+        'pub_rec': rng.integers(0, 2, n_rows).astype(float),
+        'pub_rec_bankruptcies': rng.integers(0, 2, n_rows).astype(float),
+        'tax_liens': np.zeros(n_rows),
+        'inq_last_6mths': rng.integers(0, 6, n_rows).astype(float),
+        'earliest_cr_line': rng.choice(['Jan-2001', 'Mar-2010', 'Oct-2018', 'Jul-1995'], n_rows),
+        'purpose': rng.choice(PURPOSES, n_rows),
+        'verification_status': rng.choice(VERIFICATION, n_rows),
+        'home_ownership': rng.choice(OWNERSHIP, n_rows)
+    })
+    # Sprinkle missing values over numeric, text and categorical inputs
+    for column in ['annual_inc', 'mort_acc', 'revol_bal', 'open_acc', 'inq_last_6mths',
+                   'emp_length', 'earliest_cr_line', 'purpose', 'home_ownership']:
+        df.loc[rng.random(n_rows) < 0.1, column] = np.nan
+    return df
+
+@pytest.fixture(scope='session')
+def make_loans():
+    return _loans
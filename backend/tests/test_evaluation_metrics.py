@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+from sklearn.metrics import auc, precision_recall_curve, roc_auc_score
+from ml.evaluation.metrics import EvaluationEngine
+
+def test_metrics_match_sklearn():
+    rng = np.random.default_rng(0)
+    y = rng.integers(0, 2, 2000)
+    # Rounded scores give plenty of ties
+    scores = np.round(np.clip(0.3 * y + rng.normal(0.4, 0.2, len(y)), 0, 1), 2)
+
+    metrics = EvaluationEngine(n_bootstrap=0).metrics(y, scores)
+    precision, recall, _ = precision_recall_curve(y, scores)
+
+    assert metrics['auc'] == pytest.approx(roc_auc_score(y, scores), abs=1e-12)
+    assert metrics['pr_auc'] == pytest.approx(auc(recall, precision), abs=1e-12)
+    assert metrics['true_positives'] == int(((scores >= 0.5) & (y == 1)).sum())
+
+@pytest.mark.parametrize('y, scores', [
+    (np.zeros(10, dtype=int), np.linspace(0, 1, 10)),
+    (np.array([], dtype=int), np.array([]))
+], ids=['single_class', 'empty'])
+def test_undefined_metrics_raise(y, scores):
+    engine = EvaluationEngine(n_bootstrap=10)
+    with pytest.raises(ValueError):
+        engine.metrics(y, scores)
+    with pytest.raises(ValueError):
+        engine.evaluate(y, scores)
+
+def test_single_class_segment_has_no_auc():
+    rng = np.random.default_rng(1)
+    y = np.r_[rng.integers(0, 2, 300), np.zeros(150, dtype=int)]
+    scores = rng.random(len(y))
+    segments = {'grade': np.r_[np.full(300, 'A'), np.full(150, 'B')]}
+
+    report = EvaluationEngine(n_bootstrap=20).evaluate(y, scores, segments=segments)
+
+    assert report['segments']['grade']['B']['auc'] is None
+    assert report['segments']['grade']['A']['auc'] == pytest.approx(roc_auc_score(y[:300], scores[:300]))
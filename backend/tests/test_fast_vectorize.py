@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+from ml.preprocessing.loan_vectorize import LoanVectorizer
+
+REFERENCE_DATE = '2024-06-30'
+# transform_records returns float32; LoanVectorizer.transform float64
+TOLERANCE = 1e-5
+
+@pytest.fixture(scope='module')
+def vectorizer(make_loans):
+    train = make_loans(2000, seed=0)
+    train['loan_status'] = np.random.default_rng(0).choice(['Fully Paid', 'Charged Off'], len(train))
+    vectorizer = LoanVectorizer()
+    vectorizer.fit(train, reference_date=REFERENCE_DATE)
+    return vectorizer
+
+def _assert_equivalent(vectorizer, df):
+    expected, _ = vectorizer.transform(df, reference_date=REFERENCE_DATE)
+    records = df.to_dict(orient='records')
+    actual = vectorizer.compile().transform_records(records, reference_date=REFERENCE_DATE)
+
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected.to_numpy(), rtol=0, atol=TOLERANCE)
+
+@pytest.mark.parametrize('text', [True, False], ids=['text_term_emp_length', 'numeric_term_emp_length'])
+def test_transform_records_matches_transform(vectorizer, make_loans, text):
+    _assert_equivalent(vectorizer, make_loans(300, seed=1, text=text))
+
+def test_unseen_categories_and_values(vectorizer, make_loans):
+    df = make_loans(50, seed=2)
+    df.loc[:9, 'purpose'] = 'space_travel'
+    df.loc[10:19, 'verification_status'] = 'Unknown'
+    df.loc[20:24, 'emp_length'] = 'n/a'
+    df.loc[25:29, 'term'] = ' 48 months'
+    df.loc[30:34, 'earliest_cr_line'] = 'not a date'
+    _assert_equivalent(vectorizer, df)
+
+def test_single_record(vectorizer, make_loans):
+    df = make_loans(1, seed=3)
+    expected, _ = vectorizer.transform(df, reference_date=REFERENCE_DATE)
+    actual = vectorizer.compile().transform_records(df.to_dict(orient='records')[0], reference_date=REFERENCE_DATE)
+    np.testing.assert_allclose(actual, expected.to_numpy(), rtol=0, atol=TOLERANCE)
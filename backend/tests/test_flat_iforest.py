@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import IsolationForest
+from ml.models.flat_iforest import FlatIsolationForest
+
+@pytest.mark.parametrize('params', [
+    {'n_estimators': 100, 'max_samples': 256},
+    {'n_estimators': 40, 'max_samples': 0.5, 'max_features': 0.6},
+    {'n_estimators': 25, 'max_samples': 2}
+], ids=['default', 'feature_subsets', 'tiny_trees'])
+def test_flat_forest_matches_score_samples(params):
+    rng = np.random.default_rng(0)
+    X_train = np.vstack([rng.normal(size=(2000, 8)), rng.normal(loc=6.0, size=(20, 8))])
+    X_train[:, 3] = rng.integers(0, 4, len(X_train))
+    forest = IsolationForest(random_state=0, **params).fit(X_train)
+
+    X = np.vstack([rng.normal(size=(500, 8)), rng.normal(scale=20.0, size=(50, 8)), X_train[:50]])
+    flat = FlatIsolationForest.from_sklearn(forest)
+    flat.chunk_rows = 128
+
+    np.testing.assert_allclose(flat.score_samples(X), forest.score_samples(X), rtol=0, atol=1e-12)
+
+def test_missing_values_rejected():
+    forest = IsolationForest(n_estimators=5, random_state=0).fit(np.random.default_rng(1).normal(size=(100, 3)))
+    with pytest.raises(ValueError):
+        FlatIsolationForest.from_sklearn(forest).score_samples(np.array([[0.0, np.nan, 1.0]]))
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+from ml.explanation.explainability import NativeTreeExplainer
+from ml.models.xgboost_model import XGBoostModel
+from ml.models.lightgbm_model import LightGBMModel
+
+shap = pytest.importorskip('shap')
+
+# Both engines run path-dependent tree SHAP; the boosters accumulate in
+# float32, so contributions agree to float32 rounding on log-odds scale
+TOLERANCE = 1e-4
+
+def _training_data(n_rows=4000, n_features=12, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n_rows, n_features))
+    X[:, 3] = rng.integers(0, 5, n_rows)
+    logits = X[:, 0] - 0.8 * X[:, 1] + 0.5 * X[:, 2] * X[:, 4] + 0.3 * X[:, 3]
+    y = (rng.random(n_rows) < 1 / (1 + np.exp(-logits))).astype(int)
+    # Missing values in training so the trees learn default directions
+    X[rng.random(X.shape) < 0.05] = np.nan
+    return X, y
+
+def _query_rows(n_features=12, seed=1):
+    rng = np.random.default_rng(seed)
+    rows = [
+        rng.normal(size=(200, n_features)),
+        rng.normal(scale=10.0, size=(50, n_features)),
+        np.zeros((1, n_features)),
+        np.full((1, n_features), np.nan)
+    ]
+    sparse = rng.normal(size=(100, n_features))
+    sparse[rng.random(sparse.shape) < 0.3] = np.nan
+    rows.append(sparse)
+    return np.vstack(rows)
+
+def _reference(model, X):
+    values = shap.TreeExplainer(model).shap_values(X)
+    if isinstance(values, list):
+        values = values[1]
+    values = np.asarray(values)
+    return values[:, :, 1] if values.ndim == 3 else values
+
+@pytest.mark.filterwarnings('ignore:LightGBM binary classifier:UserWarning')
+@pytest.mark.parametrize('wrapper', [
+    lambda: XGBoostModel({'n_estimators': 60, 'max_depth': 5, 'n_jobs': 1}),
+    lambda: LightGBMModel({'n_estimators': 60, 'num_leaves': 31, 'n_jobs': 1, 'verbose': -1})
+], ids=['xgboost', 'lightgbm'])
+def test_native_engine_matches_shap_tree_explainer(wrapper):
+    X, y = _training_data()
+    model = wrapper()
+    model.fit(X, y)
+
+    X_query = _query_rows()
+    native = NativeTreeExplainer(model.model)
+    contributions = native.shap_values(X_query)
+    reference = _reference(model.model, X_query)
+
+    assert contributions.shape == reference.shape
+    np.testing.assert_allclose(contributions, reference, rtol=0, atol=TOLERANCE)
+
+    # Local accuracy: contributions plus the bias reproduce the raw margin
+    margin = np.log(model.predict_proba(X_query)[:, 1]) - np.log(model.predict_proba(X_query)[:, 0])
+    np.testing.assert_allclose(contributions.sum(axis=1) + native.expected_value, margin, rtol=0, atol=TOLERANCE)
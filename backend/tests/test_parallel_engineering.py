@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+from ml.preprocessing.loan_vectorize import LoanVectorizer
+from ml.preprocessing.parallel import engineer_parallel
+
+REFERENCE_DATE = pd.Timestamp('2024-06-30')
+
+def _frame(make_loans, text=True):
+    df = make_loans(900, seed=4, text=text)
+    rng = np.random.default_rng(5)
+    df['Application Date'] = rng.choice(['2023-01-15', '2024-03-01', None], len(df))
+    if text:
+        # Junk the decoders must parse to NaN/NaT identically in every shard
+        df.loc[::97, 'term'] = ' 48 monthz'
+        df.loc[::89, 'emp_length'] = 'n/a'
+        df.loc[::83, 'earliest_cr_line'] = 'not a date'
+    return df
+
+@pytest.mark.parametrize('text', [True, False], ids=['text', 'numeric'])
+def test_engineer_parallel_matches_sequential(make_loans, text):
+    df = _frame(make_loans, text)
+    sequential = LoanVectorizer()._engineer_features(df, REFERENCE_DATE)
+    # Uneven shards: the last one is short
+    parallel = engineer_parallel(df, n_workers=3, reference_date=REFERENCE_DATE, shard_rows=250)
+
+    pd.testing.assert_frame_equal(parallel, sequential, check_exact=True)
+
+def test_parallel_fit_fills_decoder_tables(make_loans):
+    df = _frame(make_loans)
+    df['loan_status'] = np.random.default_rng(6).choice(['Fully Paid', 'Charged Off'], len(df))
+
+    sequential = LoanVectorizer()
+    sequential.fit(df, reference_date=REFERENCE_DATE)
+    parallel = LoanVectorizer()
+    parallel.fit(df, reference_date=REFERENCE_DATE, n_jobs=3)
+
+    tables = parallel.decoders.to_dict()
+    assert all(tables.values())
+    assert tables == sequential.decoders.to_dict()